@@ -0,0 +1,124 @@
+"""initial schema
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases bootstrapped by Base.metadata.create_all already have these
+    # tables, so only create what is missing.
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("email", sa.String(), nullable=True),
+            sa.Column("hashed_password", sa.String(), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("first_name", sa.String(), nullable=True),
+            sa.Column("last_name", sa.String(), nullable=True),
+            sa.Column("phone", sa.String(), nullable=True),
+            sa.Column("address", sa.String(), nullable=True),
+            sa.Column("role", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    if "restaurants" not in existing:
+        op.create_table(
+            "restaurants",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(), nullable=True),
+            sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        )
+        op.create_index("ix_restaurants_id", "restaurants", ["id"])
+        op.create_index("ix_restaurants_name", "restaurants", ["name"])
+
+    if "orders" not in existing:
+        op.create_table(
+            "orders",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("restaurant_id", sa.Integer(), sa.ForeignKey("restaurants.id"), nullable=True),
+            sa.Column("customer_name", sa.String(), nullable=True),
+            sa.Column("total_amount", sa.Float(), nullable=True),
+            sa.Column("timestamp", sa.DateTime(), nullable=True),
+            sa.Column("status", sa.String(), nullable=True),
+        )
+        op.create_index("ix_orders_id", "orders", ["id"])
+        op.create_index("ix_orders_timestamp", "orders", ["timestamp"])
+
+    if "sales" not in existing:
+        op.create_table(
+            "sales",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("restaurant_id", sa.Integer(), sa.ForeignKey("restaurants.id"), nullable=True),
+            sa.Column("amount", sa.Float(), nullable=True),
+            sa.Column("timestamp", sa.DateTime(), nullable=True),
+            sa.Column("order_id", sa.Integer(), sa.ForeignKey("orders.id"), nullable=True),
+        )
+        op.create_index("ix_sales_id", "sales", ["id"])
+        op.create_index("ix_sales_amount", "sales", ["amount"])
+        op.create_index("ix_sales_timestamp", "sales", ["timestamp"])
+
+    if "menu_items" not in existing:
+        op.create_table(
+            "menu_items",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("restaurant_id", sa.Integer(), sa.ForeignKey("restaurants.id"), nullable=True),
+            sa.Column("name", sa.String(), nullable=True),
+            sa.Column("price", sa.Float(), nullable=True),
+            sa.Column("cost", sa.Float(), nullable=True),
+            sa.Column("category", sa.String(), nullable=True),
+            sa.Column("is_available", sa.Boolean(), nullable=True),
+        )
+        op.create_index("ix_menu_items_id", "menu_items", ["id"])
+        op.create_index("ix_menu_items_name", "menu_items", ["name"])
+
+    if "order_items" not in existing:
+        op.create_table(
+            "order_items",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("order_id", sa.Integer(), sa.ForeignKey("orders.id"), nullable=True),
+            sa.Column("menu_item_id", sa.Integer(), sa.ForeignKey("menu_items.id"), nullable=True),
+            sa.Column("quantity", sa.Integer(), nullable=True),
+            sa.Column("unit_price", sa.Float(), nullable=True),
+        )
+        op.create_index("ix_order_items_id", "order_items", ["id"])
+
+    if "inventory_items" not in existing:
+        op.create_table(
+            "inventory_items",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("restaurant_id", sa.Integer(), sa.ForeignKey("restaurants.id"), nullable=True),
+            sa.Column("name", sa.String(), nullable=True),
+            sa.Column("quantity", sa.Float(), nullable=True),
+            sa.Column("unit", sa.String(), nullable=True),
+            sa.Column("unit_cost", sa.Float(), nullable=True),
+            sa.Column("min_threshold", sa.Float(), nullable=True),
+            sa.Column("last_updated", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_inventory_items_id", "inventory_items", ["id"])
+        op.create_index("ix_inventory_items_name", "inventory_items", ["name"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ("inventory_items", "order_items", "menu_items", "sales", "orders", "restaurants", "users"):
+        op.drop_table(table)
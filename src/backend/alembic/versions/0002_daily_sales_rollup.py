@@ -0,0 +1,50 @@
+"""daily sales rollup
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if sa.inspect(op.get_bind()).has_table("daily_sales_rollup"):
+        return
+    op.create_table(
+        "daily_sales_rollup",
+        sa.Column("restaurant_id", sa.Integer(), sa.ForeignKey("restaurants.id"), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("revenue", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("order_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    # Backfill from existing history; afterwards the app maintains it on writes
+    op.execute(
+        """
+        INSERT INTO daily_sales_rollup (restaurant_id, day, revenue, order_count)
+        SELECT restaurant_id, day, SUM(revenue), SUM(order_count)
+        FROM (
+            SELECT restaurant_id, DATE(timestamp) AS day, amount AS revenue, 0 AS order_count FROM sales
+            UNION ALL
+            SELECT restaurant_id, DATE(timestamp) AS day, 0 AS revenue, 1 AS order_count FROM orders
+        ) AS daily
+        WHERE restaurant_id IS NOT NULL AND day IS NOT NULL
+        GROUP BY restaurant_id, day
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("daily_sales_rollup")
@@ -0,0 +1,37 @@
+"""restaurant timestamp indexes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    "ix_sales_restaurant_id_timestamp": "sales",
+    "ix_orders_restaurant_id_timestamp": "orders",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    for name, table in INDEXES.items():
+        if name not in {index["name"] for index in inspector.get_indexes(table)}:
+            op.create_index(name, table, ["restaurant_id", "timestamp"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table in INDEXES.items():
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,59 @@
+"""menu item daily sales facts
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if sa.inspect(op.get_bind()).has_table("menu_item_daily_sales"):
+        return
+    op.create_table(
+        "menu_item_daily_sales",
+        sa.Column("menu_item_id", sa.Integer(), sa.ForeignKey("menu_items.id"), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("restaurant_id", sa.Integer(), sa.ForeignKey("restaurants.id"), nullable=False),
+        sa.Column("order_lines", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("quantity", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("revenue", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("cost", sa.Float(), nullable=False, server_default="0"),
+    )
+    op.create_index(
+        "ix_menu_item_daily_sales_restaurant_id_day", "menu_item_daily_sales", ["restaurant_id", "day"]
+    )
+    # Backfill from existing history at current menu costs; afterwards the app
+    # maintains it on order writes
+    op.execute(
+        """
+        INSERT INTO menu_item_daily_sales (menu_item_id, day, restaurant_id, order_lines, quantity, revenue, cost)
+        SELECT oi.menu_item_id, DATE(o.timestamp), mi.restaurant_id, COUNT(oi.id),
+               SUM(COALESCE(oi.quantity, 0)),
+               SUM(COALESCE(oi.quantity, 0) * COALESCE(oi.unit_price, mi.price, 0)),
+               SUM(COALESCE(oi.quantity, 0) * COALESCE(mi.cost, 0))
+        FROM order_items AS oi
+        JOIN orders AS o ON o.id = oi.order_id
+        JOIN menu_items AS mi ON mi.id = oi.menu_item_id
+        WHERE o.timestamp IS NOT NULL
+        GROUP BY oi.menu_item_id, DATE(o.timestamp), mi.restaurant_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_menu_item_daily_sales_restaurant_id_day", table_name="menu_item_daily_sales")
+    op.drop_table("menu_item_daily_sales")
@@ -0,0 +1,172 @@
+"""monthly partitions for sales, orders and order_items
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.database.partitions import (
+    PARTITION_MONTHS_AHEAD,
+    create_default_partition,
+    ensure_partitions,
+    partitioned_tables,
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("orders", "sales", "order_items")
+
+INDEXES = {
+    "orders": {
+        "ix_orders_id": ["id"],
+        "ix_orders_timestamp": ["timestamp"],
+        "ix_orders_restaurant_id_timestamp": ["restaurant_id", "timestamp"],
+    },
+    "sales": {
+        "ix_sales_id": ["id"],
+        "ix_sales_amount": ["amount"],
+        "ix_sales_timestamp": ["timestamp"],
+        "ix_sales_restaurant_id_timestamp": ["restaurant_id", "timestamp"],
+    },
+    "order_items": {
+        "ix_order_items_id": ["id"],
+        "ix_order_items_order_id": ["order_id"],
+    },
+}
+
+# Foreign keys to unpartitioned tables survive partitioning; the ones to
+# orders.id cannot, since id alone is no longer a unique key
+FOREIGN_KEYS = {
+    "orders": [("restaurant_id", "restaurants")],
+    "sales": [("restaurant_id", "restaurants")],
+    "order_items": [("menu_item_id", "menu_items")],
+}
+ORDER_REFERENCES = [("sales", "order_id"), ("order_items", "order_id")]
+
+# Names for the unnamed foreign keys reflected in SQLite batch mode
+_NAMING_CONVENTION = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+
+
+def _add_order_item_timestamp():
+    inspector = sa.inspect(op.get_bind())
+    if "timestamp" not in {column["name"] for column in inspector.get_columns("order_items")}:
+        op.add_column("order_items", sa.Column("timestamp", sa.DateTime(), nullable=True))
+    op.execute(
+        'UPDATE order_items SET "timestamp" = '
+        '(SELECT orders."timestamp" FROM orders WHERE orders.id = order_items.order_id) '
+        'WHERE "timestamp" IS NULL'
+    )
+    if "ix_order_items_order_id" not in {index["name"] for index in inspector.get_indexes("order_items")}:
+        op.create_index("ix_order_items_order_id", "order_items", ["order_id"])
+
+
+def _drop_order_references():
+    """The models have no database foreign keys to orders.id on any dialect,
+    so that both schemas are the same; on Postgres they cannot exist."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    for table, column in ORDER_REFERENCES:
+        foreign_keys = [
+            foreign_key for foreign_key in inspector.get_foreign_keys(table)
+            if foreign_key["referred_table"] == "orders"
+        ]
+        if not foreign_keys:
+            continue
+        if bind.dialect.name != "sqlite":
+            for foreign_key in foreign_keys:
+                op.drop_constraint(foreign_key["name"], table, type_="foreignkey")
+            continue
+        # SQLite cannot drop a constraint; batch mode copies the table without it
+        with op.batch_alter_table(table, naming_convention=_NAMING_CONVENTION) as batch_op:
+            batch_op.drop_constraint(f"fk_{table}_{column}_orders", type_="foreignkey")
+
+
+def _rebuild(table: str, new_name: str, partitioned: bool):
+    """Replace table with a copy that is (or is no longer) partitioned."""
+    bind = op.get_bind()
+    old = f"{table}_{new_name}"
+    sequence = bind.execute(sa.text(f"SELECT pg_get_serial_sequence('{table}', 'id')")).scalar()
+    primary_key = sa.inspect(bind).get_pk_constraint(table)["name"]
+
+    op.execute(f"ALTER TABLE {table} RENAME TO {old}")
+    op.execute(f"ALTER TABLE {old} RENAME CONSTRAINT {primary_key} TO {old}_pkey")
+    partition_by = ' PARTITION BY RANGE ("timestamp")' if partitioned else ""
+    op.execute(f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS){partition_by}")
+    if partitioned:
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN "timestamp" SET NOT NULL')
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, "timestamp")')
+    else:
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id)")
+    if sequence:
+        op.execute(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id")
+    return old
+
+
+def _finish(table: str, old: str):
+    op.execute(f"INSERT INTO {table} SELECT * FROM {old}")
+    op.execute(f"DROP TABLE {old}")
+    for name, columns in INDEXES[table].items():
+        op.create_index(name, table, columns)
+    for column, referred in FOREIGN_KEYS[table]:
+        op.create_foreign_key(f"{table}_{column}_fkey", table, referred, [column], ["id"])
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _add_order_item_timestamp()
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        _drop_order_references()
+        return
+    if partitioned_tables(bind) == set(TABLES):
+        return
+
+    for table in TABLES:
+        missing = bind.execute(sa.text(f'SELECT COUNT(*) FROM {table} WHERE "timestamp" IS NULL')).scalar()
+        if missing:
+            raise RuntimeError(
+                f"{table} has {missing} rows without a timestamp; set one before partitioning by timestamp"
+            )
+
+    _drop_order_references()
+
+    first = bind.execute(sa.text(
+        'SELECT MIN(first) FROM (SELECT MIN("timestamp") AS first FROM orders '
+        'UNION ALL SELECT MIN("timestamp") FROM sales) AS firsts'
+    )).scalar() or datetime.utcnow()
+
+    rebuilt = {table: _rebuild(table, "unpartitioned", partitioned=True) for table in TABLES}
+    for table in TABLES:
+        create_default_partition(bind, table)
+    ensure_partitions(bind, start=first.date(), months_ahead=PARTITION_MONTHS_AHEAD)
+    for table, old in rebuilt.items():
+        _finish(table, old)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql" and partitioned_tables(bind):
+        rebuilt = {table: _rebuild(table, "partitioned", partitioned=False) for table in TABLES}
+        for table, old in rebuilt.items():
+            # Dropping the parent drops its partitions
+            _finish(table, old)
+        for table, column in ORDER_REFERENCES:
+            op.create_foreign_key(f"{table}_{column}_fkey", table, "orders", [column], ["id"])
+    elif bind.dialect.name != "postgresql":
+        for table, column in ORDER_REFERENCES:
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.create_foreign_key(f"fk_{table}_{column}_orders", "orders", [column], ["id"])
+    op.drop_index("ix_order_items_order_id", table_name="order_items")
+    op.drop_column("order_items", "timestamp")
@@ -0,0 +1,45 @@
+"""recipe ingredients and partial index on low stock items
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LOW_STOCK = sa.text("quantity < min_threshold")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("recipe_ingredients"):
+        op.create_table(
+            "recipe_ingredients",
+            sa.Column("menu_item_id", sa.Integer(), sa.ForeignKey("menu_items.id"), primary_key=True),
+            sa.Column("inventory_item_id", sa.Integer(), sa.ForeignKey("inventory_items.id"), primary_key=True),
+            sa.Column("amount", sa.Float(), nullable=False),
+        )
+        op.create_index("ix_recipe_ingredients_inventory_item_id", "recipe_ingredients", ["inventory_item_id"])
+    if "ix_inventory_items_low_stock" not in {index["name"] for index in inspector.get_indexes("inventory_items")}:
+        op.create_index(
+            "ix_inventory_items_low_stock", "inventory_items", ["restaurant_id"],
+            postgresql_where=LOW_STOCK, sqlite_where=LOW_STOCK,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_inventory_items_low_stock", table_name="inventory_items")
+    op.drop_index("ix_recipe_ingredients_inventory_item_id", table_name="recipe_ingredients")
+    op.drop_table("recipe_ingredients")
@@ -0,0 +1,38 @@
+"""idempotency keys
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not sa.inspect(op.get_bind()).has_table("idempotency_keys"):
+        op.create_table(
+            "idempotency_keys",
+            sa.Column("scope", sa.String(32), primary_key=True),
+            sa.Column("key", sa.String(255), primary_key=True),
+            sa.Column("request_hash", sa.String(64), nullable=False),
+            sa.Column("response", sa.Text(), nullable=True),
+            sa.Column("expires_at", sa.DateTime(), nullable=False),
+        )
+        op.create_index("ix_idempotency_keys_expires_at", "idempotency_keys", ["expires_at"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_idempotency_keys_expires_at", table_name="idempotency_keys")
+    op.drop_table("idempotency_keys")
@@ -0,0 +1,36 @@
+"""restaurant versions
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, Sequence[str], None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # No backfill: a missing row reads as version 0 until the next write
+    if not sa.inspect(op.get_bind()).has_table("restaurant_versions"):
+        op.create_table(
+            "restaurant_versions",
+            sa.Column("restaurant_id", sa.Integer(), sa.ForeignKey("restaurants.id"), primary_key=True),
+            sa.Column("resource", sa.String(16), primary_key=True),
+            sa.Column("version", sa.Integer(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("restaurant_versions")
@@ -0,0 +1,77 @@
+import os
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import and_, select
+from sqlalchemy.orm import Session
+from app.database.models import InventoryItem, Order, OrderItem, Sale
+
+# Rows fetched per round trip from the server-side cursor; memory use of an
+# export is bounded by this, not by the size of the date range
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "5000"))
+
+def _in_range(statement, column, start: Optional[datetime], end: Optional[datetime]):
+    if start is not None:
+        statement = statement.where(column >= start)
+    if end is not None:
+        statement = statement.where(column < end)
+    return statement
+
+def sales_export(restaurant_id: int, start: Optional[datetime] = None, end: Optional[datetime] = None):
+    statement = select(
+        Sale.id, Sale.restaurant_id, Sale.order_id, Sale.amount, Sale.timestamp
+    ).where(Sale.restaurant_id == restaurant_id)
+    return _in_range(statement, Sale.timestamp, start, end).order_by(Sale.timestamp, Sale.id)
+
+def orders_export(restaurant_id: int, start: Optional[datetime] = None, end: Optional[datetime] = None):
+    """One row per order item (orders without items get one row with empty
+    item columns), ordered so each order's rows are contiguous."""
+    statement = select(
+        Order.id.label("order_id"), Order.restaurant_id, Order.customer_name, Order.total_amount,
+        Order.timestamp, Order.status,
+        OrderItem.id.label("item_id"), OrderItem.menu_item_id, OrderItem.quantity, OrderItem.unit_price,
+    ).outerjoin(
+        # Items carry their order's timestamp; matching on it lets Postgres
+        # join partition by partition
+        OrderItem, and_(OrderItem.order_id == Order.id, OrderItem.timestamp == Order.timestamp),
+    ).where(Order.restaurant_id == restaurant_id)
+    return _in_range(statement, Order.timestamp, start, end).order_by(Order.timestamp, Order.id, OrderItem.id)
+
+def inventory_export(restaurant_id: int, start: Optional[datetime] = None, end: Optional[datetime] = None):
+    """Current stock levels; the date range applies to last_updated."""
+    statement = select(
+        InventoryItem.id, InventoryItem.restaurant_id, InventoryItem.name, InventoryItem.quantity,
+        InventoryItem.unit, InventoryItem.unit_cost, InventoryItem.min_threshold, InventoryItem.last_updated,
+    ).where(InventoryItem.restaurant_id == restaurant_id)
+    return _in_range(statement, InventoryItem.last_updated, start, end).order_by(InventoryItem.id)
+
+def stream_rows(db: Session, statement, chunk_size: int = EXPORT_CHUNK_SIZE):
+    """Yield the rows of statement in lists of up to chunk_size.
+
+    yield_per implies stream_results, so on Postgres the rows come from a
+    server-side cursor instead of being buffered by the driver.
+    """
+    result = db.execute(statement.execution_options(yield_per=chunk_size))
+    yield from result.partitions()
+
+def order_documents(chunks):
+    """Regroup orders_export rows into one dict per order, shaped like
+    OrderResponse. An order split across two chunks is emitted with the later one."""
+    current = None
+    for rows in chunks:
+        documents = []
+        for row in rows:
+            if current is None or current["id"] != row.order_id:
+                if current is not None:
+                    documents.append(current)
+                current = {
+                    "customer_name": row.customer_name, "total_amount": row.total_amount, "timestamp": row.timestamp,
+                    "status": row.status, "id": row.order_id, "restaurant_id": row.restaurant_id, "items": [],
+                }
+            if row.item_id is not None:
+                current["items"].append({
+                    "id": row.item_id, "menu_item_id": row.menu_item_id,
+                    "quantity": row.quantity, "unit_price": row.unit_price,
+                })
+        yield documents
+    if current is not None:
+        yield [current]
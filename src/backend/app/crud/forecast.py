@@ -0,0 +1,101 @@
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.database.models import InventoryItem, MenuItem, MenuItemDailySales, RecipeIngredient
+
+
+def get_daily_quantities(db: Session, restaurant_id: int, first_day: date, last_day: date):
+    """The restaurant's menu item ids (ascending) and names, and units sold by
+    each per day from first_day to last_day as an items x days array."""
+    import numpy as np
+
+    items = db.query(MenuItem.id, MenuItem.name).filter(
+        MenuItem.restaurant_id == restaurant_id
+    ).order_by(MenuItem.id).all()
+    facts = db.query(MenuItemDailySales.menu_item_id, MenuItemDailySales.day, MenuItemDailySales.quantity).filter(
+        MenuItemDailySales.restaurant_id == restaurant_id,
+        MenuItemDailySales.day >= first_day,
+        MenuItemDailySales.day <= last_day,
+    ).all()
+
+    ids = np.array([item.id for item in items], dtype=np.int64)
+    quantities = np.zeros((len(ids), (last_day - first_day).days + 1))
+    if facts and len(ids):
+        fact_ids, days, sold = zip(*facts)
+        fact_ids = np.array(fact_ids, dtype=np.int64)
+        rows = np.searchsorted(ids, fact_ids)
+        known = (rows < len(ids)) & (ids[np.minimum(rows, len(ids) - 1)] == fact_ids)
+        columns = np.array([(day - first_day).days for day in days])
+        quantities[rows[known], columns[known]] = np.asarray(sold, dtype=float)[known]
+    return ids, [item.name for item in items], quantities
+
+
+def get_demand_forecast(db: Session, restaurant_id: int, days: int = 7, today: Optional[date] = None):
+    """Units of every menu item expected to sell from today over the next
+    days, and the inventory they use according to the recipes.
+
+    The model state comes from the forecast cache (app/services/forecasting.py),
+    so this reads the menu version and the recipes, not the sales history.
+    """
+    # Imported here so that numpy loads with the first forecast request, not at startup
+    import numpy as np
+    from app.services.forecasting import forecasts, predict
+
+    today = today or datetime.utcnow().date()
+    entry = forecasts.get(db, restaurant_id, today - timedelta(days=1))
+    dates = [today + timedelta(days=offset) for offset in range(days)]
+    expected = predict(entry.state, dates)
+    totals = expected.sum(axis=1)
+
+    lines = db.query(
+        RecipeIngredient.menu_item_id,
+        RecipeIngredient.inventory_item_id,
+        RecipeIngredient.amount,
+        InventoryItem.name,
+        InventoryItem.unit,
+        InventoryItem.quantity,
+    ).join(InventoryItem, InventoryItem.id == RecipeIngredient.inventory_item_id).filter(
+        InventoryItem.restaurant_id == restaurant_id
+    ).all()
+
+    inventory = []
+    if lines and len(entry.menu_item_ids):
+        menu_item_ids, inventory_item_ids, amounts = (np.array(column) for column in list(zip(*lines))[:3])
+        rows = np.searchsorted(entry.menu_item_ids, menu_item_ids)
+        known = (rows < len(entry.menu_item_ids)) & (
+            entry.menu_item_ids[np.minimum(rows, len(entry.menu_item_ids) - 1)] == menu_item_ids
+        )
+        unique_ids, groups = np.unique(inventory_item_ids, return_inverse=True)
+        needed = np.bincount(
+            groups[known], weights=totals[rows[known]] * amounts[known].astype(float), minlength=len(unique_ids)
+        )
+        details = {line.inventory_item_id: line for line in lines}
+        for inventory_item_id, need in zip(unique_ids.tolist(), needed):
+            line = details[inventory_item_id]
+            on_hand = line.quantity or 0.0
+            inventory.append({
+                "inventory_item_id": inventory_item_id,
+                "name": line.name,
+                "unit": line.unit,
+                "quantity": on_hand,
+                "needed": round(float(need), 3),
+                "shortfall": round(max(float(need) - on_hand, 0.0), 3),
+            })
+
+    return {
+        "restaurant_id": restaurant_id,
+        "as_of": entry.state.as_of,
+        "days": dates,
+        "items": [
+            {
+                "menu_item_id": menu_item_id,
+                "name": name,
+                "quantities": [round(float(value), 2) for value in row],
+                "total": round(float(total), 2),
+            }
+            for menu_item_id, name, row, total in zip(entry.menu_item_ids.tolist(), entry.names, expected, totals)
+        ],
+        "inventory": inventory,
+    }
@@ -1,12 +1,32 @@
+from datetime import datetime
+from typing import Optional
 from sqlalchemy.orm import Session
+from app.crud.pagination import DEFAULT_PAGE_SIZE, id_page
+from app.crud.version import INVENTORY, bump_versions
+from app.services.events import notify_write
 from app.database.models import InventoryItem
 from app.schemas.inventory_item import InventoryItemCreate
 
 def get_inventory_item(db: Session, inventory_item_id: int):
     return db.query(InventoryItem).filter(InventoryItem.id == inventory_item_id).first()
 
-def get_inventory_items_by_restaurant(db: Session, restaurant_id: int):
-    return db.query(InventoryItem).filter(InventoryItem.restaurant_id == restaurant_id).all()
+def get_inventory_items_by_restaurant(
+    db: Session,
+    restaurant_id: int,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
+    # Inventory has no event timestamp, and last_updated changes with every
+    # order that consumes stock (and may be NULL), so pages are keyed on id;
+    # start/end only filter on the last stock update
+    query = db.query(InventoryItem).filter(InventoryItem.restaurant_id == restaurant_id)
+    if start is not None:
+        query = query.filter(InventoryItem.last_updated >= start)
+    if end is not None:
+        query = query.filter(InventoryItem.last_updated < end)
+    return id_page(query, InventoryItem.id, cursor=cursor, limit=limit)
 
 def create_inventory_item(db: Session, inventory_item: InventoryItemCreate):
     db_inventory_item = InventoryItem(
@@ -19,6 +39,8 @@ def create_inventory_item(db: Session, inventory_item: InventoryItemCreate):
         last_updated=inventory_item.last_updated
     )
     db.add(db_inventory_item)
+    bump_versions(db, inventory_item.restaurant_id, INVENTORY)
     db.commit()
     db.refresh(db_inventory_item)
+    notify_write(db_inventory_item.restaurant_id, "inventory_item")
     return db_inventory_item
@@ -0,0 +1,135 @@
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import Float, cast, func, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from app.crud.rollup import get_daily_revenue, get_daily_revenue_by_restaurant
+from app.database.models import InventoryItem, Order, Sale
+
+# KPI filters compare the raw timestamp column against a half-open range
+# [start, end) instead of wrapping it in DATE(...), so the planner can use the
+# composite (restaurant_id, timestamp) indexes.
+
+
+def day_range(day: date) -> tuple[datetime, datetime]:
+    start = datetime.combine(day, datetime.min.time())
+    return start, start + timedelta(days=1)
+
+
+def _today(today: Optional[date]) -> date:
+    return today or datetime.utcnow().date()
+
+
+def revenue_today_query(db: Session, restaurant_id: int, today: Optional[date] = None):
+    start, end = day_range(_today(today))
+    return db.query(func.coalesce(func.sum(Sale.amount), 0)).filter(
+        Sale.restaurant_id == restaurant_id,
+        Sale.timestamp >= start,
+        Sale.timestamp < end,
+    )
+
+
+def orders_today_query(db: Session, restaurant_id: int, today: Optional[date] = None):
+    start, end = day_range(_today(today))
+    return db.query(func.count(Order.id)).filter(
+        Order.restaurant_id == restaurant_id,
+        Order.timestamp >= start,
+        Order.timestamp < end,
+    )
+
+
+def get_revenue_today(db: Session, restaurant_id: int, today: Optional[date] = None):
+    return revenue_today_query(db, restaurant_id, today).scalar()
+
+
+def get_orders_today(db: Session, restaurant_id: int, today: Optional[date] = None):
+    return orders_today_query(db, restaurant_id, today).scalar()
+
+
+def get_inventory_below_threshold(db: Session, restaurant_id: int):
+    return db.query(func.count(InventoryItem.id)).filter(
+        InventoryItem.restaurant_id == restaurant_id,
+        InventoryItem.quantity < InventoryItem.min_threshold,
+    ).scalar()
+
+
+def get_revenue_last_30_days(db: Session, restaurant_id: int, today: Optional[date] = None):
+    start = _today(today) - timedelta(days=30)
+    return [
+        {"date": row.day, "revenue": row.revenue}
+        for row in get_daily_revenue(db, restaurant_id=restaurant_id, start=start)
+    ]
+
+
+def _revenue_row(row):
+    return {
+        "date": row.day.isoformat(),
+        "year_month": row.day.strftime("%Y-%m"),
+        "revenue": float(row.revenue)
+    }
+
+
+def get_revenue_this_year(db: Session, restaurant_id: int, today: Optional[date] = None):
+    year_start = date(_today(today).year, 1, 1)
+    return [_revenue_row(row) for row in get_daily_revenue(db, restaurant_id=restaurant_id, start=year_start)]
+
+
+def get_scalar_kpis(db: Session, restaurant_ids: list[int], today: Optional[date] = None):
+    """Revenue today, orders today and low stock count for every restaurant in
+    one statement: each metric is a grouped subquery tagged with its name."""
+    start, end = day_range(_today(today))
+    revenue = select(
+        literal("revenue_today").label("kpi"),
+        Sale.restaurant_id,
+        func.sum(Sale.amount).label("value"),
+    ).where(
+        Sale.restaurant_id.in_(restaurant_ids),
+        Sale.timestamp >= start,
+        Sale.timestamp < end,
+    ).group_by(Sale.restaurant_id)
+    orders = select(
+        literal("orders_today"),
+        Order.restaurant_id,
+        cast(func.count(Order.id), Float),
+    ).where(
+        Order.restaurant_id.in_(restaurant_ids),
+        Order.timestamp >= start,
+        Order.timestamp < end,
+    ).group_by(Order.restaurant_id)
+    low_stock = select(
+        literal("low_stock_items"),
+        InventoryItem.restaurant_id,
+        cast(func.count(InventoryItem.id), Float),
+    ).where(
+        InventoryItem.restaurant_id.in_(restaurant_ids),
+        InventoryItem.quantity < InventoryItem.min_threshold,
+    ).group_by(InventoryItem.restaurant_id)
+
+    snapshots = {
+        restaurant_id: {"revenue_today": 0, "orders_today": 0, "low_stock_items": 0}
+        for restaurant_id in restaurant_ids
+    }
+    for kpi_name, restaurant_id, value in db.execute(union_all(revenue, orders, low_stock)):
+        snapshots[restaurant_id][kpi_name] = value if kpi_name == "revenue_today" else int(value)
+    return snapshots
+
+
+def get_kpis(db: Session, restaurant_id: int, today: Optional[date] = None):
+    today = _today(today)
+    return {
+        **get_scalar_kpis(db, [restaurant_id], today)[restaurant_id],
+        "revenue_this_year": get_revenue_this_year(db, restaurant_id, today),
+    }
+
+
+def get_kpis_batch(db: Session, restaurant_ids: list[int], today: Optional[date] = None):
+    """KPIs for many restaurants in two queries: scalars, then yearly series."""
+    today = _today(today)
+    snapshots = get_scalar_kpis(db, restaurant_ids, today)
+    for snapshot in snapshots.values():
+        snapshot["revenue_this_year"] = []
+    rows = get_daily_revenue_by_restaurant(db, restaurant_ids, start=date(today.year, 1, 1))
+    for row in rows:
+        snapshots[row.restaurant_id]["revenue_this_year"].append(_revenue_row(row))
+    return [{"restaurant_id": restaurant_id, **snapshot} for restaurant_id, snapshot in snapshots.items()]
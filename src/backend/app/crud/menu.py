@@ -0,0 +1,92 @@
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+
+from app.database import models
+
+
+def get_menu_performance_batch(
+    db: Session,
+    restaurant_ids: list[int],
+    days: int = 30,
+    method: str = "average",
+    today: Optional[date] = None,
+):
+    """Menu engineering for several restaurants, keyed by restaurant id.
+
+    Reads the daily menu item facts and the daily order rollup (two queries,
+    one row per item and per restaurant) and classifies every item at once,
+    so the cost no longer grows with the number of orders in the window.
+    """
+    start = (today or datetime.now().date()) - timedelta(days=days)
+    facts = models.MenuItemDailySales
+    items = db.query(
+        models.MenuItem.id,
+        models.MenuItem.restaurant_id,
+        models.MenuItem.name,
+        models.MenuItem.price,
+        models.MenuItem.cost,
+        func.coalesce(func.sum(facts.order_lines), 0).label("order_lines"),
+        func.coalesce(func.sum(facts.quantity), 0).label("quantity"),
+        func.coalesce(func.sum(facts.revenue), 0.0).label("revenue"),
+        func.coalesce(func.sum(facts.cost), 0.0).label("cost_total"),
+    ).outerjoin(
+        facts, and_(facts.menu_item_id == models.MenuItem.id, facts.day >= start)
+    ).filter(
+        models.MenuItem.restaurant_id.in_(restaurant_ids)
+    ).group_by(
+        models.MenuItem.id
+    ).order_by(
+        models.MenuItem.restaurant_id, models.MenuItem.id
+    ).all()
+
+    order_counts = dict(
+        db.query(models.DailySalesRollup.restaurant_id, func.sum(models.DailySalesRollup.order_count)).filter(
+            models.DailySalesRollup.restaurant_id.in_(restaurant_ids),
+            models.DailySalesRollup.day >= start,
+        ).group_by(models.DailySalesRollup.restaurant_id).all()
+    )
+
+    results = {restaurant_id: [] for restaurant_id in restaurant_ids}
+    if not items:
+        return results
+
+    # Imported here so that numpy loads with the first menu request, not at startup
+    import numpy as np
+    from app.services.menu_engineering import classify
+
+    group_of = {restaurant_id: index for index, restaurant_id in enumerate(restaurant_ids)}
+    columns = list(zip(*items))
+    quantity = np.array(columns[6], dtype=float)
+    revenue = np.array(columns[7], dtype=float)
+    analysis = classify(
+        groups=[group_of[restaurant_id] for restaurant_id in columns[1]],
+        order_lines=columns[5],
+        quantity=quantity,
+        revenue=revenue,
+        cost=columns[8],
+        price=np.array(columns[3], dtype=float),
+        unit_cost=np.array(columns[4], dtype=float),
+        # Avoid division by zero, as the original per-restaurant query did
+        orders=[order_counts.get(restaurant_id) or 1 for restaurant_id in restaurant_ids],
+        method=method,
+    )
+    for index, item in enumerate(items):
+        results[item.restaurant_id].append({
+            "menu_item_id": item.id,
+            "name": item.name,
+            "quantity": int(quantity[index]),
+            "revenue": float(revenue[index]),
+            "popularity": float(analysis["popularity"][index]),
+            "profitability": float(analysis["profitability"][index]),
+            "menu_mix": float(analysis["menu_mix"][index]),
+            "contribution_margin": float(analysis["contribution_margin"][index]),
+            "category": str(analysis["category"][index]),
+        })
+    return results
+
+
+def get_menu_performance(db: Session, restaurant_id: int, days: int = 30, method: str = "average"):
+    return get_menu_performance_batch(db, [restaurant_id], days=days, method=method)[restaurant_id]
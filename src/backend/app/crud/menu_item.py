@@ -1,4 +1,5 @@
 from sqlalchemy.orm import Session
+from app.crud.version import MENU, bump_versions
 from app.database.models import MenuItem
 from app.schemas.menu_item import MenuItemCreate
 
@@ -18,6 +19,7 @@ def create_menu_item(db: Session, menu_item: MenuItemCreate):
         is_available=menu_item.is_available
     )
     db.add(db_menu_item)
+    bump_versions(db, menu_item.restaurant_id, MENU)
     db.commit()
     db.refresh(db_menu_item)
     return db_menu_item
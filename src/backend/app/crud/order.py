@@ -1,16 +1,85 @@
-from sqlalchemy.orm import Session
-from app.database.models import Order, OrderItem
-from app.schemas.order import OrderCreate
+import os
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, selectinload
+from app.crud.pagination import DEFAULT_PAGE_SIZE, as_dicts, keyset_page
+from app.crud.recipe import consume_ingredients
+from app.crud.rollup import record_activity, record_menu_item_sales
+from app.services.events import notify_sales, notify_write
+from app.database.models import MenuItem, Order, OrderItem, Restaurant, Sale
+from app.schemas.order import BulkOrderCreate, OrderCreate
 from app.schemas.order_item import OrderItemCreate
 
+# Items are loaded with one IN (...) query per page instead of one lazy SELECT
+# per order when OrderResponse serializes them.
+def _orders_with_items(db: Session):
+    return db.query(Order).options(selectinload(Order.items))
+
 def get_order(db: Session, order_id: int):
-    return db.query(Order).filter(Order.id == order_id).first()
+    return _orders_with_items(db).filter(Order.id == order_id).first()
+
+def get_orders_by_restaurant(
+    db: Session,
+    restaurant_id: int,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
+    query = _orders_with_items(db).filter(Order.restaurant_id == restaurant_id)
+    return keyset_page(query, Order.timestamp, Order.id, cursor=cursor, limit=limit, start=start, end=end)
+
+# OrderResponse / OrderItemResponse fields, in schema order
+ORDER_RESPONSE_COLUMNS = (
+    Order.customer_name, Order.total_amount, Order.timestamp, Order.status, Order.id, Order.restaurant_id,
+)
+ORDER_ITEM_RESPONSE_COLUMNS = (OrderItem.id, OrderItem.menu_item_id, OrderItem.quantity, OrderItem.unit_price)
+# Bound parameters per IN (...) query; SQLite caps the number per statement
+ITEM_LOOKUP_CHUNK = 1000
 
-def get_orders_by_restaurant(db: Session, restaurant_id: int):
-    return db.query(Order).filter(Order.restaurant_id == restaurant_id).all()
+def get_order_rows_by_restaurant(
+    db: Session,
+    restaurant_id: int,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
+    """get_orders_by_restaurant as plain dicts, selecting only the response columns."""
+    query = db.query(*ORDER_RESPONSE_COLUMNS).filter(Order.restaurant_id == restaurant_id)
+    rows, next_cursor = keyset_page(query, Order.timestamp, Order.id, cursor=cursor, limit=limit, start=start, end=end)
+    orders = as_dicts(rows)
+    if not orders:
+        return orders, next_cursor
+
+    items_by_order = {order["id"]: [] for order in orders}
+    for order in orders:
+        order["items"] = items_by_order[order["id"]]
+    # Items carry their order's timestamp, so bounding it lets Postgres skip
+    # partitions outside the page
+    first = min(order["timestamp"] for order in orders)
+    last = max(order["timestamp"] for order in orders)
+    order_ids = list(items_by_order)
+    for offset in range(0, len(order_ids), ITEM_LOOKUP_CHUNK):
+        item_rows = (
+            db.query(OrderItem.order_id, *ORDER_ITEM_RESPONSE_COLUMNS)
+            .filter(
+                OrderItem.order_id.in_(order_ids[offset:offset + ITEM_LOOKUP_CHUNK]),
+                OrderItem.timestamp >= first,
+                OrderItem.timestamp <= last,
+            )
+            .order_by(OrderItem.id)
+            .all()
+        )
+        for order_id, item_id, menu_item_id, quantity, unit_price in item_rows:
+            items_by_order[order_id].append(
+                {"id": item_id, "menu_item_id": menu_item_id, "quantity": quantity, "unit_price": unit_price}
+            )
+    return orders, next_cursor
 
 def get_orders(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Order).offset(skip).limit(limit).all()
+    return _orders_with_items(db).order_by(Order.id).offset(skip).limit(limit).all()
 
 def create_order(db: Session, order: OrderCreate, items: list[OrderItemCreate]):
     db_order = Order(
@@ -21,16 +90,131 @@ def create_order(db: Session, order: OrderCreate, items: list[OrderItemCreate]):
         status=order.status
     )
     db.add(db_order)
-    db.commit()
-    db.refresh(db_order)
+    db.flush()  # Assigns db_order.id without ending the transaction
 
     for item in items:
         db_item = OrderItem(
             order_id=db_order.id,
             menu_item_id=item.menu_item_id,
             quantity=item.quantity,
-            unit_price=item.unit_price
+            unit_price=item.unit_price,
+            timestamp=db_order.timestamp
         )
         db.add(db_item)
+    record_activity(db, orders=[(db_order.restaurant_id, db_order.timestamp)])
+    record_menu_item_sales(
+        db, [(item.menu_item_id, db_order.timestamp, item.quantity, item.unit_price) for item in items]
+    )
+    consumed = consume_ingredients(db, [(item.menu_item_id, item.quantity) for item in items])
     db.commit()
+    notify_write(order.restaurant_id, "order")
+    if consumed:
+        notify_write(order.restaurant_id, "inventory_item")
     return db_order
+
+MAX_BULK_ORDERS = int(os.getenv("MAX_BULK_ORDERS", "1000"))
+
+def create_orders_bulk(db: Session, orders: list[BulkOrderCreate]):
+    """Insert orders, their items and sales in a single transaction.
+
+    Orders referencing an unknown restaurant or a menu item from another
+    restaurant are rejected individually; the rest are written with one
+    multi-row INSERT per table. Returns one result dict per input order.
+    """
+    restaurant_ids = {order.restaurant_id for order in orders}
+    menu_item_ids = {item.menu_item_id for order in orders for item in order.items}
+    known_restaurants = {
+        row.id for row in db.query(Restaurant.id).filter(Restaurant.id.in_(restaurant_ids))
+    }
+    menu_items = {
+        row.id: (row.restaurant_id, row.price, row.cost)
+        for row in db.query(MenuItem.id, MenuItem.restaurant_id, MenuItem.price, MenuItem.cost).filter(
+            MenuItem.id.in_(menu_item_ids)
+        )
+    }
+
+    results = []
+    accepted = []
+    for index, order in enumerate(orders):
+        result = {"index": index, "status": "rejected"}
+        results.append(result)
+        if order.restaurant_id not in known_restaurants:
+            result["detail"] = "Restaurant not found"
+        elif any(menu_items.get(item.menu_item_id, (None,))[0] != order.restaurant_id for item in order.items):
+            result["detail"] = "Menu item not found for this restaurant"
+        else:
+            accepted.append((order, result))
+
+    if not accepted:
+        return results
+
+    order_ids = db.execute(
+        insert(Order).returning(Order.id, sort_by_parameter_order=True),
+        [
+            {
+                "restaurant_id": order.restaurant_id,
+                "customer_name": order.customer_name,
+                "total_amount": order.total_amount,
+                "timestamp": order.timestamp,
+                "status": order.status,
+            }
+            for order, _ in accepted
+        ],
+    ).scalars().all()
+
+    item_rows = [
+        {
+            "order_id": order_id,
+            "menu_item_id": item.menu_item_id,
+            "quantity": item.quantity,
+            "unit_price": item.unit_price,
+            "timestamp": order.timestamp,
+        }
+        for (order, _), order_id in zip(accepted, order_ids)
+        for item in order.items
+    ]
+    if item_rows:
+        db.execute(insert(OrderItem), item_rows)
+
+    with_sale = [(order, result, order_id) for (order, result), order_id in zip(accepted, order_ids) if order.create_sale]
+    sale_ids = []
+    if with_sale:
+        sale_ids = db.execute(
+            insert(Sale).returning(Sale.id, sort_by_parameter_order=True),
+            [
+                {
+                    "restaurant_id": order.restaurant_id,
+                    "amount": order.total_amount,
+                    "timestamp": order.timestamp,
+                    "order_id": order_id,
+                }
+                for order, _, order_id in with_sale
+            ],
+        ).scalars().all()
+    record_activity(
+        db,
+        sales=[(order.restaurant_id, order.timestamp, order.total_amount) for order, _, _ in with_sale],
+        orders=[(order.restaurant_id, order.timestamp) for order, _ in accepted],
+    )
+    record_menu_item_sales(
+        db,
+        [(item.menu_item_id, order.timestamp, item.quantity, item.unit_price) for order, _ in accepted for item in order.items],
+        menu_items=menu_items,
+    )
+    consumed = consume_ingredients(
+        db, [(item.menu_item_id, item.quantity) for order, _ in accepted for item in order.items]
+    )
+    db.commit()
+    notify_sales(
+        (order.restaurant_id, sale_id, order.timestamp, order.total_amount)
+        for (order, _, _), sale_id in zip(with_sale, sale_ids)
+    )
+    notify_write([order.restaurant_id for order, _ in accepted], "order")
+    if consumed:
+        notify_write([order.restaurant_id for order, _ in accepted], "inventory_item")
+
+    for (_, result), order_id in zip(accepted, order_ids):
+        result.update(status="created", order_id=order_id)
+    for (_, result, _), sale_id in zip(with_sale, sale_ids):
+        result["sale_id"] = sale_id
+    return results
@@ -1,6 +1,11 @@
+from typing import Optional
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from app.database.models import OrderItem
+from app.crud.recipe import consume_ingredients
+from app.crud.rollup import record_menu_item_sales
+from app.database.models import Order, OrderItem
 from app.schemas.order_item import OrderItemCreate
+from app.services.events import notify_write
 
 def get_order_item(db: Session, order_item_id: int):
     return db.query(OrderItem).filter(OrderItem.id == order_item_id).first()
@@ -9,13 +14,69 @@ def get_order_items_by_order(db: Session, order_id: int):
     return db.query(OrderItem).filter(OrderItem.order_id == order_id).all()
 
 def create_order_item(db: Session, order_item: OrderItemCreate):
+    """Returns None if the order does not exist."""
+    # Checked here rather than by a foreign key, see app/database/partitions.py
+    order = db.get(Order, order_item.order_id)
+    if order is None:
+        return None
+    restaurant_id = order.restaurant_id
     db_order_item = OrderItem(
         order_id=order_item.order_id,
         menu_item_id=order_item.menu_item_id,
         quantity=order_item.quantity,
-        unit_price=order_item.unit_price
+        unit_price=order_item.unit_price,
+        timestamp=order.timestamp
     )
     db.add(db_order_item)
+    record_menu_item_sales(
+        db, [(order_item.menu_item_id, order.timestamp, order_item.quantity, order_item.unit_price)]
+    )
+    consumed = consume_ingredients(db, [(order_item.menu_item_id, order_item.quantity)])
     db.commit()
     db.refresh(db_order_item)
+    notify_write(restaurant_id, "order_item")
+    if consumed:
+        notify_write(restaurant_id, "inventory_item")
     return db_order_item
+
+def create_order_items_batch(db: Session, order_items: list[OrderItemCreate]) -> list[Optional[dict]]:
+    """create_order_item for many items in one transaction and one INSERT.
+
+    Returns, in input order, each created item as an OrderItemResponse-shaped
+    dict, or None for an item whose order does not exist.
+    """
+    orders = {
+        row.id: row
+        for row in db.query(Order.id, Order.restaurant_id, Order.timestamp).filter(
+            Order.id.in_({item.order_id for item in order_items})
+        )
+    }
+    results = [None] * len(order_items)
+    accepted = [index for index, item in enumerate(order_items) if item.order_id in orders]
+    if not accepted:
+        return results
+
+    lines = [(order_items[index], orders[order_items[index].order_id]) for index in accepted]
+    ids = db.execute(
+        insert(OrderItem).returning(OrderItem.id, sort_by_parameter_order=True),
+        [
+            {"order_id": item.order_id, "menu_item_id": item.menu_item_id, "quantity": item.quantity,
+             "unit_price": item.unit_price, "timestamp": order.timestamp}
+            for item, order in lines
+        ],
+    ).scalars().all()
+    record_menu_item_sales(
+        db, [(item.menu_item_id, order.timestamp, item.quantity, item.unit_price) for item, order in lines]
+    )
+    consumed = consume_ingredients(db, [(item.menu_item_id, item.quantity) for item, _ in lines])
+    db.commit()
+    for index, (item, _), item_id in zip(accepted, lines, ids):
+        results[index] = {
+            "quantity": item.quantity, "unit_price": item.unit_price, "id": item_id,
+            "order_id": item.order_id, "menu_item_id": item.menu_item_id,
+        }
+    restaurant_ids = [order.restaurant_id for _, order in lines]
+    notify_write(restaurant_ids, "order_item")
+    if consumed:
+        notify_write(restaurant_ids, "inventory_item")
+    return results
@@ -0,0 +1,101 @@
+import base64
+import json
+import os
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "100"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "500"))
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    raw = json.dumps([timestamp.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor("Invalid pagination cursor") from exc
+
+
+def encode_id_cursor(row_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([row_id]).encode()).decode().rstrip("=")
+
+
+def decode_id_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        (row_id,) = json.loads(base64.urlsafe_b64decode(padded))
+        return int(row_id)
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor("Invalid pagination cursor") from exc
+
+
+def keyset_page(
+    query: Query,
+    timestamp_column,
+    id_column,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
+    """Newest-first page over (timestamp, id); returns (rows, next_cursor).
+
+    The cursor filter is a row-value comparison on an indexed column pair, so
+    every page is a bounded index range scan regardless of how deep it is.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if start is not None:
+        query = query.filter(timestamp_column >= start)
+    if end is not None:
+        query = query.filter(timestamp_column < end)
+    if cursor:
+        last_timestamp, last_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            timestamp_column < last_timestamp,
+            and_(timestamp_column == last_timestamp, id_column < last_id),
+        ))
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.order_by(timestamp_column.desc(), id_column.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, timestamp_column.key), getattr(last, id_column.key))
+
+
+def id_page(query: Query, id_column, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE):
+    """Page in ascending id order; returns (rows, next_cursor).
+
+    For rows without an immutable timestamp: a row never moves between pages
+    however often it is updated while a client is paging.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if cursor:
+        query = query.filter(id_column > decode_id_cursor(cursor))
+    rows = query.order_by(id_column).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_id_cursor(getattr(rows[-1], id_column.key))
+
+
+def as_dicts(rows) -> list[dict]:
+    """Plain dicts from the rows of a column query (no ORM objects involved)."""
+    if not rows:
+        return []
+    keys = rows[0]._fields
+    return [dict(zip(keys, row)) for row in rows]
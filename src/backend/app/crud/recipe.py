@@ -0,0 +1,94 @@
+import os
+from collections import defaultdict
+from datetime import datetime
+from typing import Iterable, Optional
+from sqlalchemy import case, func, select, update
+from sqlalchemy.orm import Session
+from app.crud.version import INVENTORY, bump_versions
+from app.database.models import InventoryItem, MenuItem, RecipeIngredient
+from app.schemas.recipe import RecipeIngredientCreate
+from app.services.events import notify_write
+
+# Decrement inventory through the recipes when orders are written
+INVENTORY_CONSUMPTION = os.getenv("INVENTORY_CONSUMPTION", "true").lower() in ("1", "true", "yes")
+
+
+class InvalidRecipe(ValueError):
+    pass
+
+
+def get_recipe(db: Session, menu_item_id: int):
+    """Returns None if the menu item does not exist."""
+    if db.get(MenuItem, menu_item_id) is None:
+        return None
+    rows = db.query(
+        RecipeIngredient.inventory_item_id, RecipeIngredient.amount, InventoryItem.name, InventoryItem.unit
+    ).join(InventoryItem, InventoryItem.id == RecipeIngredient.inventory_item_id).filter(
+        RecipeIngredient.menu_item_id == menu_item_id
+    ).order_by(RecipeIngredient.inventory_item_id).all()
+    return {"menu_item_id": menu_item_id, "ingredients": [row._asdict() for row in rows]}
+
+
+def set_recipe(db: Session, menu_item_id: int, ingredients: list[RecipeIngredientCreate]):
+    """Replace the menu item's recipe. Returns None if the menu item does not
+    exist; raises InvalidRecipe for ingredients it cannot use."""
+    menu_item = db.get(MenuItem, menu_item_id)
+    if menu_item is None:
+        return None
+    inventory_item_ids = [ingredient.inventory_item_id for ingredient in ingredients]
+    if len(set(inventory_item_ids)) != len(inventory_item_ids):
+        raise InvalidRecipe("Each inventory item may appear only once per recipe")
+    if any(ingredient.amount <= 0 for ingredient in ingredients):
+        raise InvalidRecipe("Ingredient amounts must be positive")
+    known = {
+        row.id for row in db.query(InventoryItem.id).filter(
+            InventoryItem.id.in_(inventory_item_ids), InventoryItem.restaurant_id == menu_item.restaurant_id
+        )
+    }
+    if set(inventory_item_ids) - known:
+        raise InvalidRecipe("Inventory item not found for this restaurant")
+
+    db.query(RecipeIngredient).filter(RecipeIngredient.menu_item_id == menu_item_id).delete()
+    db.add_all(
+        RecipeIngredient(menu_item_id=menu_item_id, inventory_item_id=ingredient.inventory_item_id, amount=ingredient.amount)
+        for ingredient in ingredients
+    )
+    db.commit()
+    notify_write(menu_item.restaurant_id, "menu_item")
+    return get_recipe(db, menu_item_id)
+
+
+def consume_ingredients(db: Session, lines: Iterable[tuple[int, Optional[int]]]) -> int:
+    """Take the ingredients of (menu_item_id, quantity) order lines out of
+    stock, inside the caller's transaction, and bump the inventory version of
+    the restaurants they belong to. Returns the number of inventory items
+    changed.
+
+    Every affected item is updated by a single UPDATE whatever the number of
+    lines and ingredients: quantity = quantity - (sum over the recipes that use
+    the item). The decrement is applied by the database, so concurrent orders
+    never overwrite each other's changes. Stock may go negative; it records
+    what was sold, not what is allowed to be.
+    """
+    if not INVENTORY_CONSUMPTION:
+        return 0
+    sold = defaultdict(int)
+    for menu_item_id, quantity in lines:
+        sold[menu_item_id] += quantity or 0
+    sold = {menu_item_id: quantity for menu_item_id, quantity in sold.items() if quantity}
+    if not sold:
+        return 0
+
+    uses = RecipeIngredient.menu_item_id.in_(sold)
+    consumed = select(
+        func.sum(RecipeIngredient.amount * case(sold, value=RecipeIngredient.menu_item_id))
+    ).where(RecipeIngredient.inventory_item_id == InventoryItem.id, uses).scalar_subquery()
+    restaurant_ids = db.execute(
+        update(InventoryItem)
+        .where(InventoryItem.id.in_(select(RecipeIngredient.inventory_item_id).where(uses)))
+        .values(quantity=InventoryItem.quantity - consumed, last_updated=datetime.utcnow())
+        .returning(InventoryItem.restaurant_id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    bump_versions(db, restaurant_ids, INVENTORY)
+    return len(restaurant_ids)
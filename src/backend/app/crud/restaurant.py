@@ -1,4 +1,5 @@
 from sqlalchemy.orm import Session
+from app.crud.version import RESTAURANT, bump_versions
 from app.database.models import Restaurant
 from app.schemas.restaurant import RestaurantCreate
 
@@ -14,6 +15,8 @@ def get_restaurants(db: Session, skip: int = 0, limit: int = 100):
 def create_restaurant(db: Session, restaurant: RestaurantCreate):
     db_restaurant = Restaurant(name=restaurant.name, owner_id=restaurant.owner_id)
     db.add(db_restaurant)
+    db.flush()  # Assigns db_restaurant.id for its version row
+    bump_versions(db, db_restaurant.id, RESTAURANT)
     db.commit()
     db.refresh(db_restaurant)
     return db_restaurant
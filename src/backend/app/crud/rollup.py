@@ -0,0 +1,177 @@
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import Integer, Float, func, literal, select, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.database.models import DailySalesRollup, MenuItem, MenuItemDailySales, Order, OrderItem, Sale
+
+_dialect_inserts = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _upsert(db: Session, model, keys: list, totals: list[str], rows: list[dict]):
+    """Insert rows, adding the totals columns onto rows that already exist."""
+    # Sorted on the conflict keys so that concurrent upserts touching the same
+    # rows lock them in one order instead of deadlocking
+    rows = sorted(rows, key=lambda row: tuple(row[key.key] for key in keys))
+    insert = _dialect_inserts[db.get_bind().dialect.name]
+    stmt = insert(model).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=keys,
+        set_={column: getattr(model, column) + stmt.excluded[column] for column in totals},
+    )
+    db.execute(stmt)
+
+
+def record_activity(
+    db: Session,
+    sales: Iterable[tuple[int, datetime, float]] = (),
+    orders: Iterable[tuple[int, datetime]] = (),
+):
+    """Add (restaurant_id, timestamp, amount) sales and (restaurant_id, timestamp)
+    orders to the rollup with a single upsert, inside the caller's transaction."""
+    totals = defaultdict(lambda: [0.0, 0])
+    for restaurant_id, timestamp, amount in sales:
+        totals[(restaurant_id, timestamp.date())][0] += amount or 0.0
+    for restaurant_id, timestamp in orders:
+        totals[(restaurant_id, timestamp.date())][1] += 1
+    if not totals:
+        return
+    keys = [DailySalesRollup.restaurant_id, DailySalesRollup.day]
+    _upsert(db, DailySalesRollup, keys, ["revenue", "order_count"], [
+        {"restaurant_id": restaurant_id, "day": day, "revenue": revenue, "order_count": order_count}
+        for (restaurant_id, day), (revenue, order_count) in totals.items()
+    ])
+
+
+def record_menu_item_sales(
+    db: Session,
+    lines: Iterable[tuple[int, datetime, int, Optional[float]]],
+    menu_items: Optional[dict] = None,
+):
+    """Add (menu_item_id, order timestamp, quantity, unit_price) order lines to
+    the menu item facts with a single upsert, inside the caller's transaction.
+
+    menu_items maps id -> (restaurant_id, price, cost); ids missing from it are
+    looked up in one query.
+    """
+    lines = list(lines)
+    menu_items = dict(menu_items or {})
+    missing = {menu_item_id for menu_item_id, _, _, _ in lines} - menu_items.keys()
+    if missing:
+        for row in db.query(MenuItem.id, MenuItem.restaurant_id, MenuItem.price, MenuItem.cost).filter(
+            MenuItem.id.in_(missing)
+        ):
+            menu_items[row.id] = (row.restaurant_id, row.price, row.cost)
+
+    totals = defaultdict(lambda: [0, 0, 0.0, 0.0])
+    for menu_item_id, timestamp, quantity, unit_price in lines:
+        if menu_item_id not in menu_items or timestamp is None:
+            continue
+        restaurant_id, price, cost = menu_items[menu_item_id]
+        quantity = quantity or 0
+        fact = totals[(menu_item_id, timestamp.date(), restaurant_id)]
+        fact[0] += 1
+        fact[1] += quantity
+        fact[2] += quantity * (unit_price if unit_price is not None else price or 0.0)
+        fact[3] += quantity * (cost or 0.0)
+    if not totals:
+        return
+    keys = [MenuItemDailySales.menu_item_id, MenuItemDailySales.day]
+    _upsert(db, MenuItemDailySales, keys, ["order_lines", "quantity", "revenue", "cost"], [
+        {
+            "menu_item_id": menu_item_id, "day": day, "restaurant_id": restaurant_id,
+            "order_lines": order_lines, "quantity": quantity, "revenue": revenue, "cost": cost,
+        }
+        for (menu_item_id, day, restaurant_id), (order_lines, quantity, revenue, cost) in totals.items()
+    ])
+
+
+def rebuild_daily_sales_rollup(db: Session, restaurant_id: Optional[int] = None):
+    """Recompute the rollup from raw sales and orders."""
+    daily = union_all(
+        select(
+            Sale.restaurant_id,
+            func.date(Sale.timestamp).label("day"),
+            Sale.amount.label("revenue"),
+            literal(0, Integer).label("order_count"),
+        ),
+        select(
+            Order.restaurant_id,
+            func.date(Order.timestamp).label("day"),
+            literal(0.0, Float).label("revenue"),
+            literal(1, Integer).label("order_count"),
+        ),
+    ).subquery()
+    query = select(
+        daily.c.restaurant_id,
+        daily.c.day,
+        func.sum(daily.c.revenue),
+        func.sum(daily.c.order_count),
+    ).where(daily.c.restaurant_id.is_not(None), daily.c.day.is_not(None))
+
+    delete = db.query(DailySalesRollup)
+    if restaurant_id is not None:
+        delete = delete.filter(DailySalesRollup.restaurant_id == restaurant_id)
+        query = query.where(daily.c.restaurant_id == restaurant_id)
+    delete.delete(synchronize_session=False)
+
+    query = query.group_by(daily.c.restaurant_id, daily.c.day)
+    db.execute(
+        DailySalesRollup.__table__.insert().from_select(
+            ["restaurant_id", "day", "revenue", "order_count"], query
+        )
+    )
+    db.commit()
+
+
+def rebuild_menu_item_daily_sales(db: Session, restaurant_id: Optional[int] = None):
+    """Recompute the menu item facts from raw order items, at current menu costs."""
+    day = func.date(Order.timestamp)
+    quantity = func.coalesce(OrderItem.quantity, 0)
+    query = select(
+        OrderItem.menu_item_id,
+        day,
+        MenuItem.restaurant_id,
+        func.count(OrderItem.id),
+        func.sum(quantity),
+        func.sum(quantity * func.coalesce(OrderItem.unit_price, MenuItem.price, 0.0)),
+        func.sum(quantity * func.coalesce(MenuItem.cost, 0.0)),
+    ).join(Order, OrderItem.order_id == Order.id).join(MenuItem, OrderItem.menu_item_id == MenuItem.id).where(
+        Order.timestamp.is_not(None)
+    )
+
+    delete = db.query(MenuItemDailySales)
+    if restaurant_id is not None:
+        delete = delete.filter(MenuItemDailySales.restaurant_id == restaurant_id)
+        query = query.where(MenuItem.restaurant_id == restaurant_id)
+    delete.delete(synchronize_session=False)
+
+    query = query.group_by(OrderItem.menu_item_id, day, MenuItem.restaurant_id)
+    db.execute(
+        MenuItemDailySales.__table__.insert().from_select(
+            ["menu_item_id", "day", "restaurant_id", "order_lines", "quantity", "revenue", "cost"], query
+        )
+    )
+    db.commit()
+
+
+def get_daily_revenue(db: Session, restaurant_id: int, start: date, end: Optional[date] = None):
+    query = db.query(DailySalesRollup.day, DailySalesRollup.revenue).filter(
+        DailySalesRollup.restaurant_id == restaurant_id,
+        DailySalesRollup.day >= start,
+        DailySalesRollup.revenue != 0,
+    )
+    if end is not None:
+        query = query.filter(DailySalesRollup.day < end)
+    return query.order_by(DailySalesRollup.day).all()
+
+
+def get_daily_revenue_by_restaurant(db: Session, restaurant_ids: list[int], start: date):
+    return db.query(DailySalesRollup.restaurant_id, DailySalesRollup.day, DailySalesRollup.revenue).filter(
+        DailySalesRollup.restaurant_id.in_(restaurant_ids),
+        DailySalesRollup.day >= start,
+        DailySalesRollup.revenue != 0,
+    ).order_by(DailySalesRollup.restaurant_id, DailySalesRollup.day).all()
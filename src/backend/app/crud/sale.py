@@ -1,14 +1,48 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from app.database.models import Sale
+from app.crud.pagination import DEFAULT_PAGE_SIZE, as_dicts, keyset_page
+from app.crud.rollup import record_activity
+from app.services.events import notify_sales, notify_write
+from app.database.models import Order, Sale
 from app.schemas.sale import SaleCreate
 
 def get_sale(db: Session, sale_id: int):
     return db.query(Sale).filter(Sale.id == sale_id).first()
 
-def get_sales_by_restaurant(db: Session, restaurant_id: int):
-    return db.query(Sale).filter(Sale.restaurant_id == restaurant_id).all()
+def get_sales_by_restaurant(
+    db: Session,
+    restaurant_id: int,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
+    query = db.query(Sale).filter(Sale.restaurant_id == restaurant_id)
+    return keyset_page(query, Sale.timestamp, Sale.id, cursor=cursor, limit=limit, start=start, end=end)
+
+# The SaleResponse fields, in schema order so the JSON matches the model's
+SALE_RESPONSE_COLUMNS = (Sale.amount, Sale.timestamp, Sale.id, Sale.restaurant_id)
+
+def get_sale_rows_by_restaurant(
+    db: Session,
+    restaurant_id: int,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
+    """get_sales_by_restaurant as plain dicts, selecting only the response columns."""
+    query = db.query(*SALE_RESPONSE_COLUMNS).filter(Sale.restaurant_id == restaurant_id)
+    rows, next_cursor = keyset_page(query, Sale.timestamp, Sale.id, cursor=cursor, limit=limit, start=start, end=end)
+    return as_dicts(rows), next_cursor
 
 def create_sale(db: Session, sale: SaleCreate):
+    """Returns None if sale.order_id names an order that does not exist."""
+    # Checked here rather than by a foreign key, see app/database/partitions.py
+    if sale.order_id is not None and db.query(Order.id).filter(Order.id == sale.order_id).first() is None:
+        return None
     db_sale = Sale(
         restaurant_id=sale.restaurant_id,
         amount=sale.amount,
@@ -16,6 +50,41 @@ def create_sale(db: Session, sale: SaleCreate):
         order_id=sale.order_id
     )
     db.add(db_sale)
+    record_activity(db, sales=[(sale.restaurant_id, sale.timestamp, sale.amount)])
     db.commit()
     db.refresh(db_sale)
+    notify_sales([(db_sale.restaurant_id, db_sale.id, db_sale.timestamp, db_sale.amount)])
+    notify_write(db_sale.restaurant_id, "sale")
     return db_sale
+
+def create_sales_batch(db: Session, sales: list[SaleCreate]) -> list[Optional[dict]]:
+    """create_sale for many sales in one transaction and one INSERT.
+
+    Returns, in input order, each created sale as a SaleResponse-shaped dict,
+    or None for a sale whose order_id names an order that does not exist.
+    """
+    order_ids = {sale.order_id for sale in sales if sale.order_id is not None}
+    known_orders = {row.id for row in db.query(Order.id).filter(Order.id.in_(order_ids))} if order_ids else set()
+    results = [None] * len(sales)
+    accepted = [index for index, sale in enumerate(sales) if sale.order_id is None or sale.order_id in known_orders]
+    if not accepted:
+        return results
+
+    rows = [sales[index] for index in accepted]
+    ids = db.execute(
+        insert(Sale).returning(Sale.id, sort_by_parameter_order=True),
+        [
+            {"restaurant_id": sale.restaurant_id, "amount": sale.amount, "timestamp": sale.timestamp,
+             "order_id": sale.order_id}
+            for sale in rows
+        ],
+    ).scalars().all()
+    record_activity(db, sales=[(sale.restaurant_id, sale.timestamp, sale.amount) for sale in rows])
+    db.commit()
+    for index, sale, sale_id in zip(accepted, rows, ids):
+        results[index] = {
+            "amount": sale.amount, "timestamp": sale.timestamp, "id": sale_id, "restaurant_id": sale.restaurant_id,
+        }
+    notify_sales((sale.restaurant_id, sale_id, sale.timestamp, sale.amount) for sale, sale_id in zip(rows, ids))
+    notify_write([sale.restaurant_id for sale in rows], "sale")
+    return results
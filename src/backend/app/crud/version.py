@@ -0,0 +1,39 @@
+from datetime import datetime
+from typing import Iterable, Optional, Union
+
+from sqlalchemy.orm import Session
+
+from app.crud.rollup import _dialect_inserts
+from app.database.models import RestaurantVersion
+
+# What a version covers: GET /general/restaurants/{id}, the restaurant's menu
+# items and its inventory items
+RESTAURANT = "restaurant"
+MENU = "menu"
+INVENTORY = "inventory"
+
+
+def get_version(db: Session, restaurant_id: int, resource: str) -> Optional[RestaurantVersion]:
+    """None until the first write since migration 0008."""
+    return db.get(RestaurantVersion, (restaurant_id, resource))
+
+
+def bump_versions(db: Session, restaurant_ids: Union[int, Iterable[int]], resource: str):
+    """Increment the restaurants' version of resource with a single upsert,
+    inside the caller's transaction, so it commits with the write."""
+    if isinstance(restaurant_ids, int):
+        restaurant_ids = [restaurant_ids]
+    # Sorted so that concurrent multi-restaurant writes lock rows in one order
+    restaurant_ids = sorted(set(restaurant_ids))
+    if not restaurant_ids:
+        return
+    now = datetime.utcnow()
+    insert = _dialect_inserts[db.get_bind().dialect.name]
+    stmt = insert(RestaurantVersion).values([
+        {"restaurant_id": restaurant_id, "resource": resource, "version": 1, "updated_at": now}
+        for restaurant_id in restaurant_ids
+    ])
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[RestaurantVersion.restaurant_id, RestaurantVersion.resource],
+        set_={"version": RestaurantVersion.version + 1, "updated_at": stmt.excluded.updated_at},
+    ))
@@ -0,0 +1,84 @@
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Statements slower than this are logged with their SQL; 0 disables the log
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+
+
+@dataclass
+class QueryStats:
+    statements: int = 0
+    db_seconds: float = 0.0
+    label: str = ""
+    # The SQL itself, when the tracker asked for it
+    sql: Optional[list[str]] = None
+
+
+# Every active tracker, innermost last, so nested ones (the query budget
+# around request timing, a benchmark around both) all see each statement. The
+# trackers are mutable so that sync endpoints running in the threadpool (which
+# see a copy of the request context) still update them.
+_current: ContextVar[tuple[QueryStats, ...]] = ContextVar("query_stats", default=())
+
+
+@contextmanager
+def track_queries(label: str = "", keep_sql: bool = False):
+    """Accumulate statement count and DB time of instrumented engines."""
+    stats = QueryStats(label=label, sql=[] if keep_sql else None)
+    token = _current.set((*_current.get(), stats))
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def capture_statements():
+    """Collect the SQL issued by instrumented engines within this context."""
+    with track_queries(keep_sql=True) as stats:
+        yield stats.sql
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    trackers = _current.get()
+    for stats in trackers:
+        stats.statements += 1
+        stats.db_seconds += elapsed
+        if stats.sql is not None:
+            stats.sql.append(statement)
+    if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+        label = next((stats.label for stats in reversed(trackers) if stats.label), "")
+        logger.warning("Slow query (%.1f ms)%s:\n%s", elapsed * 1000, f" during {label}" if label else "", statement)
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute does not run for failed statements
+    started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def instrument_engine(engine: Engine):
+    """Time every statement on engine (pass async_engine.sync_engine for async engines)."""
+    for name, listener in (
+        ("before_cursor_execute", _before_cursor_execute),
+        ("after_cursor_execute", _after_cursor_execute),
+        ("handle_error", _handle_error),
+    ):
+        if not event.contains(engine, name, listener):
+            event.listen(engine, name, listener)
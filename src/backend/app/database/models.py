@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Boolean, Index, Text, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
@@ -41,8 +41,15 @@ class Sale(Base):
     timestamp = Column(DateTime, default=datetime.utcnow, index=True)
 
     restaurant = relationship("Restaurant", back_populates="sales")
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=True)
-    order = relationship("Order", back_populates="sale")
+    # No database foreign key: on Postgres orders is partitioned by timestamp,
+    # so orders.id alone is not a unique key (see app/database/partitions.py)
+    order_id = Column(Integer, nullable=True)
+    order = relationship("Order", primaryjoin="foreign(Sale.order_id) == Order.id", back_populates="sale")
+
+    __table_args__ = (
+        Index("ix_sales_restaurant_id_timestamp", "restaurant_id", "timestamp"),
+        {"info": {"partition_by": "timestamp"}},
+    )
 
 class Order(Base):
     __tablename__ = "orders"
@@ -54,8 +61,22 @@ class Order(Base):
     status = Column(String, default="Pendente")
 
     restaurant = relationship("Restaurant", back_populates="orders")
-    items = relationship("OrderItem", back_populates="order")
-    sale = relationship("Sale", uselist=False, back_populates="order")
+    items = relationship("OrderItem", primaryjoin="Order.id == foreign(OrderItem.order_id)", back_populates="order")
+    sale = relationship("Sale", primaryjoin="Order.id == foreign(Sale.order_id)", uselist=False, back_populates="order")
+
+    __table_args__ = (
+        Index("ix_orders_restaurant_id_timestamp", "restaurant_id", "timestamp"),
+        {"info": {"partition_by": "timestamp"}},
+    )
+
+class DailySalesRollup(Base):
+    # Per-restaurant daily totals, incremented on every sale/order write so the
+    # dashboard series never rescan raw sales (see app/crud/rollup.py)
+    __tablename__ = "daily_sales_rollup"
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    revenue = Column(Float, nullable=False, default=0.0)
+    order_count = Column(Integer, nullable=False, default=0)
 
 class MenuItem(Base):
     __tablename__ = "menu_items"
@@ -69,18 +90,38 @@ class MenuItem(Base):
 
     restaurant = relationship("Restaurant", back_populates="menu_items")
     order_items = relationship("OrderItem", back_populates="menu_item")
+    ingredients = relationship("RecipeIngredient", back_populates="menu_item", order_by="RecipeIngredient.inventory_item_id")
+
+class MenuItemDailySales(Base):
+    # Per-menu-item daily sales facts, incremented on every order write so menu
+    # analysis reads one row per item per day instead of every order item
+    # (see app/crud/rollup.py). Cost is the menu item's cost at write time.
+    __tablename__ = "menu_item_daily_sales"
+    menu_item_id = Column(Integer, ForeignKey("menu_items.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=False)
+    order_lines = Column(Integer, nullable=False, default=0)
+    quantity = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+    cost = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (Index("ix_menu_item_daily_sales_restaurant_id_day", "restaurant_id", "day"),)
 
 class OrderItem(Base):
     __tablename__ = "order_items"
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"))
+    order_id = Column(Integer, index=True)  # See Sale.order_id
     menu_item_id = Column(Integer, ForeignKey("menu_items.id"))
     quantity = Column(Integer)
     unit_price = Column(Float, nullable=True)
+    # Copy of the order's timestamp, the partition key on Postgres
+    timestamp = Column(DateTime, default=datetime.utcnow)
 
-    order = relationship("Order", back_populates="items")
+    order = relationship("Order", primaryjoin="foreign(OrderItem.order_id) == Order.id", back_populates="items")
     menu_item = relationship("MenuItem", back_populates="order_items")
 
+    __table_args__ = ({"info": {"partition_by": "timestamp"}},)
+
 class InventoryItem(Base):
     __tablename__ = "inventory_items"
     id = Column(Integer, primary_key=True, index=True)
@@ -93,3 +134,44 @@ class InventoryItem(Base):
     last_updated = Column(DateTime, default=datetime.utcnow)
 
     restaurant = relationship("Restaurant", back_populates="inventory_items")
+
+    # Only the items below their threshold are indexed, so counting them per
+    # restaurant reads just those entries however large the inventory is
+    __table_args__ = (
+        Index(
+            "ix_inventory_items_low_stock", "restaurant_id",
+            postgresql_where=text("quantity < min_threshold"), sqlite_where=text("quantity < min_threshold"),
+        ),
+    )
+
+class RecipeIngredient(Base):
+    # Inventory consumed per unit of a menu item sold, in the inventory item's
+    # unit; orders decrement stock through it (see app/crud/recipe.py)
+    __tablename__ = "recipe_ingredients"
+    menu_item_id = Column(Integer, ForeignKey("menu_items.id"), primary_key=True)
+    inventory_item_id = Column(Integer, ForeignKey("inventory_items.id"), primary_key=True, index=True)
+    amount = Column(Float, nullable=False)
+
+    menu_item = relationship("MenuItem", back_populates="ingredients")
+    inventory_item = relationship("InventoryItem")
+
+class IdempotencyKey(Base):
+    # Responses to create requests sent with an Idempotency-Key header, replayed
+    # to retries of the same request until expires_at (app/services/idempotency.py)
+    __tablename__ = "idempotency_keys"
+    scope = Column(String(32), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    request_hash = Column(String(64), nullable=False)
+    # Null until the response has been stored
+    response = Column(Text, nullable=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+class RestaurantVersion(Base):
+    # Bumped in the same transaction as every write that changes a restaurant,
+    # its menu or its inventory; conditional GETs answer 304 from it alone
+    # (see app/crud/version.py and app/services/conditional.py)
+    __tablename__ = "restaurant_versions"
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id"), primary_key=True)
+    resource = Column(String(16), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False)
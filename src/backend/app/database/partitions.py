@@ -0,0 +1,138 @@
+"""
+Monthly range partitions for the time-series tables on Postgres.
+
+Migration 0005 turns the tables whose models declare
+info={"partition_by": "timestamp"} (orders, order_items and sales) into
+tables partitioned by RANGE (timestamp). Each has one partition per calendar
+month, e.g. orders_2026_10, plus a DEFAULT partition that catches rows
+outside them, so writes never fail for a missing month.
+
+ensure_partitions() creates the partitions for the coming months. It runs at
+startup and from scripts/create_partitions.py, e.g. daily from cron. It is a
+no-op on other databases and on tables that have not been partitioned.
+
+The primary key of a partitioned table must include the partition key, so
+these tables are keyed by (id, timestamp). Ids still come from one sequence
+per table. References to orders.id are checked by the CRUD layer instead of
+a foreign key.
+"""
+import os
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.database.models import Base
+
+PARTITIONED_TABLES = {
+    table.name: table.info["partition_by"] for table in Base.metadata.sorted_tables if "partition_by" in table.info
+}
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+
+# Serializes partition maintenance between workers starting at the same time
+_ADVISORY_LOCK_ID = 4_231_005
+
+
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def months_between(first: date, last: date) -> list[date]:
+    months = []
+    month = month_start(first)
+    while month <= last:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_{month:%Y_%m}"
+
+
+def default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+
+def partitioned_tables(connection: Connection) -> set[str]:
+    """Tables from PARTITIONED_TABLES that are actually partitioned in this database."""
+    if connection.dialect.name != "postgresql":
+        return set()
+    rows = connection.execute(text(
+        "SELECT c.relname FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relnamespace = current_schema()::regnamespace"
+    ))
+    return {row.relname for row in rows} & PARTITIONED_TABLES.keys()
+
+
+def existing_partitions(connection: Connection, table: str) -> set[str]:
+    rows = connection.execute(
+        text("SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+             "WHERE i.inhparent = CAST(:table AS regclass)"),
+        {"table": table},
+    )
+    return {row.relname for row in rows}
+
+
+def create_default_partition(connection: Connection, table: str):
+    connection.execute(text(f"CREATE TABLE IF NOT EXISTS {default_partition_name(table)} PARTITION OF {table} DEFAULT"))
+
+
+def create_partition(connection: Connection, table: str, month: date):
+    name = partition_name(table, month)
+    key = f'"{PARTITIONED_TABLES[table]}"'
+    bounds = f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+    in_month = f"{key} >= '{month}' AND {key} < '{add_months(month, 1)}'"
+    default = default_partition_name(table)
+
+    has_rows = default in existing_partitions(connection, table) and connection.execute(
+        text(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {in_month})")
+    ).scalar()
+    if not has_rows:
+        connection.execute(text(f"CREATE TABLE {name} PARTITION OF {table} {bounds}"))
+        return
+    # Rows for this month already landed in the default partition; Postgres
+    # refuses the new partition until they are moved into it
+    connection.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    connection.execute(text(f"INSERT INTO {name} SELECT * FROM {default} WHERE {in_month}"))
+    connection.execute(text(f"DELETE FROM {default} WHERE {in_month}"))
+    connection.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} {bounds}"))
+
+
+def ensure_partitions(
+    connection: Connection,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    months_ahead: int = PARTITION_MONTHS_AHEAD,
+) -> list[str]:
+    """Create the monthly partitions from start's month through months_ahead
+    months past end (both default to today). Returns the partitions created."""
+    tables = partitioned_tables(connection)
+    if not tables:
+        return []
+    connection.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": _ADVISORY_LOCK_ID})
+    today = datetime.utcnow().date()
+    months = months_between(start or today, add_months(month_start(end or today), months_ahead))
+    created = []
+    for table in PARTITIONED_TABLES:
+        if table not in tables:
+            continue
+        existing = existing_partitions(connection, table)
+        for month in months:
+            if partition_name(table, month) not in existing:
+                create_partition(connection, table, month)
+                created.append(partition_name(table, month))
+    return created
+
+
+def ensure_engine_partitions(engine, **kwargs) -> list[str]:
+    if engine.dialect.name != "postgresql":
+        return []
+    with engine.begin() as connection:
+        return ensure_partitions(connection, **kwargs)
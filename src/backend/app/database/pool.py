@@ -0,0 +1,80 @@
+import os
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.services.metrics import Histogram
+
+# Pool sizing knobs. Keep DB_POOL_SIZE + DB_MAX_OVERFLOW, times the number of
+# workers and engines, below the Postgres connection limit of the plan.
+POOL_SETTINGS = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes"),
+}
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.checkout_wait = Histogram()
+        self.timeouts = 0
+
+
+class _InstrumentedPool:
+    """Times every checkout, including the wait for a free connection."""
+
+    def __init__(self, *args, **kwargs):
+        self.metrics = PoolMetrics()
+        super().__init__(*args, **kwargs)
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            self.metrics.checkout_wait.observe(time.perf_counter() - started)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPool, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPool, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    if url.startswith("sqlite"):
+        # SQLite has no server connection limit worth pooling against
+        return {}
+    return {"poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool, **POOL_SETTINGS}
+
+
+def pool_status(engine) -> dict:
+    pool = engine.pool
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=POOL_SETTINGS["max_overflow"],
+            timeout_seconds=pool.timeout(),
+        )
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        status["timeouts"] = metrics.timeouts
+        status["checkout_wait_seconds"] = metrics.checkout_wait.snapshot()
+    return status
@@ -0,0 +1,131 @@
+import logging
+import math
+import os
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Read replica routing (app/database/session.py: get_read_db and
+# get_async_read_db). GET endpoints read from READ_DATABASE_URL while it
+# answers and is less than REPLICA_MAX_LAG_SECONDS behind, checked every
+# REPLICA_CHECK_SECONDS; otherwise, and for READ_STICKY_SECONDS after the same
+# client wrote anything, they read from the primary.
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL")
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "10"))
+REPLICA_CHECK_SECONDS = float(os.getenv("REPLICA_CHECK_SECONDS", "5"))
+# A replica that passed its last check may have fallen up to
+# REPLICA_MAX_LAG_SECONDS behind by the next one, so a write is only certain
+# to have reached it after both; a shorter READ_STICKY_SECONDS is raised
+_MIN_STICKY_SECONDS = math.ceil(REPLICA_MAX_LAG_SECONDS + REPLICA_CHECK_SECONDS)
+READ_STICKY_SECONDS = int(os.getenv("READ_STICKY_SECONDS", str(_MIN_STICKY_SECONDS)))
+if READ_STICKY_SECONDS < _MIN_STICKY_SECONDS:
+    logger.warning(
+        "READ_STICKY_SECONDS=%s is shorter than REPLICA_MAX_LAG_SECONDS + REPLICA_CHECK_SECONDS; using %s",
+        READ_STICKY_SECONDS, _MIN_STICKY_SECONDS,
+    )
+    READ_STICKY_SECONDS = _MIN_STICKY_SECONDS
+
+# Set on responses to writes (app/middleware/read_your_writes.py); expires by
+# itself, so every worker honours it without shared state
+STICKY_COOKIE = "read_primary"
+
+# Zero when the replica has replayed everything it received, so an idle
+# primary does not make it look behind. A server that is not a standby
+# (two independent local instances, say) reports zero too.
+POSTGRES_LAG = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class ReplicaMonitor:
+    """Whether the replica may serve reads, refreshed in the background.
+
+    Until the first check succeeds, and while the replica is unreachable or
+    lagging, reads go to the primary. A connection failure seen by any query
+    on the replica marks it down at once.
+    """
+
+    def __init__(self, engine: Optional[Engine], max_lag: float = REPLICA_MAX_LAG_SECONDS,
+                 interval: float = REPLICA_CHECK_SECONDS):
+        self.engine = engine
+        self.max_lag = max_lag
+        self.interval = interval
+        self.healthy = False
+        self.lag_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        self.checked_at = 0.0
+        self.fallbacks = 0
+        self._checking = threading.Lock()
+        if engine is not None:
+            self.watch(engine)
+
+    def watch(self, engine: Engine):
+        if not event.contains(engine, "handle_error", self._on_error):
+            event.listen(engine, "handle_error", self._on_error)
+
+    def _on_error(self, context):
+        if context.is_disconnect or context.connection is None:
+            self.mark_down(str(context.original_exception))
+
+    def mark_down(self, error: str):
+        if self.healthy:
+            logger.warning("Read replica unavailable, reading from the primary: %s", error)
+        self.healthy = False
+        self.error = error
+        self.checked_at = time.monotonic()
+
+    def check(self):
+        try:
+            with self.engine.connect() as conn:
+                if conn.dialect.name == "postgresql":
+                    lag = float(conn.execute(POSTGRES_LAG).scalar())
+                else:
+                    conn.execute(text("SELECT 1"))
+                    lag = 0.0
+        except Exception as exc:
+            self.mark_down(str(exc))
+            return
+        self.lag_seconds = lag
+        self.checked_at = time.monotonic()
+        if lag > self.max_lag:
+            if self.healthy:
+                logger.warning("Read replica is %.1fs behind, reading from the primary", lag)
+            self.healthy, self.error = False, f"lag {lag:.1f}s"
+        else:
+            if not self.healthy:
+                logger.info("Read replica available (lag %.1fs)", lag)
+            self.healthy, self.error = True, None
+
+    def _check_in_background(self):
+        if self._checking.acquire(blocking=False):
+            def run():
+                try:
+                    self.check()
+                finally:
+                    self._checking.release()
+            threading.Thread(target=run, name="replica-check", daemon=True).start()
+
+    def usable(self) -> bool:
+        if self.engine is None:
+            return False
+        if time.monotonic() - self.checked_at >= self.interval:
+            self._check_in_background()
+        if not self.healthy:
+            self.fallbacks += 1
+        return self.healthy
+
+    def status(self) -> dict:
+        return {
+            "configured": self.engine is not None,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag_seconds,
+            "max_lag_seconds": self.max_lag,
+            "error": self.error,
+            "fallbacks": self.fallbacks,
+        }
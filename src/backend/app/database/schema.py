@@ -0,0 +1,117 @@
+"""
+Schema management at startup.
+
+SCHEMA_MANAGEMENT=create_all (the default, convenient for local development)
+creates missing tables from the models when the app starts.
+SCHEMA_MANAGEMENT=alembic leaves the schema to `alembic upgrade head`, run
+before the app is deployed, so startup does not touch the database at all
+unless SCHEMA_CHECK asks for a version check:
+
+- off: no check; the first request opens the first connection.
+- warn: log when the database is not at the migration head (default).
+- fail: refuse to start when it is not.
+
+The check is a single SELECT from alembic_version. The expected head is read
+from the revision ids in alembic/versions without importing Alembic or the
+migrations.
+"""
+import logging
+import os
+import re
+from pathlib import Path
+
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import DBAPIError
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_MANAGEMENT = os.getenv("SCHEMA_MANAGEMENT", "create_all").lower()
+SCHEMA_CHECK = os.getenv("SCHEMA_CHECK", "warn").lower()
+
+VERSIONS_DIR = Path(__file__).resolve().parents[2] / "alembic" / "versions"
+
+_REVISION = re.compile(r"^revision\s*(?::[^=]*)?=\s*['\"]([^'\"]+)['\"]", re.MULTILINE)
+_DOWN_REVISION = re.compile(r"^down_revision\s*(?::[^=]*)?=\s*(.+)$", re.MULTILINE)
+
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+
+def migration_heads(versions_dir: Path = VERSIONS_DIR) -> set[str]:
+    """Revisions that no other revision builds on."""
+    revisions, parents = set(), set()
+    for path in versions_dir.glob("*.py"):
+        source = path.read_text()
+        revision = _REVISION.search(source)
+        if revision is None:
+            continue
+        revisions.add(revision.group(1))
+        down_revision = _DOWN_REVISION.search(source)
+        if down_revision is not None:
+            parents.update(re.findall(r"['\"]([^'\"]+)['\"]", down_revision.group(1)))
+    return revisions - parents
+
+
+def database_revisions(connection) -> set[str]:
+    try:
+        return {row[0] for row in connection.execute(text("SELECT version_num FROM alembic_version"))}
+    except DBAPIError:
+        # No alembic_version table: the database was never migrated
+        return set()
+
+
+def check_schema_version(engine) -> bool:
+    """Compare the database's Alembic revision with the migration head."""
+    expected = migration_heads()
+    with engine.connect() as connection:
+        current = database_revisions(connection)
+    if current == expected:
+        return True
+    message = (
+        f"Database schema is at {', '.join(sorted(current)) or 'no revision'}, "
+        f"expected {', '.join(sorted(expected))}; run `alembic upgrade head`"
+    )
+    if SCHEMA_CHECK == "fail":
+        raise SchemaVersionError(message)
+    logger.warning(message)
+    return False
+
+
+# Derived tables and the tables they are computed from; migrations 0002 and
+# 0004 backfill them, create_all does it when it creates them
+DERIVED_TABLES = {
+    "daily_sales_rollup": ("sales", "orders"),
+    "menu_item_daily_sales": ("order_items",),
+}
+
+
+def backfill_derived_tables(engine, created: set[str]):
+    """Build the derived tables that were just created from existing rows."""
+    from sqlalchemy.orm import Session
+    from app.crud.rollup import rebuild_daily_sales_rollup, rebuild_menu_item_daily_sales
+
+    rebuild = {
+        "daily_sales_rollup": rebuild_daily_sales_rollup,
+        "menu_item_daily_sales": rebuild_menu_item_daily_sales,
+    }
+    with Session(engine) as db:
+        for table in sorted(created & DERIVED_TABLES.keys()):
+            logger.info("Building %s from existing %s", table, ", ".join(DERIVED_TABLES[table]))
+            rebuild[table](db)
+
+
+def prepare_schema(engine, base):
+    """Run the startup schema step selected by SCHEMA_MANAGEMENT / SCHEMA_CHECK."""
+    if SCHEMA_MANAGEMENT == "create_all":
+        existing = set(inspect(engine).get_table_names())
+        base.metadata.create_all(bind=engine)
+        # An existing database gets its derived tables filled, not left empty
+        created = {
+            table for table, sources in DERIVED_TABLES.items()
+            if table not in existing and existing.issuperset(sources)
+        }
+        if created:
+            backfill_derived_tables(engine, created)
+    elif SCHEMA_CHECK != "off":
+        check_schema_version(engine)
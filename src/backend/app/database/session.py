@@ -1,16 +1,105 @@
-from sqlalchemy import create_engine
+import functools
+from sqlalchemy import create_engine, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from fastapi import Request
 from sqlalchemy.ext.declarative import as_declarative
 import os
 from dotenv import load_dotenv
+from app.database.pool import engine_options
+from app.database.instrumentation import instrument_engine
+from app.database.replica import READ_DATABASE_URL, STICKY_COOKIE, ReplicaMonitor
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://pilotuser:pilotpass@db:5432/pilotdb")
 
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async drivers for the same database, used by the async read routers
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+def to_async_url(url: str) -> str:
+    parsed = make_url(url)
+    drivername = ASYNC_DRIVERS.get(parsed.get_backend_name(), parsed.drivername)
+    return parsed.set(drivername=drivername).render_as_string(hide_password=False)
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+
+# Neither engine connects before its first checkout. The async one is also
+# built on first use (session.async_engine), since creating it imports the
+# async driver, which is a noticeable share of startup time.
+@functools.cache
+def get_async_engine():
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL, is_async=True))
+    instrument_engine(async_engine.sync_engine)
+    return async_engine
+
+# Objects stay loaded after commit: lazy refreshes cannot run outside the
+# greenlet that drives the async driver.
+@functools.cache
+def get_async_sessionmaker():
+    return async_sessionmaker(get_async_engine(), autoflush=False, expire_on_commit=False)
+
+# Optional read replica. Without READ_DATABASE_URL the read dependencies
+# below are the primary ones.
+read_engine = create_engine(READ_DATABASE_URL, **engine_options(READ_DATABASE_URL)) if READ_DATABASE_URL else None
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+replica = ReplicaMonitor(read_engine)
+
+@functools.cache
+def get_async_read_engine():
+    url = to_async_url(READ_DATABASE_URL)
+    async_engine = create_async_engine(url, **engine_options(url, is_async=True))
+    instrument_engine(async_engine.sync_engine)
+    replica.watch(async_engine.sync_engine)
+    return async_engine
+
+@functools.cache
+def get_async_read_sessionmaker():
+    return async_sessionmaker(get_async_read_engine(), autoflush=False, expire_on_commit=False)
+
+def use_replica(request: Request = None) -> bool:
+    # Clients that wrote recently carry the sticky cookie and read their writes
+    if request is not None and STICKY_COOKIE in request.cookies:
+        return False
+    return replica.usable()
+
+def open_read_session(request: Request = None):
+    """A session on the replica when it may serve this request, otherwise on
+    the primary. The caller closes it."""
+    if use_replica(request):
+        db = ReadSessionLocal()
+        try:
+            # Check out (and pre-ping) the connection now, so that a replica
+            # that went down since the last check falls back right here
+            db.connection()
+            db.info["replica"] = True
+            return db
+        except exc.OperationalError as error:
+            db.close()
+            replica.mark_down(str(error))
+    return SessionLocal()
+
+def served_by_replica(db) -> bool:
+    """Whether a read session is on the replica, so may lag the primary by up
+    to REPLICA_MAX_LAG_SECONDS."""
+    return db.info.get("replica", False)
+
+def __getattr__(name):
+    if name == "async_engine":
+        return get_async_engine()
+    if name == "AsyncSessionLocal":
+        return get_async_sessionmaker()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Per-request SQL count and DB time, and the slow query log
+instrument_engine(engine)
+if read_engine is not None:
+    instrument_engine(read_engine)
+
 @as_declarative()
 class Base:
     pass
@@ -21,3 +110,30 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+def get_read_db(request: Request):
+    db = open_read_session(request)
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db(request: Request):
+    if use_replica(request):
+        db = get_async_read_sessionmaker()()
+        try:
+            await db.connection()
+        except exc.OperationalError as error:
+            await db.close()
+            replica.mark_down(str(error))
+        else:
+            db.info["replica"] = True
+            async with db:
+                yield db
+            return
+    async with get_async_sessionmaker()() as db:
+        yield db
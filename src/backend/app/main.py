@@ -1,15 +1,46 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import user, restaurant, sale, order, menu_item, order_item, inventory_item, kpi
+from app.routers import user, restaurant, sale, order, menu_item, order_item, inventory_item, kpi, menu, monitoring, export, recipe
 from app.database.session import engine
 from app.database.models import Base
+from app.database.partitions import ensure_engine_partitions
+from app.database.schema import prepare_schema
+from app.middleware.read_your_writes import ReadYourWritesMiddleware
+from app.middleware.query_budget import QUERY_BUDGET, QueryBudgetMiddleware
+from app.middleware.timing import TimedRoute, TimingMiddleware
+from app.services.live import kpi_feed
+from app.services.write_behind import writers
 from fastapi.openapi.utils import get_openapi
 import os
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+logger = logging.getLogger(__name__)
 
-app = FastAPI()
+async def _maintain_partitions():
+    try:
+        await asyncio.to_thread(ensure_engine_partitions, engine)
+    except Exception:
+        logger.exception("Partition maintenance failed")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Nothing above connects to the database; see app/database/schema.py
+    await asyncio.to_thread(prepare_schema, engine, Base)
+    # Monthly partitions for the coming months (Postgres, after migration 0005).
+    # Runs in the background: rows outside them land in the default partition,
+    # so there is no need to hold up the first request.
+    partitions = asyncio.create_task(_maintain_partitions())
+    yield
+    # Commit what is still queued before the process exits
+    for writer in writers.values():
+        await asyncio.to_thread(writer.close)
+    await kpi_feed.close()
+    await partitions
+
+app = FastAPI(lifespan=lifespan)
+app.router.route_class = TimedRoute
 
 # Configure CORS
 allowed_origins = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000").split(",")
@@ -21,6 +52,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Server-Timing header and per-route histograms for GET /metrics
+app.add_middleware(TimingMiddleware)
+
+# Reads after a client's own writes skip the replica (READ_DATABASE_URL)
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Development N+1 detector: count SQL statements per request against a budget
+if QUERY_BUDGET is not None:
+    app.add_middleware(QueryBudgetMiddleware)
+
 # Custom OpenAPI schema
 def custom_openapi():
     if app.openapi_schema:
@@ -42,9 +83,15 @@ app.include_router(restaurant.router, prefix="/general", tags=["Restaurants"])
 app.include_router(sale.router, prefix="/general", tags=["Sales"])
 app.include_router(order.router, prefix="/general", tags=["Orders"])
 app.include_router(menu_item.router, prefix="/general", tags=["Menu Items"])
+app.include_router(recipe.router, prefix="/general", tags=["Recipes"])
 app.include_router(order_item.router, prefix="/general", tags=["Order Items"])
 app.include_router(inventory_item.router, prefix="/general", tags=["Inventory Items"])
+app.include_router(export.router, prefix="/general", tags=["Exports"])
 app.include_router(kpi.router, prefix="/dashboard", tags=["KPIs"])
+# Path matches fetchMenuPerformance in the frontend API client
+app.include_router(menu.router, tags=["Menu"])
+app.include_router(monitoring.router, prefix="/monitoring", tags=["Monitoring"])
+app.include_router(monitoring.metrics_router)
 
 
 @app.get("/")
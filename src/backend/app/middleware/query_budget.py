@@ -0,0 +1,73 @@
+import json
+import logging
+import os
+
+from app.database.instrumentation import capture_statements
+
+logger = logging.getLogger(__name__)
+
+# Development-only N+1 guard. SQL_QUERY_BUDGET sets the default number of
+# statements a request may issue; SQL_QUERY_BUDGET_ROUTES overrides it per
+# endpoint function, e.g. "get_kpis=4,read_orders_by_restaurant=3".
+# Statements are counted by the engine hooks in app/database/instrumentation.py.
+# SQL_QUERY_BUDGET_MODE is "log" (default) or "fail" (respond with 500).
+QUERY_BUDGET = os.getenv("SQL_QUERY_BUDGET")
+QUERY_BUDGET_MODE = os.getenv("SQL_QUERY_BUDGET_MODE", "log")
+
+
+def _parse_route_budgets(raw: str) -> dict[str, int]:
+    budgets = {}
+    for entry in filter(None, (part.strip() for part in raw.split(","))):
+        name, _, limit = entry.rpartition("=")
+        budgets[name] = int(limit)
+    return budgets
+
+
+ROUTE_BUDGETS = _parse_route_budgets(os.getenv("SQL_QUERY_BUDGET_ROUTES", ""))
+
+def budget_for(endpoint_name: str) -> int:
+    return ROUTE_BUDGETS.get(endpoint_name, int(QUERY_BUDGET))
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, app, mode: str = QUERY_BUDGET_MODE):
+        self.app = app
+        self.mode = mode
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        over_budget = False
+
+        async def checked_send(message):
+            nonlocal over_budget
+            if message["type"] == "http.response.start":
+                # The route is resolved and the handler has run by now
+                endpoint = getattr(scope.get("endpoint"), "__name__", scope["path"])
+                budget = budget_for(endpoint)
+                if len(statements) > budget:
+                    over_budget = True
+                    logger.warning(
+                        "%s %s (%s) issued %d SQL statements (budget %d):\n%s",
+                        scope["method"], scope["path"], endpoint, len(statements), budget,
+                        "\n".join(statements),
+                    )
+                    if self.mode == "fail":
+                        body = json.dumps({
+                            "detail": f"SQL statement budget exceeded: {len(statements)} > {budget}",
+                        }).encode()
+                        await send({
+                            "type": "http.response.start",
+                            "status": 500,
+                            "headers": [(b"content-type", b"application/json")],
+                        })
+                        await send({"type": "http.response.body", "body": body})
+                        return
+            elif over_budget and self.mode == "fail":
+                return
+            await send(message)
+
+        with capture_statements() as statements:
+            await self.app(scope, receive, checked_send)
@@ -0,0 +1,35 @@
+from app.database.replica import READ_DATABASE_URL, READ_STICKY_SECONDS, STICKY_COOKIE
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+_COOKIE = (
+    f"{STICKY_COOKIE}=1; Max-Age={READ_STICKY_SECONDS}; Path=/; HttpOnly; SameSite=Lax".encode()
+)
+
+
+class ReadYourWritesMiddleware:
+    """After a successful write, point the client's reads at the primary for
+    READ_STICKY_SECONDS, until the replica has caught up with the write.
+
+    This holds for clients that send the cookie back: HTTP clients with a
+    cookie jar, and browsers on the same site as the API (another port or
+    subdomain) that fetch with credentials, as frontend/lib/api.ts does. A
+    SameSite=Lax cookie is not sent on cross-site fetches, so a frontend
+    served from another site only gets replica reads (up to
+    REPLICA_MAX_LAG_SECONDS behind).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in READ_METHODS or not READ_DATABASE_URL:
+            await self.app(scope, receive, send)
+            return
+
+        async def sticky_send(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                message = {**message, "headers": [*message.get("headers", []), (b"set-cookie", _COOKIE)]}
+            await send(message)
+
+        await self.app(scope, receive, sticky_send)
@@ -0,0 +1,142 @@
+import functools
+import inspect
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi.routing import APIRoute
+
+from app.database.instrumentation import track_queries
+from app.services.metrics import CounterFamily, HistogramFamily
+
+# Per-request timings: SQL statements and time spent in the database (from the
+# engine hooks in app/database/instrumentation.py), serialization (everything
+# FastAPI does after the endpoint returns: response model validation, encoding
+# and rendering) and total time. They are sent as a Server-Timing header and
+# aggregated per route for GET /metrics.
+SERVER_TIMING = os.getenv("SERVER_TIMING", "true").lower() in ("1", "true", "yes")
+
+STATEMENT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 250, 500)
+
+REQUESTS = CounterFamily("http_requests_total", "HTTP requests.", ("handler", "method", "status"))
+REQUEST_SECONDS = HistogramFamily(
+    "http_request_duration_seconds", "Time from request to the end of the response.", ("handler", "method")
+)
+DB_SECONDS = HistogramFamily("http_request_db_seconds", "Time spent executing SQL per request.", ("handler",))
+SERIALIZATION_SECONDS = HistogramFamily(
+    "http_request_serialization_seconds", "Time spent serializing the response per request.", ("handler",)
+)
+STATEMENTS = HistogramFamily(
+    "http_request_sql_statements", "SQL statements issued per request.", ("handler",), buckets=STATEMENT_BUCKETS
+)
+REQUEST_METRICS = (REQUESTS, REQUEST_SECONDS, DB_SECONDS, SERIALIZATION_SECONDS, STATEMENTS)
+
+
+@dataclass
+class RequestTimings:
+    endpoint_returned: Optional[float] = None
+    serialization_seconds: float = 0.0
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def _mark_endpoint_returned():
+    timings = _current.get()
+    if timings is not None:
+        timings.endpoint_returned = time.perf_counter()
+
+
+def _marking_return(call):
+    if getattr(call, "marks_return", False):
+        return call
+    # Streaming endpoints (generators) keep running after the response has
+    # started, and FastAPI tells them apart by their function type
+    if inspect.isasyncgenfunction(call) or inspect.isgeneratorfunction(call):
+        return call
+    if inspect.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def marked(*args, **kwargs):
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                _mark_endpoint_returned()
+    else:
+        @functools.wraps(call)
+        def marked(*args, **kwargs):
+            try:
+                return call(*args, **kwargs)
+            finally:
+                _mark_endpoint_returned()
+    marked.marks_return = True
+    return marked
+
+
+class TimedRoute(APIRoute):
+    """Measures serialization: the time from the endpoint returning to the
+    response being built."""
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, _marking_return(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            response = await handler(request)
+            timings = _current.get()
+            if timings is not None and timings.endpoint_returned is not None:
+                timings.serialization_seconds = time.perf_counter() - timings.endpoint_returned
+            return response
+
+        return timed_handler
+
+
+def _server_timing(db_seconds: float, statements: int, serialization_seconds: float, total_seconds: float) -> bytes:
+    return (
+        f'db;dur={db_seconds * 1000:.1f};desc="{statements} SQL", '
+        f"serialization;dur={serialization_seconds * 1000:.1f}, "
+        f"total;dur={total_seconds * 1000:.1f}"
+    ).encode()
+
+
+class TimingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        timings = RequestTimings()
+        status = 500
+
+        async def timed_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if SERVER_TIMING:
+                    header = _server_timing(
+                        queries.db_seconds, queries.statements, timings.serialization_seconds,
+                        time.perf_counter() - started,
+                    )
+                    message = {**message, "headers": [*message.get("headers", []), (b"server-timing", header)]}
+            await send(message)
+
+        token = _current.set(timings)
+        try:
+            with track_queries(f"{scope['method']} {scope['path']}") as queries:
+                await self.app(scope, receive, timed_send)
+        finally:
+            _current.reset(token)
+            # Label by endpoint function, not path, to keep the number of series bounded
+            handler = getattr(scope.get("endpoint"), "__name__", "unmatched")
+            REQUESTS.labels(handler, scope["method"], status).inc()
+            REQUEST_SECONDS.labels(handler, scope["method"]).observe(time.perf_counter() - started)
+            DB_SECONDS.labels(handler).observe(queries.db_seconds)
+            SERIALIZATION_SECONDS.labels(handler).observe(timings.serialization_seconds)
+            STATEMENTS.labels(handler).observe(queries.statements)
@@ -0,0 +1,72 @@
+from datetime import datetime
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from app.database.session import open_read_session
+from app.crud.export import inventory_export, order_documents, orders_export, sales_export, stream_rows
+from app.services import export
+from app.middleware.timing import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
+
+ExportFormat = Literal["csv", "ndjson", "parquet"]
+
+def _chunks(statement, request: Request):
+    # The stream outlives the endpoint call, so it owns its session rather
+    # than using the request-scoped get_read_db
+    db = open_read_session(request)
+    try:
+        yield from stream_rows(db, statement)
+    finally:
+        db.close()
+
+def _export(request: Request, name: str, restaurant_id: int, statement, format: ExportFormat, start, end, documents=None):
+    if start is not None and end is not None and start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if format == "parquet":
+        try:
+            export.require_pyarrow()
+        except RuntimeError as exc:
+            raise HTTPException(status_code=501, detail=str(exc))
+
+    body = export.encode(format, _chunks(statement, request), list(statement.selected_columns), documents)
+    period = (f"_from_{start:%Y-%m-%d}" if start else "") + (f"_to_{end:%Y-%m-%d}" if end else "")
+    filename = f"{name}_{restaurant_id}{period}.{format}"
+    return StreamingResponse(
+        body, media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.get("/exports/sales/restaurant/{restaurant_id}")
+def export_sales(
+    request: Request,
+    restaurant_id: int,
+    format: ExportFormat = "csv",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
+    return _export(request, "sales", restaurant_id, sales_export(restaurant_id, start, end), format, start, end)
+
+@router.get("/exports/orders/restaurant/{restaurant_id}")
+def export_orders(
+    request: Request,
+    restaurant_id: int,
+    format: ExportFormat = "csv",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
+    # CSV and Parquet get one row per order item; NDJSON one document per order
+    return _export(
+        request, "orders", restaurant_id, orders_export(restaurant_id, start, end), format, start, end,
+        documents=order_documents,
+    )
+
+@router.get("/exports/inventory-items/restaurant/{restaurant_id}")
+def export_inventory_items(
+    request: Request,
+    restaurant_id: int,
+    format: ExportFormat = "csv",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
+    return _export(request, "inventory_items", restaurant_id, inventory_export(restaurant_id, start, end), format, start, end)
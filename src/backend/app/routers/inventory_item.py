@@ -1,23 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
-from app.database.session import get_db
+from app.database.session import get_db, get_read_db
+from app.crud.version import INVENTORY
 from app.crud.inventory_item import get_inventory_item, get_inventory_items_by_restaurant, create_inventory_item
 from app.schemas.inventory_item import InventoryItemCreate, InventoryItemResponse
-from typing import List
+from app.schemas.pagination import Page
+from app.crud.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursor
+from app.middleware.timing import TimedRoute
+from app.services.conditional import not_modified
+from typing import Optional
+from datetime import datetime
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.post("/inventory-items/", response_model=InventoryItemResponse)
 def create_new_inventory_item(inventory_item: InventoryItemCreate, db: Session = Depends(get_db)):
     return create_inventory_item(db, inventory_item=inventory_item)
 
 @router.get("/inventory-items/{inventory_item_id}", response_model=InventoryItemResponse)
-def read_inventory_item(inventory_item_id: int, db: Session = Depends(get_db)):
+def read_inventory_item(inventory_item_id: int, db: Session = Depends(get_read_db)):
     db_inventory_item = get_inventory_item(db, inventory_item_id=inventory_item_id)
     if db_inventory_item is None:
         raise HTTPException(status_code=404, detail="Inventory item not found")
     return db_inventory_item
 
-@router.get("/inventory-items/restaurant/{restaurant_id}", response_model=List[InventoryItemResponse])
-def read_inventory_items_by_restaurant(restaurant_id: int, db: Session = Depends(get_db)):
-    return get_inventory_items_by_restaurant(db, restaurant_id=restaurant_id)
+@router.get("/inventory-items/restaurant/{restaurant_id}", response_model=Page[InventoryItemResponse])
+def read_inventory_items_by_restaurant(
+    restaurant_id: int,
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: Session = Depends(get_read_db),
+):
+    unchanged = not_modified(request, response, db, restaurant_id, INVENTORY)
+    if unchanged is not None:
+        return unchanged
+    try:
+        items, next_cursor = get_inventory_items_by_restaurant(
+            db, restaurant_id=restaurant_id, cursor=cursor, limit=limit, start=start, end=end
+        )
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return {"items": items, "next_cursor": next_cursor}
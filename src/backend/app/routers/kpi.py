@@ -1,117 +1,171 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.database.session import get_db
-from app.database.models import Sale, Order, InventoryItem
-from sqlalchemy.sql import func, text
+import asyncio
+import os
 from datetime import datetime, timedelta
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.sse import EventSourceResponse, ServerSentEvent
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.database.session import get_async_read_db, get_read_db, served_by_replica
+from app.crud import kpi
+from app.crud.forecast import get_demand_forecast
+from app.schemas.forecast import DemandForecast
+from app.services.kpi_cache import kpi_cache
+from app.services.live import kpi_feed
+from app.middleware.timing import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
+
+MAX_KPI_BATCH = int(os.getenv("MAX_KPI_BATCH", "100"))
+
+async def _off_loop(function, *args):
+    # With KPI_CACHE_URL every cache call is a blocking Redis round trip
+    if kpi_cache.blocking:
+        return await asyncio.to_thread(function, *args)
+    return function(*args)
 
-router = APIRouter()
+async def _cached(db: AsyncSession, endpoint: str, restaurant_id: int, compute):
+    # compute(session) is the sync CRUD code, driven by the async session
+    key, value = (await _off_loop(kpi_cache.lookup, endpoint, [restaurant_id]))[restaurant_id]
+    if value is None:
+        value = await db.run_sync(compute)
+        # A lagging replica's answer may predate writes that already bumped the
+        # generation; cached, it would be served to their writers too
+        if not served_by_replica(db):
+            await _off_loop(kpi_cache.set, key, value)
+    return value
 
-#future: bring this into crud functions
 @router.get("/revenue-today", tags=["KPIs"])
-def get_revenue_today(restaurant_id: int, db: Session = Depends(get_db)):
-    query = text(
-        """
-        SELECT COALESCE(SUM(amount), 0) AS revenue_today
-        FROM sales
-        WHERE restaurant_id = :restaurant_id
-          AND DATE(timestamp) = CURRENT_DATE
-        """
+async def get_revenue_today(restaurant_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    return await _cached(
+        db, "revenue-today", restaurant_id,
+        lambda session: {"revenue_today": kpi.get_revenue_today(session, restaurant_id=restaurant_id)},
     )
-    result = db.execute(query, {"restaurant_id": restaurant_id}).fetchone()
-    return {"revenue_today": result.revenue_today}
 
 @router.get("/orders-today", tags=["KPIs"])
-def get_orders_today(restaurant_id: int, db: Session = Depends(get_db)):
-    query = text(
-        """
-        SELECT COUNT(id) AS orders_today
-        FROM orders
-        WHERE restaurant_id = :restaurant_id
-          AND DATE(timestamp) = CURRENT_DATE
-        """
+async def get_orders_today(restaurant_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    return await _cached(
+        db, "orders-today", restaurant_id,
+        lambda session: {"orders_today": kpi.get_orders_today(session, restaurant_id=restaurant_id)},
     )
-    result = db.execute(query, {"restaurant_id": restaurant_id}).fetchone()
-    return {"orders_today": result.orders_today}
 
 @router.get("/inventory-below-threshold", tags=["KPIs"])
-def get_inventory_below_threshold(restaurant_id: int, db: Session = Depends(get_db)):
-    query = text(
-        """
-        SELECT COUNT(*) AS items_below_threshold
-        FROM inventory_items
-        WHERE restaurant_id = :restaurant_id
-          AND quantity < min_threshold
-        """
+async def get_inventory_below_threshold(restaurant_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    return await _cached(
+        db, "inventory-below-threshold", restaurant_id,
+        lambda session: {"items_below_threshold": kpi.get_inventory_below_threshold(session, restaurant_id=restaurant_id)},
     )
-    result = db.execute(query, {"restaurant_id": restaurant_id}).fetchone()
-    return {"items_below_threshold": result.items_below_threshold}
 
 @router.get("/revenue-last-30-days", tags=["KPIs"])
-def get_revenue_last_30_days(restaurant_id: int, db: Session = Depends(get_db)):
-    query = text(
-        """
-        SELECT DATE(timestamp) AS date, SUM(amount) AS revenue
-        FROM sales
-        WHERE restaurant_id = :restaurant_id
-          AND timestamp >= CURRENT_DATE - INTERVAL '30 days'
-        GROUP BY DATE(timestamp)
-        ORDER BY DATE(timestamp)
-        """
+async def get_revenue_last_30_days(restaurant_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    return await _cached(
+        db, "revenue-last-30-days", restaurant_id,
+        lambda session: {"revenue_last_30_days": kpi.get_revenue_last_30_days(session, restaurant_id=restaurant_id)},
     )
-    result = db.execute(query, {"restaurant_id": restaurant_id}).fetchall()
-    return {"revenue_last_30_days": [{"date": row.date, "revenue": row.revenue} for row in result]}
 
 @router.get("/kpis", tags=["KPIs"])
-def get_kpis(restaurant_id: int, db: Session = Depends(get_db)):
-    today = datetime.utcnow().date()
-    year_start = datetime(today.year, 1, 1).date()
-
-    revenue_today = db.query(func.sum(Sale.amount)).filter(
-        Sale.restaurant_id == restaurant_id,
-        func.date(Sale.timestamp) == today
-    ).scalar() or 0
-
-    orders_today = db.query(func.count(Order.id)).filter(
-        Order.restaurant_id == restaurant_id,
-        func.date(Order.timestamp) == today
-    ).scalar() or 0
-
-    low_stock_items = db.query(InventoryItem).filter(
-        InventoryItem.restaurant_id == restaurant_id,
-        InventoryItem.quantity < InventoryItem.min_threshold
-    ).count()
-
-    revenue_this_year_query = text(
-        """
-        SELECT 
-            DATE(timestamp) AS date,
-            TO_CHAR(timestamp, 'YYYY-MM') AS year_month,
-            SUM(amount) AS revenue
-        FROM sales
-        WHERE restaurant_id = :restaurant_id
-          AND DATE(timestamp) >= :year_start
-        GROUP BY DATE(timestamp), TO_CHAR(timestamp, 'YYYY-MM')
-        ORDER BY DATE(timestamp)
-        """
-    )
-    revenue_this_year_result = db.execute(
-        revenue_this_year_query, 
-        {"restaurant_id": restaurant_id, "year_start": year_start}
-    ).fetchall()
-
-    revenue_this_year = [
-        {
-            "date": row.date.isoformat() if hasattr(row.date, 'isoformat') else str(row.date),
-            "year_month": row.year_month,
-            "revenue": float(row.revenue)
-        }
-        for row in revenue_this_year_result
-    ]
+async def get_kpis(restaurant_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    return await _cached(db, "kpis", restaurant_id, lambda session: kpi.get_kpis(session, restaurant_id=restaurant_id))
+
+@router.get("/kpis/batch", tags=["KPIs"])
+async def get_kpis_batch(restaurant_ids: str, db: AsyncSession = Depends(get_async_read_db)):
+    try:
+        ids = list(dict.fromkeys(int(part) for part in restaurant_ids.split(",") if part.strip()))
+    except ValueError:
+        raise HTTPException(status_code=422, detail="restaurant_ids must be a comma-separated list of integers")
+    if not ids:
+        raise HTTPException(status_code=422, detail="restaurant_ids must not be empty")
+    if len(ids) > MAX_KPI_BATCH:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_KPI_BATCH} restaurants per request")
 
+    # Serve what is cached per restaurant and compute the rest in one batch
+    cached = await _off_loop(kpi_cache.lookup, "kpis", ids)
+    snapshots = {restaurant_id: value for restaurant_id, (_, value) in cached.items()}
+    missing = [restaurant_id for restaurant_id, snapshot in snapshots.items() if snapshot is None]
+    if missing:
+        computed = await db.run_sync(lambda session: kpi.get_kpis_batch(session, restaurant_ids=missing))
+        fresh = {}
+        for snapshot in computed:
+            restaurant_id = snapshot.pop("restaurant_id")
+            fresh[cached[restaurant_id][0]] = snapshots[restaurant_id] = snapshot
+        if not served_by_replica(db):
+            await _off_loop(kpi_cache.set_many, fresh)
     return {
-        "revenue_today": revenue_today,
-        "orders_today": orders_today,
-        "low_stock_items": low_stock_items,
-        "revenue_this_year": revenue_this_year
+        "restaurants": [
+            {"restaurant_id": restaurant_id, **snapshot} for restaurant_id, snapshot in snapshots.items()
+        ]
     }
+
+# Served from the in-process sales store (app/services/sales_store.py); times
+# are UTC unless utc_offset_minutes shifts the hour, day and week boundaries.
+# Imported on first use so that numpy loads with the first request, not at startup.
+@router.get("/revenue-range", tags=["KPIs"])
+def get_revenue_range(
+    restaurant_id: int,
+    start: datetime,
+    end: datetime,
+    interval: Optional[Literal["hour", "day", "week"]] = None,
+    utc_offset_minutes: int = Query(0, ge=-24 * 60, le=24 * 60),
+    db: Session = Depends(get_read_db),
+):
+    from app.services.sales_store import InvalidRange, sales_store
+
+    try:
+        return sales_store.revenue_range(db, restaurant_id, start, end, interval, utc_offset_minutes)
+    except InvalidRange as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+@router.get("/revenue-heatmap", tags=["KPIs"])
+def get_revenue_heatmap(
+    restaurant_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    utc_offset_minutes: int = Query(0, ge=-24 * 60, le=24 * 60),
+    db: Session = Depends(get_read_db),
+):
+    from app.services.sales_store import DEFAULT_HEATMAP_DAYS, InvalidRange, sales_store
+
+    end = end or datetime.utcnow()
+    start = start or end - timedelta(days=DEFAULT_HEATMAP_DAYS)
+    try:
+        return sales_store.heatmap(db, restaurant_id, start, end, utc_offset_minutes)
+    except InvalidRange as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+@router.get("/sales-store/stats", tags=["KPIs"])
+def get_sales_store_stats():
+    from app.services.sales_store import sales_store
+
+    return sales_store.stats()
+
+@router.get("/forecast", response_model=DemandForecast, tags=["KPIs"])
+async def get_forecast(
+    restaurant_id: int,
+    days: int = Query(7, ge=1, le=28),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    # Units per menu item for today and the following days, and the inventory
+    # they use; see app/services/forecasting.py
+    return await db.run_sync(get_demand_forecast, restaurant_id, days)
+
+@router.get("/forecast/stats", tags=["KPIs"])
+def get_forecast_stats():
+    from app.services.forecasting import forecasts
+
+    return forecasts.stats()
+
+@router.get("/cache/stats", tags=["KPIs"])
+def get_cache_stats():
+    return kpi_cache.stats()
+
+@router.get("/live", response_class=EventSourceResponse, tags=["KPIs"])
+async def stream_kpis(restaurant_id: int):
+    # Server-Sent Events: a "snapshot" event with revenue_today, orders_today
+    # and low_stock_items, then a "kpis" event with the changed values after
+    # writes. No database session is held while the stream is open.
+    async for message in kpi_feed.subscribe(restaurant_id):
+        yield ServerSentEvent(data=message, event="snapshot" if message["type"] == "snapshot" else "kpis")
+
+@router.get("/live/stats", tags=["KPIs"])
+def get_live_stats():
+    return kpi_feed.stats()
@@ -1,66 +1,49 @@
-from datetime import datetime, timedelta
-from typing import List, Optional
+import os
+from typing import List, Literal
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-from app.database.session import get_db
-from app.database import models
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.session import get_async_read_db
+from app.crud.menu import get_menu_performance as compute_menu_performance, get_menu_performance_batch
 from app.schemas import menu
+from app.middleware.timing import TimedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
+
+MAX_MENU_BATCH = int(os.getenv("MAX_MENU_BATCH", "100"))
+
+# "average" classifies against each menu's own averages; "fixed" keeps the
+# original 50% popularity / 10% margin cutoffs
+ThresholdMethod = Literal["average", "fixed"]
 
 # Added route
 @router.get("/restaurants/{restaurant_id}/menu/performance", response_model=List[menu.MenuItemPerformance])
-def get_menu_performance(restaurant_id: int, days: int = 30, db: Session = Depends(get_db)):
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=days)
-    
-    # Get total orders for popularity calculation
-    total_orders = db.query(func.count(models.Order.id))\
-        .filter(
-            models.Order.restaurant_id == restaurant_id,
-            models.Order.timestamp.between(start_date, end_date)
-        ).scalar() or 1  # Avoid division by zero
-    
-    # Get performance metrics for each menu item
-    menu_items = db.query(
-        models.MenuItem.id,
-        models.MenuItem.name,
-        models.MenuItem.price,
-        models.MenuItem.cost,
-        func.count(models.OrderItem.id).label('order_count'),
-        func.sum(models.OrderItem.quantity).label('total_quantity')
-    ).outerjoin(
-        models.OrderItem, models.MenuItem.id == models.OrderItem.menu_item_id
-    ).outerjoin(
-        models.Order, models.OrderItem.order_id == models.Order.id
-    ).filter(
-        models.MenuItem.restaurant_id == restaurant_id,
-        models.Order.timestamp.between(start_date, end_date)
-    ).group_by(
-        models.MenuItem.id
-    ).all()
-    
-    result = []
-    for item in menu_items:
-        popularity = (item.order_count / total_orders) * 100
-        profitability = ((item.price - item.cost) / item.price) * 100 if item.price > 0 else 0
-        
-        # Categorize items based on popularity and profitability
-        if popularity >= 50 and profitability >= 10:
-            category = "Stars"
-        elif popularity >= 50:
-            category = "Plowhorses"
-        elif profitability >= 10:
-            category = "Puzzles"
-        else:
-            category = "Dogs"
-        
-        result.append({
-            "name": item.name,
-            "popularity": popularity,
-            "profitability": profitability,
-            "category": category
-        })
-    
-    return result
\ No newline at end of file
+async def get_menu_performance(
+    restaurant_id: int,
+    days: int = 30,
+    method: ThresholdMethod = "average",
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    return await db.run_sync(compute_menu_performance, restaurant_id, days, method)
+
+@router.get("/menu/performance/batch", response_model=menu.MenuPerformanceBatch)
+async def get_menu_performance_for_restaurants(
+    restaurant_ids: str,
+    days: int = 30,
+    method: ThresholdMethod = "average",
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    try:
+        ids = list(dict.fromkeys(int(part) for part in restaurant_ids.split(",") if part.strip()))
+    except ValueError:
+        raise HTTPException(status_code=422, detail="restaurant_ids must be a comma-separated list of integers")
+    if not ids:
+        raise HTTPException(status_code=422, detail="restaurant_ids must not be empty")
+    if len(ids) > MAX_MENU_BATCH:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_MENU_BATCH} restaurants per request")
+
+    performance = await db.run_sync(get_menu_performance_batch, ids, days, method)
+    return {
+        "restaurants": [
+            {"restaurant_id": restaurant_id, "items": items} for restaurant_id, items in performance.items()
+        ]
+    }
@@ -0,0 +1,40 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.database.pool import POOL_SETTINGS, pool_status
+from app.database import session
+from app.middleware.timing import REQUEST_METRICS, TimedRoute
+from app.services.metrics import render_prometheus
+from app.services.write_behind import writers
+
+router = APIRouter(route_class=TimedRoute)
+
+def _built(get_engine) -> bool:
+    # The async engines are built (and their drivers imported) on first use;
+    # a monitoring poll should not be that first use
+    return get_engine.cache_info().currsize > 0
+
+@router.get("/pool")
+def read_pool_status():
+    status = {"settings": POOL_SETTINGS, "sync": pool_status(session.engine)}
+    if _built(session.get_async_engine):
+        status["async"] = pool_status(session.get_async_engine().sync_engine)
+    if session.read_engine is not None:
+        status["read_sync"] = pool_status(session.read_engine)
+        if _built(session.get_async_read_engine):
+            status["read_async"] = pool_status(session.get_async_read_engine().sync_engine)
+    return status
+
+@router.get("/replica")
+def read_replica_status():
+    return session.replica.status()
+
+@router.get("/write-behind")
+def read_write_behind_status():
+    return {name: writer.stats() for name, writer in writers.items()}
+
+# Mounted at the root: Prometheus scrapes /metrics by default
+metrics_router = APIRouter(route_class=TimedRoute)
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def read_metrics():
+    return PlainTextResponse(render_prometheus(REQUEST_METRICS), media_type="text/plain; version=0.0.4")
@@ -1,28 +1,86 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
 from sqlalchemy.orm import Session
-from app.database.session import get_db
-from app.crud.order import get_order, get_orders_by_restaurant, create_order, get_orders
-from app.schemas.order import OrderCreate, OrderResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.session import get_db, get_async_read_db
+from app.crud.order import get_order, get_order_rows_by_restaurant, create_order, get_orders, create_orders_bulk, MAX_BULK_ORDERS
+from app.schemas.order import OrderCreate, OrderResponse, BulkOrderRequest, BulkOrderResponse
 from app.schemas.order_item import OrderItemCreate
-from typing import List
+from app.schemas.pagination import Page
+from app.crud.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursor
+from app.middleware.timing import TimedRoute
+from app.services.idempotency import IdempotencyError, respond_once
+from app.services.serialization import FastJSONResponse
+from typing import List, Optional
+from datetime import datetime
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
+
+def _once(db: Session, scope: str, idempotency_key: str, payload, create, response_model):
+    # Retries with the same Idempotency-Key get the first response back
+    try:
+        return respond_once(db, scope, idempotency_key, payload, create, response_model)
+    except IdempotencyError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=str(exc))
 
 @router.post("/orders/", response_model=OrderResponse)
-def create_new_order(order: OrderCreate, items: List[OrderItemCreate], db: Session = Depends(get_db)):
-    return create_order(db, order=order, items=items)
+def create_new_order(
+    order: OrderCreate,
+    items: List[OrderItemCreate],
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None),
+):
+    def create():
+        return create_order(db, order=order, items=items)
+
+    if idempotency_key is None:
+        return create()
+    return _once(db, "orders", idempotency_key, {"order": order, "items": items}, create, OrderResponse)
+
+@router.post("/orders/bulk", response_model=BulkOrderResponse)
+def create_orders_in_bulk(
+    payload: BulkOrderRequest,
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None),
+):
+    if len(payload.orders) > MAX_BULK_ORDERS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_ORDERS} orders per request")
+
+    def create():
+        results = create_orders_bulk(db, orders=payload.orders)
+        created = sum(1 for result in results if result["status"] == "created")
+        return {"created": created, "rejected": len(results) - created, "results": results}
+
+    if idempotency_key is None:
+        return create()
+    return _once(db, "orders/bulk", idempotency_key, payload, create, BulkOrderResponse)
 
 @router.get("/orders/{order_id}", response_model=OrderResponse)
-def read_order(order_id: int, db: Session = Depends(get_db)):
-    db_order = get_order(db, order_id=order_id)
+async def read_order(order_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    db_order = await db.run_sync(get_order, order_id)
     if db_order is None:
         raise HTTPException(status_code=404, detail="Order not found")
     return db_order
 
-@router.get("/orders/restaurant/{restaurant_id}", response_model=List[OrderResponse])
-def read_orders_by_restaurant(restaurant_id: int, db: Session = Depends(get_db)):
-    return get_orders_by_restaurant(db, restaurant_id=restaurant_id)
+@router.get("/orders/restaurant/{restaurant_id}", response_model=Page[OrderResponse])
+async def read_orders_by_restaurant(
+    restaurant_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    try:
+        items, next_cursor = await db.run_sync(
+            lambda session: get_order_rows_by_restaurant(
+                session, restaurant_id=restaurant_id, cursor=cursor, limit=limit, start=start, end=end
+            )
+        )
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    # Rows are already plain dicts in the response shape; skip per-row model validation
+    return FastJSONResponse({"items": items, "next_cursor": next_cursor})
 
 @router.get("/orders/", response_model=List[OrderResponse])
-def read_orders(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    return get_orders(db, skip=skip, limit=limit)
\ No newline at end of file
+async def read_orders(skip: int = 0, limit: int = 10, db: AsyncSession = Depends(get_async_read_db)):
+    return await db.run_sync(lambda session: get_orders(session, skip=skip, limit=limit))
\ No newline at end of file
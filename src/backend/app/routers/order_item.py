@@ -1,23 +1,40 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from app.database.session import get_db
+from app.database.session import get_db, get_read_db
 from app.crud.order_item import get_order_item, get_order_items_by_order, create_order_item
 from app.schemas.order_item import OrderItemCreate, OrderItemResponse
+from app.middleware.timing import TimedRoute
+from app.services.write_behind import QueueFull, writers
 from typing import List
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
-@router.post("/order-items/", response_model=OrderItemResponse)
-def create_new_order_item(order_item: OrderItemCreate, db: Session = Depends(get_db)):
-    return create_order_item(db, order_item=order_item)
+if "order_items" in writers:
+    # Group commit, see app/services/write_behind.py
+    @router.post("/order-items/", response_model=OrderItemResponse)
+    async def create_new_order_item(order_item: OrderItemCreate):
+        try:
+            db_order_item = await writers["order_items"].write(order_item)
+        except QueueFull as exc:
+            raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "1"})
+        if db_order_item is None:
+            raise HTTPException(status_code=404, detail="Order not found")
+        return db_order_item
+else:
+    @router.post("/order-items/", response_model=OrderItemResponse)
+    def create_new_order_item(order_item: OrderItemCreate, db: Session = Depends(get_db)):
+        db_order_item = create_order_item(db, order_item=order_item)
+        if db_order_item is None:
+            raise HTTPException(status_code=404, detail="Order not found")
+        return db_order_item
 
 @router.get("/order-items/{order_item_id}", response_model=OrderItemResponse)
-def read_order_item(order_item_id: int, db: Session = Depends(get_db)):
+def read_order_item(order_item_id: int, db: Session = Depends(get_read_db)):
     db_order_item = get_order_item(db, order_item_id=order_item_id)
     if db_order_item is None:
         raise HTTPException(status_code=404, detail="Order item not found")
     return db_order_item
 
 @router.get("/order-items/order/{order_id}", response_model=List[OrderItemResponse])
-def read_order_items_by_order(order_id: int, db: Session = Depends(get_db)):
+def read_order_items_by_order(order_id: int, db: Session = Depends(get_read_db)):
     return get_order_items_by_order(db, order_id=order_id)
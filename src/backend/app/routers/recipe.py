@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from app.database.session import get_db, get_read_db
+from app.crud.recipe import InvalidRecipe, get_recipe, set_recipe
+from app.schemas.recipe import RecipeIngredientCreate, RecipeResponse
+from app.middleware.timing import TimedRoute
+from typing import List
+
+router = APIRouter(route_class=TimedRoute)
+
+@router.get("/menu-items/{menu_item_id}/recipe", response_model=RecipeResponse)
+def read_recipe(menu_item_id: int, db: Session = Depends(get_read_db)):
+    recipe = get_recipe(db, menu_item_id=menu_item_id)
+    if recipe is None:
+        raise HTTPException(status_code=404, detail="Menu item not found")
+    return recipe
+
+@router.put("/menu-items/{menu_item_id}/recipe", response_model=RecipeResponse)
+def replace_recipe(menu_item_id: int, ingredients: List[RecipeIngredientCreate], db: Session = Depends(get_db)):
+    try:
+        recipe = set_recipe(db, menu_item_id=menu_item_id, ingredients=ingredients)
+    except InvalidRecipe as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if recipe is None:
+        raise HTTPException(status_code=404, detail="Menu item not found")
+    return recipe
@@ -1,23 +1,102 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from app.database.session import get_db
-from app.crud.sale import get_sale, get_sales_by_restaurant, create_sale
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.session import SessionLocal, get_db, get_async_read_db
+from app.crud.sale import get_sale, get_sale_rows_by_restaurant, create_sale
 from app.schemas.sale import SaleCreate, SaleResponse
-from typing import List
+from app.schemas.pagination import Page
+from app.crud.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursor
+from app.middleware.timing import TimedRoute
+from app.services.idempotency import IdempotencyError, commit_key, release_key, respond_once, store_response
+from app.services.serialization import FastJSONResponse
+from app.services.write_behind import QueueFull, writers
+from typing import Optional
+from datetime import datetime
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
-@router.post("/sales/", response_model=SaleResponse)
-def create_new_sale(sale: SaleCreate, db: Session = Depends(get_db)):
-    return create_sale(db, sale=sale)
+def _once(db: Session, idempotency_key: str, sale: SaleCreate, create):
+    # Retries with the same Idempotency-Key get the first response back
+    try:
+        return respond_once(db, "sales", idempotency_key, sale, create, SaleResponse)
+    except IdempotencyError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=str(exc))
+
+if "sales" in writers:
+    # Group commit, see app/services/write_behind.py
+    def _found(db_sale):
+        if db_sale is None:
+            raise HTTPException(status_code=404, detail="Order not found")
+        return db_sale
+
+    def _in_session(function, *args):
+        with SessionLocal() as db:
+            return function(db, *args)
+
+    async def _write_once(sale: SaleCreate, idempotency_key: str):
+        # The row is committed by the writer thread, so the key is committed
+        # on its own just before it. Only the two key commits take a worker
+        # thread; the write itself is awaited on the loop
+        try:
+            reserved = await asyncio.to_thread(_in_session, commit_key, "sales", idempotency_key, sale)
+        except IdempotencyError as exc:
+            raise HTTPException(status_code=exc.status_code, detail=str(exc))
+        if isinstance(reserved, Response):
+            return reserved
+        try:
+            db_sale = _found(await writers["sales"].write(sale))
+        except Exception:
+            # A cancelled request keeps its key (409 until it expires): the
+            # queued row may still be committed
+            await asyncio.to_thread(_in_session, release_key, reserved)
+            raise
+        return await asyncio.to_thread(_in_session, store_response, reserved, db_sale, SaleResponse)
+
+    @router.post("/sales/", response_model=SaleResponse)
+    async def create_new_sale(sale: SaleCreate, idempotency_key: Optional[str] = Header(None)):
+        try:
+            if idempotency_key is not None:
+                return await _write_once(sale, idempotency_key)
+            return _found(await writers["sales"].write(sale))
+        except QueueFull as exc:
+            raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "1"})
+else:
+    @router.post("/sales/", response_model=SaleResponse)
+    def create_new_sale(sale: SaleCreate, db: Session = Depends(get_db), idempotency_key: Optional[str] = Header(None)):
+        def create():
+            db_sale = create_sale(db, sale=sale)
+            if db_sale is None:
+                raise HTTPException(status_code=404, detail="Order not found")
+            return db_sale
+
+        if idempotency_key is None:
+            return create()
+        return _once(db, idempotency_key, sale, create)
 
 @router.get("/sales/{sale_id}", response_model=SaleResponse)
-def read_sale(sale_id: int, db: Session = Depends(get_db)):
-    db_sale = get_sale(db, sale_id=sale_id)
+async def read_sale(sale_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    db_sale = await db.run_sync(get_sale, sale_id)
     if db_sale is None:
         raise HTTPException(status_code=404, detail="Sale not found")
     return db_sale
 
-@router.get("/sales/restaurant/{restaurant_id}", response_model=List[SaleResponse])
-def read_sales_by_restaurant(restaurant_id: int, db: Session = Depends(get_db)):
-    return get_sales_by_restaurant(db, restaurant_id=restaurant_id)
+@router.get("/sales/restaurant/{restaurant_id}", response_model=Page[SaleResponse])
+async def read_sales_by_restaurant(
+    restaurant_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    try:
+        items, next_cursor = await db.run_sync(
+            lambda session: get_sale_rows_by_restaurant(
+                session, restaurant_id=restaurant_id, cursor=cursor, limit=limit, start=start, end=end
+            )
+        )
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    # Rows are already plain dicts in the response shape; skip per-row model validation
+    return FastJSONResponse({"items": items, "next_cursor": next_cursor})
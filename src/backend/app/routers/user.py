@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from app.database.session import get_db
+from app.database.session import get_db, get_read_db
 from app.crud.user import get_user, get_user_by_email, create_user, get_users
 from app.schemas.user import UserCreate, UserResponse
+from app.middleware.timing import TimedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.post("/users/", response_model=UserResponse)
 def create_new_user(user: UserCreate, db: Session = Depends(get_db)):
@@ -14,12 +15,12 @@ def create_new_user(user: UserCreate, db: Session = Depends(get_db)):
     return create_user(db, user=user)
 
 @router.get("/users/{user_id}", response_model=UserResponse)
-def read_user(user_id: int, db: Session = Depends(get_db)):
+def read_user(user_id: int, db: Session = Depends(get_read_db)):
     db_user = get_user(db, user_id=user_id)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
     return db_user
 
 @router.get("/users/", response_model=list[UserResponse])
-def read_users(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
+def read_users(skip: int = 0, limit: int = 10, db: Session = Depends(get_read_db)):
     return get_users(db, skip=skip, limit=limit)
\ No newline at end of file
@@ -0,0 +1,24 @@
+from datetime import date
+from typing import List
+from pydantic import BaseModel
+
+class MenuItemForecast(BaseModel):
+    menu_item_id: int
+    name: str
+    quantities: List[float]  # Expected units sold, one per forecast day
+    total: float
+
+class InventoryNeed(BaseModel):
+    inventory_item_id: int
+    name: str
+    unit: str | None
+    quantity: float  # On hand now
+    needed: float  # Used by the forecast sales, in the item's unit
+    shortfall: float  # needed - quantity, when positive
+
+class DemandForecast(BaseModel):
+    restaurant_id: int
+    as_of: date  # Last day of sales the forecast is based on
+    days: List[date]
+    items: List[MenuItemForecast]
+    inventory: List[InventoryNeed]
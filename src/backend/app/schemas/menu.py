@@ -2,7 +2,19 @@ from typing import List, Optional
 from pydantic import BaseModel
 
 class MenuItemPerformance(BaseModel):
+    menu_item_id: Optional[int] = None
     name: str
+    quantity: int = 0
+    revenue: float = 0.0
     popularity: float
     profitability: float
-    category: str  # "Stars", "Plowhorses", "Puzzles", "Dogs"
\ No newline at end of file
+    menu_mix: float = 0.0  # Share of units sold, in percent
+    contribution_margin: float = 0.0  # Per unit sold
+    category: str  # "Stars", "Plowhorses", "Puzzles", "Dogs"
+
+class RestaurantMenuPerformance(BaseModel):
+    restaurant_id: int
+    items: List[MenuItemPerformance]
+
+class MenuPerformanceBatch(BaseModel):
+    restaurants: List[RestaurantMenuPerformance]
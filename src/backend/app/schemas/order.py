@@ -27,3 +27,28 @@ class OrderResponse(OrderBase):
 
     class Config:
         from_attributes = True
+
+class BulkOrderItem(BaseModel):
+    menu_item_id: int
+    quantity: int
+    unit_price: Optional[float] = None
+
+class BulkOrderCreate(OrderCreate):
+    items: List[BulkOrderItem]
+    # Also record the matching Sale row, as the POS does for paid orders
+    create_sale: bool = True
+
+class BulkOrderRequest(BaseModel):
+    orders: List[BulkOrderCreate]
+
+class BulkOrderResult(BaseModel):
+    index: int
+    status: str  # "created" or "rejected"
+    order_id: Optional[int] = None
+    sale_id: Optional[int] = None
+    detail: Optional[str] = None
+
+class BulkOrderResponse(BaseModel):
+    created: int
+    rejected: int
+    results: List[BulkOrderResult]
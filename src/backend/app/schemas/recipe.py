@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from typing import List
+
+class RecipeIngredientBase(BaseModel):
+    inventory_item_id: int
+    # Per unit of the menu item, in the inventory item's unit
+    amount: float
+
+class RecipeIngredientCreate(RecipeIngredientBase):
+    pass
+
+class RecipeIngredientResponse(RecipeIngredientBase):
+    name: str
+    unit: str
+
+class RecipeResponse(BaseModel):
+    menu_item_id: int
+    ingredients: List[RecipeIngredientResponse]
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import Optional
 
 class SaleBase(BaseModel):
     amount: float
@@ -7,6 +8,7 @@ class SaleBase(BaseModel):
 
 class SaleCreate(SaleBase):
     restaurant_id: int
+    order_id: Optional[int] = None
 
 class SaleResponse(SaleBase):
     id: int
@@ -0,0 +1,80 @@
+"""
+Conditional GET for GET /general/restaurants/{id} and the restaurant's menu
+and inventory items, which are polled far more often than they change.
+
+Responses carry an ETag built from the restaurant's version of the resource
+(app/crud/version.py, bumped in the transaction of every write to it) and a
+Last-Modified of when it was last bumped. A request whose If-None-Match, or
+without one If-Modified-Since, still matches is answered 304 Not Modified
+after one primary-key lookup, without loading any rows. Versions live in the
+database, so every worker (and the read replica) agrees on them.
+
+Cache-Control: no-cache lets browsers keep the body but makes them revalidate
+on every poll, rather than guess a freshness lifetime from Last-Modified.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlalchemy.orm import Session
+
+from app.crud.version import get_version
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def _etag(restaurant_id: int, resource: str, version: int, updated_at: Optional[datetime], query: str) -> str:
+    # updated_at keeps a recreated database from reissuing old tags; the query
+    # string tells pages and filters of the same resource apart
+    stamp = updated_at.isoformat() if updated_at is not None else ""
+    digest = hashlib.sha1(f"{resource}:{restaurant_id}:{version}:{stamp}?{query}".encode()).hexdigest()
+    return f'W/"{digest[:20]}"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in {tag.removeprefix("W/") for tag in tags}
+
+
+def _not_modified_since(if_modified_since: Optional[str], updated_at: Optional[datetime]) -> bool:
+    if not if_modified_since or updated_at is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    # HTTP dates have whole seconds
+    return updated_at.replace(microsecond=0) <= since
+
+
+def not_modified(
+    request: Request, response: Response, db: Session, restaurant_id: int, resource: str
+) -> Optional[Response]:
+    """A 304 response if the client's copy is current; otherwise None, with the
+    validators set on response for the full answer.
+
+    Call it before reading the rows: a write committed in between then gives a
+    newer body under the older tag (refetched on the next poll), never an
+    older body under the newer tag (kept until the next write).
+    """
+    row = get_version(db, restaurant_id, resource)
+    version, updated_at = (row.version, row.updated_at) if row is not None else (0, None)
+    etag = _etag(restaurant_id, resource, version, updated_at, request.url.query)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if updated_at is not None:
+        headers["Last-Modified"] = format_datetime(updated_at.replace(tzinfo=timezone.utc), usegmt=True)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        fresh = _matches(if_none_match, etag)
+    else:
+        fresh = _not_modified_since(request.headers.get("if-modified-since"), updated_at)
+    if fresh:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,55 @@
+import logging
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# Write notifications raised by the CRUD layer after a successful commit.
+# Listeners receive (restaurant_id, entity) where entity is e.g. "sale",
+# "order", "order_item" or "inventory_item". A failing listener is logged and
+# never fails the write that triggered it.
+WriteListener = Callable[[int, str], None]
+
+_listeners: list[WriteListener] = []
+
+
+def on_write(listener: WriteListener) -> WriteListener:
+    if listener not in _listeners:
+        _listeners.append(listener)
+    return listener
+
+
+def notify_write(restaurant_ids, entity: str):
+    if isinstance(restaurant_ids, int):
+        restaurant_ids = [restaurant_ids]
+    for restaurant_id in set(restaurant_ids):
+        for listener in _listeners:
+            try:
+                listener(restaurant_id, entity)
+            except Exception:
+                logger.exception("Write listener %r failed for restaurant %s", listener, restaurant_id)
+
+
+# Committed sales as (restaurant_id, sale_id, timestamp, amount), for listeners
+# that keep their own copy of recent sales (app/services/sales_store.py).
+# Listeners register themselves when imported, so writes pay nothing until
+# then.
+SalesListener = Callable[[list], None]
+
+_sales_listeners: list[SalesListener] = []
+
+
+def on_sales(listener: SalesListener) -> SalesListener:
+    if listener not in _sales_listeners:
+        _sales_listeners.append(listener)
+    return listener
+
+
+def notify_sales(rows):
+    if not _sales_listeners:
+        return
+    rows = list(rows)
+    for listener in _sales_listeners:
+        try:
+            listener(rows)
+        except Exception:
+            logger.exception("Sales listener %r failed", listener)
@@ -0,0 +1,134 @@
+"""
+Streaming encoders for the export endpoints (app/routers/export.py).
+
+Each encoder consumes an iterator of row chunks, as produced by
+app.crud.export.stream_rows, and yields the encoded bytes of every chunk as
+soon as it is ready, so a worker holds one chunk at a time however large the
+export is.
+
+Parquet needs the optional "pyarrow" package. Every chunk becomes one row
+group, and the footer is written once the last chunk has been sent.
+"""
+import csv
+import io
+
+from sqlalchemy import types
+
+from app.services.serialization import dumps
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def records(chunks, names):
+    """Chunks of rows as chunks of dicts keyed by column name."""
+    for rows in chunks:
+        yield [dict(zip(names, row)) for row in rows]
+
+
+def csv_stream(chunks, names):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def ndjson_stream(document_chunks):
+    for documents in document_chunks:
+        if documents:
+            yield b"".join(dumps(document) + b"\n" for document in documents)
+
+
+def require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as exc:
+        raise RuntimeError("Parquet exports require the 'pyarrow' package") from exc
+
+
+def _arrow_type(column_type):
+    import pyarrow as pa
+
+    if isinstance(column_type, types.Integer):
+        return pa.int64()
+    if isinstance(column_type, types.Float):
+        return pa.float64()
+    if isinstance(column_type, types.DateTime):
+        return pa.timestamp("us")
+    if isinstance(column_type, types.Date):
+        return pa.date32()
+    return pa.string()
+
+
+class _Sink:
+    """Write-only file that hands back what was written since the last drain."""
+
+    closed = False
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def write(self, data) -> int:
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts.clear()
+        return data
+
+
+def parquet_stream(chunks, columns):
+    """columns: the statement's selected columns, for names and Arrow types."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(column.name, _arrow_type(column.type)) for column in columns])
+    sink = _Sink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema)
+    try:
+        for rows in chunks:
+            if not rows:
+                continue
+            values = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values[index], type=field.type) for index, field in enumerate(schema)], schema=schema,
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def encode(format: str, chunks, columns, documents=None):
+    """Encode chunks of rows of the given columns; documents, if given,
+    regroups the chunks into NDJSON documents."""
+    names = [column.name for column in columns]
+    if format == "csv":
+        return csv_stream(chunks, names)
+    if format == "ndjson":
+        return ndjson_stream(documents(chunks) if documents else records(chunks, names))
+    if format == "parquet":
+        return parquet_stream(chunks, columns)
+    raise ValueError(f"Unknown export format {format!r}")
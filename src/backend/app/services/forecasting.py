@@ -0,0 +1,224 @@
+"""
+Vectorized demand forecasting for GET /dashboard/forecast.
+
+Units sold per menu item per day (the menu item daily facts) are modelled with
+exponential smoothing plus additive weekday seasonality (Holt-Winters without
+trend): every item has a level and seven weekday offsets, and each day of
+history updates all items at once,
+
+    level     = alpha * (sold - offset[weekday]) + (1 - alpha) * level
+    offset[w] = gamma * (sold - level) + (1 - gamma) * offset[w]
+
+so fitting a restaurant's whole menu over FORECAST_HISTORY_DAYS days is that
+many array operations, whatever the number of items. The forecast for a day
+is level + offset[its weekday], floored at zero. Additive offsets (rather than
+multiplicative factors) keep items that never sell on some weekday well
+defined.
+
+The fitted state is cached per restaurant. Once a day has ended, only that
+day's facts are read and folded in (advance). Every FORECAST_REFIT_DAYS the
+state is refitted from the full history, so late corrections to past days are
+picked up, and at once when the restaurant's menu version
+(app/crud/version.py) changes. A background thread advances the
+cached restaurants shortly after midnight UTC, so the first request of the day
+does not pay for it.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Callable, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FORECAST_ALPHA = float(os.getenv("FORECAST_ALPHA", "0.3"))
+FORECAST_GAMMA = float(os.getenv("FORECAST_GAMMA", "0.1"))
+FORECAST_HISTORY_DAYS = int(os.getenv("FORECAST_HISTORY_DAYS", "56"))
+FORECAST_REFIT_DAYS = int(os.getenv("FORECAST_REFIT_DAYS", "7"))
+FORECAST_CACHE_SIZE = int(os.getenv("FORECAST_CACHE_SIZE", "256"))
+# How long after midnight UTC the nightly refresh runs, to let the last
+# orders of the day land
+FORECAST_NIGHTLY_DELAY_SECONDS = float(os.getenv("FORECAST_NIGHTLY_DELAY_SECONDS", "300"))
+
+# Days used to initialise the level and weekday offsets before smoothing
+_WARMUP_DAYS = 14
+
+
+@dataclass
+class SmoothingState:
+    level: np.ndarray  # per item
+    seasonal: np.ndarray  # per item x weekday (Monday = 0)
+    as_of: date  # last day folded in
+
+
+def _step(state: SmoothingState, sold: np.ndarray, day: date, alpha: float, gamma: float):
+    weekday = day.weekday()
+    offset = state.seasonal[:, weekday]
+    state.level = alpha * (sold - offset) + (1 - alpha) * state.level
+    state.seasonal[:, weekday] = gamma * (sold - state.level) + (1 - gamma) * offset
+
+
+def fit(quantities, first_day: date, alpha: float = FORECAST_ALPHA, gamma: float = FORECAST_GAMMA) -> SmoothingState:
+    """quantities: items x days units sold, the first column being first_day."""
+    quantities = np.asarray(quantities, dtype=float)
+    n_items, n_days = quantities.shape
+    warmup = quantities[:, :_WARMUP_DAYS]
+    level = warmup.mean(axis=1) if n_days else np.zeros(n_items)
+    seasonal = np.zeros((n_items, 7))
+    if n_days:
+        weekdays = (first_day.weekday() + np.arange(warmup.shape[1])) % 7
+        totals = np.zeros((n_items, 7))
+        np.add.at(totals.T, weekdays, warmup.T)
+        counts = np.bincount(weekdays, minlength=7)
+        seen = counts > 0
+        seasonal[:, seen] = totals[:, seen] / counts[seen] - level[:, None]
+    state = SmoothingState(level=level, seasonal=seasonal, as_of=first_day - timedelta(days=1))
+    return advance(state, quantities, alpha, gamma)
+
+
+def advance(state: SmoothingState, quantities, alpha: float = FORECAST_ALPHA,
+            gamma: float = FORECAST_GAMMA) -> SmoothingState:
+    """Fold in the days after state.as_of (one column each)."""
+    quantities = np.asarray(quantities, dtype=float)
+    for offset in range(quantities.shape[1]):
+        day = state.as_of + timedelta(days=1)
+        _step(state, quantities[:, offset], day, alpha, gamma)
+        state.as_of = day
+    return state
+
+
+def predict(state: SmoothingState, days: list[date]) -> np.ndarray:
+    """Expected units sold, items x days."""
+    weekdays = [day.weekday() for day in days]
+    return np.maximum(state.level[:, None] + state.seasonal[:, weekdays], 0.0)
+
+
+def _load(db, restaurant_id: int, first_day: date, last_day: date):
+    from app.crud.forecast import get_daily_quantities
+
+    return get_daily_quantities(db, restaurant_id, first_day, last_day)
+
+
+def _menu_version(db, restaurant_id: int) -> int:
+    from app.crud.version import MENU, get_version
+
+    row = get_version(db, restaurant_id, MENU)
+    return row.version if row is not None else 0
+
+
+@dataclass
+class _Entry:
+    menu_item_ids: np.ndarray
+    names: list[str]
+    state: SmoothingState
+    fitted_on: date
+    menu_version: int
+
+
+# load(db, restaurant_id, first_day, last_day) -> (menu item ids ascending,
+# names, items x days units sold)
+Loader = Callable[..., tuple[np.ndarray, list[str], np.ndarray]]
+
+
+class ForecastCache:
+    """Fitted smoothing state per restaurant, advanced a day at a time."""
+
+    def __init__(self, load: Loader = _load, menu_version: Callable[..., int] = _menu_version,
+                 max_entries: int = FORECAST_CACHE_SIZE, history_days: int = FORECAST_HISTORY_DAYS,
+                 refit_days: int = FORECAST_REFIT_DAYS):
+        self.load = load
+        self.menu_version = menu_version
+        self.max_entries = max_entries
+        self.history_days = history_days
+        self.refit_days = refit_days
+        self.hits = 0
+        self.advances = 0
+        self.fits = 0
+        self._entries: OrderedDict[int, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._nightly: Optional[threading.Thread] = None
+
+    def get(self, db, restaurant_id: int, as_of: date) -> _Entry:
+        """The restaurant's state with every day up to as_of folded in, for
+        its current menu (a menu item added since refits at once)."""
+        self._start_nightly()
+        menu_version = self.menu_version(db, restaurant_id)
+        with self._lock:
+            entry = self._entries.get(restaurant_id)
+            if entry is not None:
+                self._entries.move_to_end(restaurant_id)
+        if entry is not None and entry.menu_version != menu_version:
+            entry = None
+        if entry is not None and entry.state.as_of == as_of:
+            self.hits += 1
+            return entry
+
+        if entry is not None and entry.state.as_of < as_of and (as_of - entry.fitted_on).days < self.refit_days:
+            ids, names, quantities = self.load(db, restaurant_id, entry.state.as_of + timedelta(days=1), as_of)
+            if np.array_equal(ids, entry.menu_item_ids):
+                state = SmoothingState(entry.state.level.copy(), entry.state.seasonal.copy(), entry.state.as_of)
+                entry = _Entry(ids, names, advance(state, quantities), entry.fitted_on, menu_version)
+                self.advances += 1
+                return self._store(restaurant_id, entry)
+
+        first_day = as_of - timedelta(days=self.history_days - 1)
+        ids, names, quantities = self.load(db, restaurant_id, first_day, as_of)
+        self.fits += 1
+        return self._store(restaurant_id, _Entry(ids, names, fit(quantities, first_day), as_of, menu_version))
+
+    def _store(self, restaurant_id: int, entry: _Entry) -> _Entry:
+        if self.max_entries > 0:
+            with self._lock:
+                self._entries[restaurant_id] = entry
+                self._entries.move_to_end(restaurant_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def refresh(self):
+        """Bring every cached restaurant up to yesterday."""
+        from app.database.session import open_read_session
+
+        as_of = datetime.utcnow().date() - timedelta(days=1)
+        with self._lock:
+            restaurant_ids = list(self._entries)
+        db = open_read_session()
+        try:
+            for restaurant_id in restaurant_ids:
+                self.get(db, restaurant_id, as_of)
+        finally:
+            db.close()
+
+    def _start_nightly(self):
+        if self._nightly is None:
+            with self._lock:
+                if self._nightly is None:
+                    self._nightly = threading.Thread(target=self._run_nightly, name="forecast-nightly", daemon=True)
+                    self._nightly.start()
+
+    def _run_nightly(self):
+        while True:
+            now = datetime.utcnow()
+            midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+            time.sleep((midnight - now).total_seconds() + FORECAST_NIGHTLY_DELAY_SECONDS)
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Nightly forecast refresh failed")
+
+    def stats(self) -> dict:
+        return {
+            "restaurants": len(self._entries),
+            "max_restaurants": self.max_entries,
+            "hits": self.hits,
+            "advances": self.advances,
+            "fits": self.fits,
+        }
+
+
+forecasts = ForecastCache()
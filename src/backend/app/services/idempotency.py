@@ -0,0 +1,257 @@
+"""
+Idempotency-Key support for POST /general/orders/, /general/orders/bulk and
+/general/sales/.
+
+The first request with a given key runs normally and its response is stored
+in idempotency_keys; a retry with the same key and body gets the stored
+response back (with an Idempotent-Replayed header) instead of writing again.
+Recent keys are also kept in a per-process LRU, so most retries are answered
+without any query; the rest cost one primary-key lookup in idempotency_keys
+and never touch orders or sales.
+
+The key row is added to the session before the write, so it commits in the
+same transaction as the order or sale: two concurrent requests with one key
+cannot both write, the loser's transaction is rolled back by the primary key.
+Its response is stored by a second, small commit. Writes committed elsewhere
+(the write-behind queue) commit the key on its own first with commit_key(),
+and store the response with store_response() once the write is done. A key
+whose first request failed is not kept; one whose request is still running,
+or whose response was lost between the two commits, answers 409 until it
+expires. Reusing a key for a different body answers 422. Errors are never
+stored.
+
+Keys live for IDEMPOTENCY_TTL_HOURS; expired rows are purged at most every
+IDEMPOTENCY_PURGE_SECONDS by the request that stores a response.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, NamedTuple, Optional, Union
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from sqlalchemy import delete, exc, update
+from sqlalchemy.orm import Session
+
+from app.database.models import IdempotencyKey
+from app.services.serialization import dumps
+
+IDEMPOTENCY_TTL_HOURS = float(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+IDEMPOTENCY_PURGE_SECONDS = float(os.getenv("IDEMPOTENCY_PURGE_SECONDS", "3600"))
+MAX_KEY_LENGTH = 255
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+class IdempotencyError(ValueError):
+    status_code = 400
+
+
+class InvalidIdempotencyKey(IdempotencyError):
+    pass
+
+
+class IdempotencyKeyReused(IdempotencyError):
+    """The key was first used with a different request body."""
+    status_code = 422
+
+
+class IdempotencyKeyInProgress(IdempotencyError):
+    """The key's first request has not stored its response (yet)."""
+    status_code = 409
+
+
+class _ResponseCache:
+    """Bounded LRU of (scope, key) -> (request hash, response body, expiry)."""
+
+    def __init__(self, max_entries: int = IDEMPOTENCY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self._entries: OrderedDict[tuple[str, str], tuple[str, bytes, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, scope: str, key: str) -> Optional[tuple[str, bytes]]:
+        with self._lock:
+            entry = self._entries.get((scope, key))
+            if entry is None:
+                return None
+            if entry[2] < time.time():
+                del self._entries[(scope, key)]
+                return None
+            self._entries.move_to_end((scope, key))
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def set(self, scope: str, key: str, request_hash: str, body: bytes, expires_at: float):
+        with self._lock:
+            self._entries[(scope, key)] = (request_hash, body, expires_at)
+            self._entries.move_to_end((scope, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+response_cache = _ResponseCache()
+_last_purge = 0.0
+
+
+def request_hash(payload) -> str:
+    """Hash of the validated request body, independent of key order."""
+    return hashlib.sha256(dumps(_sorted(jsonable_encoder(payload)))).hexdigest()
+
+
+def _sorted(value):
+    if isinstance(value, dict):
+        return {name: _sorted(value[name]) for name in sorted(value)}
+    if isinstance(value, list):
+        return [_sorted(item) for item in value]
+    return value
+
+
+def _epoch(expires_at: datetime) -> float:
+    return time.time() + (expires_at - datetime.utcnow()).total_seconds()
+
+
+def _replay(body: bytes) -> Response:
+    return Response(content=body, media_type="application/json", headers={REPLAYED_HEADER: "true"})
+
+
+def _replayable(row: IdempotencyKey, fingerprint: str) -> bytes:
+    """The stored response of a live key row; raises if it cannot be replayed."""
+    if row.request_hash != fingerprint:
+        raise IdempotencyKeyReused("Idempotency-Key was already used with a different request body")
+    if row.response is None:
+        raise IdempotencyKeyInProgress("A request with this Idempotency-Key is in progress or did not complete")
+    return row.response.encode()
+
+
+def _live(db: Session, scope: str, key: str) -> Optional[IdempotencyKey]:
+    row = db.get(IdempotencyKey, (scope, key))
+    return row if row is not None and row.expires_at >= datetime.utcnow() else None
+
+
+def _purge_expired(db: Session):
+    global _last_purge
+    if time.monotonic() - _last_purge >= IDEMPOTENCY_PURGE_SECONDS:
+        _last_purge = time.monotonic()
+        db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < datetime.utcnow()))
+
+
+class Reservation(NamedTuple):
+    """A key claimed by reserve(), whose response is still to be stored."""
+    scope: str
+    key: str
+    fingerprint: str
+    expires_at: datetime
+
+
+def reserve(db: Session, scope: str, key: str, payload) -> Union[Response, Reservation]:
+    """The stored response for a retry, or a Reservation of a new key.
+
+    The key row is added to db but not committed; it commits with the write,
+    or on its own through commit_key().
+    """
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise InvalidIdempotencyKey(f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters")
+    fingerprint = request_hash(payload)
+
+    cached = response_cache.get(scope, key)
+    if cached is not None:
+        if cached[0] != fingerprint:
+            raise IdempotencyKeyReused("Idempotency-Key was already used with a different request body")
+        return _replay(cached[1])
+
+    row = db.get(IdempotencyKey, (scope, key))
+    if row is not None and row.expires_at >= datetime.utcnow():
+        body = _replayable(row, fingerprint)
+        response_cache.set(scope, key, fingerprint, body, _epoch(row.expires_at))
+        return _replay(body)
+    if row is None:
+        row = IdempotencyKey(scope=scope, key=key)
+        db.add(row)
+    # An expired row is taken over in place
+    expires_at = datetime.utcnow() + timedelta(hours=IDEMPOTENCY_TTL_HOURS)
+    row.request_hash, row.response, row.expires_at = fingerprint, None, expires_at
+    return Reservation(scope, key, fingerprint, expires_at)
+
+
+def _concurrent(db: Session, reservation: Reservation) -> Optional[Response]:
+    """After an IntegrityError: replay the key's first request, if it committed."""
+    db.rollback()
+    row = _live(db, reservation.scope, reservation.key)
+    return None if row is None else _replay(_replayable(row, reservation.fingerprint))
+
+
+def commit_key(db: Session, scope: str, key: str, payload) -> Union[Response, Reservation]:
+    """reserve() and commit the key on its own, for writes committed elsewhere.
+
+    Call release_key() if the write fails, store_response() once it is done.
+    """
+    reserved = reserve(db, scope, key, payload)
+    if isinstance(reserved, Response):
+        return reserved
+    try:
+        db.commit()
+    except exc.IntegrityError:
+        # A concurrent request with the same key committed first
+        replay = _concurrent(db, reserved)
+        if replay is None:
+            raise
+        return replay
+    return reserved
+
+
+def release_key(db: Session, reservation: Reservation):
+    """Drop a committed key whose write failed, so a retry can run."""
+    db.rollback()
+    db.execute(delete(IdempotencyKey).where(
+        IdempotencyKey.scope == reservation.scope, IdempotencyKey.key == reservation.key))
+    db.commit()
+
+
+def store_response(db: Session, reservation: Reservation, result, response_model: type[BaseModel]) -> Response:
+    """Commit the response of a reserved key and return it."""
+    body = dumps(response_model.model_validate(result).model_dump(mode="json"))
+    db.execute(update(IdempotencyKey).where(
+        IdempotencyKey.scope == reservation.scope, IdempotencyKey.key == reservation.key,
+    ).values(response=body.decode()))
+    _purge_expired(db)
+    db.commit()
+    response_cache.set(reservation.scope, reservation.key, reservation.fingerprint, body,
+                       _epoch(reservation.expires_at))
+    return Response(content=body, media_type="application/json")
+
+
+def respond_once(
+    db: Session,
+    scope: str,
+    key: str,
+    payload,
+    create: Callable[[], object],
+    response_model: type[BaseModel],
+) -> Response:
+    """Run create() at most once per (scope, key) and return its response.
+
+    create performs the write, committing through db so the key is committed
+    with it, and returns the response object (validated with response_model).
+    """
+    reserved = reserve(db, scope, key, payload)
+    if isinstance(reserved, Response):
+        return reserved
+    try:
+        result = create()
+    except exc.IntegrityError:
+        # A concurrent request with the same key committed first
+        replay = _concurrent(db, reserved)
+        if replay is None:
+            raise
+        return replay
+    return store_response(db, reserved, result, response_model)
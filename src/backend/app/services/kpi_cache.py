@@ -0,0 +1,182 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Optional
+
+from app.services.events import on_write
+
+# KPI_CACHE_TTL_SECONDS=0 disables caching. KPI_CACHE_URL=redis://... shares
+# the cache between workers (requires the optional "redis" package).
+KPI_CACHE_TTL_SECONDS = float(os.getenv("KPI_CACHE_TTL_SECONDS", "30"))
+KPI_CACHE_MAX_ENTRIES = int(os.getenv("KPI_CACHE_MAX_ENTRIES", "1024"))
+KPI_CACHE_URL = os.getenv("KPI_CACHE_URL")
+KPI_CACHE_PREFIX = os.getenv("KPI_CACHE_PREFIX", "kpi:")
+
+_MISSING = object()
+
+
+class InMemoryBackend:
+    """Bounded LRU with per-entry expiry."""
+
+    blocking = False
+
+    def __init__(self, max_entries: int = KPI_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    # Counters live outside the LRU so they never expire or get evicted
+    def counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class RedisBackend:
+    """Keys are prefixed, so the Redis database can be shared with other data."""
+
+    # Every call is a network round trip
+    blocking = True
+
+    def __init__(self, url: str, prefix: str = KPI_CACHE_PREFIX):
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("KPI_CACHE_URL requires the 'redis' package") from exc
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.evictions = 0
+
+    def get(self, key: str):
+        raw = self.client.get(self.prefix + key)
+        return _MISSING if raw is None else json.loads(raw)
+
+    def set(self, key: str, value, ttl: float):
+        self.client.set(self.prefix + key, json.dumps(value, default=str), px=int(ttl * 1000))
+
+    def counter(self, key: str) -> int:
+        return int(self.client.get(self.prefix + key) or 0)
+
+    def incr(self, key: str) -> int:
+        return self.client.incr(self.prefix + key)
+
+    def size(self) -> int:
+        # Only for the stats endpoint: SCAN walks the whole keyspace. Like the
+        # in-memory backend, generation counters are not entries.
+        count = lambda pattern: sum(1 for _ in self.client.scan_iter(match=self.prefix + pattern, count=1000))
+        return count("*") - count("gen:*")
+
+
+class KPICache:
+    """Cache of KPI payloads keyed by endpoint and restaurant.
+
+    Every restaurant has a generation counter that is part of the key; a write
+    bumps it, so invalidation is O(1) and stale entries simply age out.
+    """
+
+    def __init__(self, backend, ttl: float = KPI_CACHE_TTL_SECONDS):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # Lookups and invalidations come from threadpool threads
+        self._lock = threading.Lock()
+
+    def _generation(self, restaurant_id: int) -> int:
+        return self.backend.counter(f"gen:{restaurant_id}")
+
+    def key(self, endpoint: str, restaurant_id: int, *params) -> str:
+        """Cache key for the restaurant's current generation and UTC date.
+
+        Take it before computing the value and store under that same key: a
+        write that lands meanwhile bumps the generation, so the value (which
+        may predate the write) is filed under a key nobody reads any more.
+        """
+        # KPIs are "today"-relative, so the UTC date keeps entries from
+        # surviving midnight
+        today = datetime.utcnow().date().isoformat()
+        parts = (endpoint, restaurant_id, self._generation(restaurant_id), today, *params)
+        return ":".join(str(part) for part in parts)
+
+    def get(self, key: str):
+        """Cached value or None; counts a hit or miss."""
+        if self.ttl <= 0:
+            return None
+        value = self.backend.get(key)
+        with self._lock:
+            if value is _MISSING:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value):
+        if self.ttl > 0:
+            self.backend.set(key, value, self.ttl)
+
+    def lookup(self, endpoint: str, restaurant_ids: list[int]) -> dict[int, tuple[str, Any]]:
+        """restaurant id -> (key, cached value or None), for get and a later set."""
+        keys = {restaurant_id: self.key(endpoint, restaurant_id) for restaurant_id in restaurant_ids}
+        return {restaurant_id: (key, self.get(key)) for restaurant_id, key in keys.items()}
+
+    def set_many(self, values: dict[str, Any]):
+        for key, value in values.items():
+            self.set(key, value)
+
+    @property
+    def blocking(self) -> bool:
+        """Whether calls block on I/O (and belong off the event loop)."""
+        return self.ttl > 0 and self.backend.blocking
+
+    def invalidate(self, restaurant_id: int, entity: Optional[str] = None):
+        self.backend.incr(f"gen:{restaurant_id}")
+        with self._lock:
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "evictions": self.backend.evictions,
+            "entries": self.backend.size(),
+            "ttl_seconds": self.ttl,
+        }
+
+
+kpi_cache = KPICache(RedisBackend(KPI_CACHE_URL) if KPI_CACHE_URL else InMemoryBackend())
+on_write(kpi_cache.invalidate)
@@ -0,0 +1,157 @@
+"""
+Live KPI updates for dashboards (GET /dashboard/live, Server-Sent Events).
+
+CRUD writes are published on the "writes" channel of app.services.pubsub.
+Each worker's KPIFeed listens there and, for the restaurants that have a
+dashboard connected to that worker, recomputes the scalar KPIs at most once
+per LIVE_KPI_INTERVAL_SECONDS (one query for every changed restaurant) and
+pushes only the values that changed. Dashboards that are open but idle cost
+nothing: no writes means no queries.
+"""
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Optional
+
+from app.services.events import on_write
+from app.services.pubsub import broker
+
+logger = logging.getLogger(__name__)
+
+LIVE_KPI_INTERVAL_SECONDS = float(os.getenv("LIVE_KPI_INTERVAL_SECONDS", "1"))
+# Updates buffered per connection; a dashboard that falls further behind gets
+# a fresh snapshot instead of the backlog
+LIVE_QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", "16"))
+
+WRITES_CHANNEL = "writes"
+KPI_ENTITIES = {"sale", "order", "order_item", "inventory_item"}
+
+
+def _compute(restaurant_ids: list[int]) -> dict[int, dict]:
+    from app.crud.kpi import get_scalar_kpis
+    from app.database.session import open_read_session
+
+    db = open_read_session()
+    try:
+        return get_scalar_kpis(db, restaurant_ids)
+    finally:
+        db.close()
+
+
+def _seconds_to_midnight() -> float:
+    now = datetime.utcnow()
+    return (datetime.combine(now.date() + timedelta(days=1), datetime.min.time()) - now).total_seconds()
+
+
+class KPIFeed:
+    def __init__(self, interval: float = LIVE_KPI_INTERVAL_SECONDS, compute=_compute):
+        self.interval = interval
+        self.compute = compute
+        self.refreshes = 0
+        self._subscribers: dict[int, set[asyncio.Queue]] = defaultdict(set)
+        self._last: dict[int, dict] = {}
+        self._dirty: set[int] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def on_message(self, message: dict):
+        # Any thread: hand over to the event loop that serves the dashboards
+        loop = self._loop
+        if loop is not None and message.get("entity") in KPI_ENTITIES:
+            loop.call_soon_threadsafe(self._mark_dirty, message["restaurant_id"])
+
+    def _mark_dirty(self, restaurant_id: int):
+        if restaurant_id in self._subscribers:
+            self._dirty.add(restaurant_id)
+            self._wakeup.set()
+
+    def _start(self):
+        if self._task is None or self._task.done():
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = self._loop = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=_seconds_to_midnight() + 1)
+            except asyncio.TimeoutError:
+                # "Today" KPIs reset at midnight without any write
+                self._dirty.update(self._subscribers)
+            # Coalesce the writes of the next interval into one refresh
+            await asyncio.sleep(self.interval)
+            self._wakeup.clear()
+            dirty, self._dirty = [rid for rid in self._dirty if rid in self._subscribers], set()
+            if not dirty:
+                continue
+            try:
+                snapshots = await asyncio.to_thread(self.compute, dirty)
+            except Exception:
+                logger.exception("Live KPI refresh failed")
+                continue
+            self.refreshes += 1
+            for restaurant_id, snapshot in snapshots.items():
+                previous = self._last.get(restaurant_id, {})
+                delta = {name: value for name, value in snapshot.items() if previous.get(name) != value}
+                if restaurant_id not in self._subscribers or not delta:
+                    continue
+                self._last[restaurant_id] = snapshot
+                for queue in self._subscribers[restaurant_id]:
+                    self._deliver(queue, {"type": "delta", "restaurant_id": restaurant_id, **delta}, snapshot)
+
+    @staticmethod
+    def _deliver(queue: asyncio.Queue, message: dict, snapshot: dict):
+        if queue.full():
+            while not queue.empty():
+                queue.get_nowait()
+            message = {"type": "snapshot", "restaurant_id": message["restaurant_id"], **snapshot}
+        queue.put_nowait(message)
+
+    async def subscribe(self, restaurant_id: int):
+        """Yield a snapshot of the restaurant's KPIs, then a delta with the
+        changed values after every write that changes them."""
+        self._start()
+        queue = asyncio.Queue(maxsize=LIVE_QUEUE_SIZE)
+        # Registered before the snapshot is read so no write falls in between
+        self._subscribers[restaurant_id].add(queue)
+        try:
+            snapshot = self._last.get(restaurant_id)
+            if snapshot is None:
+                snapshot = (await asyncio.to_thread(self.compute, [restaurant_id]))[restaurant_id]
+                self._last.setdefault(restaurant_id, snapshot)
+            yield {"type": "snapshot", "restaurant_id": restaurant_id, **snapshot}
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers[restaurant_id].discard(queue)
+            if not self._subscribers[restaurant_id]:
+                del self._subscribers[restaurant_id]
+                self._last.pop(restaurant_id, None)
+
+    def stats(self) -> dict:
+        return {
+            "restaurants": len(self._subscribers),
+            "connections": sum(len(queues) for queues in self._subscribers.values()),
+            "refreshes": self.refreshes,
+        }
+
+
+kpi_feed = KPIFeed()
+broker.subscribe(WRITES_CHANNEL, kpi_feed.on_message)
+
+
+@on_write
+def _publish_write(restaurant_id: int, entity: str):
+    broker.publish(WRITES_CHANNEL, {"restaurant_id": restaurant_id, "entity": entity})
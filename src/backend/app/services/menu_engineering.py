@@ -0,0 +1,76 @@
+"""
+Vectorized menu engineering (popularity x contribution margin matrix).
+
+Every input is a flat array with one entry per menu item, for any number of
+restaurants at once; `groups` holds each item's restaurant index (0..n-1) and
+per-restaurant totals are computed with np.bincount, so classifying the menus
+of a thousand restaurants costs the same handful of array operations as one.
+
+Two threshold methods are supported:
+
+- "average" (Kasavana & Smith): an item is popular when its menu mix share is
+  at least 70% of an even share (0.7 / items on the menu), and profitable when
+  its contribution margin per unit is at least the restaurant's
+  quantity-weighted average contribution margin.
+- "fixed": the original cutoffs, at least 50% of orders and a 10% margin.
+"""
+import numpy as np
+
+CATEGORIES = np.array(["Dogs", "Puzzles", "Plowhorses", "Stars"])
+THRESHOLD_METHODS = ("average", "fixed")
+
+POPULARITY_FACTOR = 0.7
+FIXED_POPULARITY = 50.0
+FIXED_PROFITABILITY = 10.0
+
+
+def _ratio(numerator, denominator):
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    out = np.zeros(np.broadcast(numerator, denominator).shape)
+    return np.divide(numerator, denominator, out=out, where=denominator != 0)
+
+
+def classify(groups, order_lines, quantity, revenue, cost, price, unit_cost, orders, method: str = "average"):
+    """
+    groups, order_lines, quantity, revenue, cost, price, unit_cost: per item.
+    orders: total orders per restaurant, indexed by group.
+    Returns a dict of per-item arrays.
+    """
+    if method not in THRESHOLD_METHODS:
+        raise ValueError(f"Unknown threshold method {method!r}; expected one of {THRESHOLD_METHODS}")
+    groups = np.asarray(groups, dtype=np.intp)
+    quantity = np.asarray(quantity, dtype=float)
+    revenue = np.asarray(revenue, dtype=float)
+    cost = np.asarray(cost, dtype=float)
+    price = np.nan_to_num(np.asarray(price, dtype=float))
+    unit_cost = np.nan_to_num(np.asarray(unit_cost, dtype=float))
+    orders = np.asarray(orders, dtype=float)
+    n_groups = len(orders)
+
+    sold = quantity > 0
+    margin = revenue - cost
+    # Items that did not sell in the window fall back to their list price and cost
+    unit_margin = np.where(sold, _ratio(margin, quantity), price - unit_cost)
+    profitability = np.where(sold, _ratio(margin, revenue), _ratio(price - unit_cost, price)) * 100
+    popularity = _ratio(order_lines, orders[groups]) * 100
+
+    group_quantity = np.bincount(groups, weights=quantity, minlength=n_groups)
+    group_items = np.bincount(groups, minlength=n_groups)
+    menu_mix = _ratio(quantity, group_quantity[groups]) * 100
+
+    if method == "average":
+        high_popularity = menu_mix >= POPULARITY_FACTOR * _ratio(100, group_items)[groups]
+        average_margin = _ratio(np.bincount(groups, weights=margin, minlength=n_groups), group_quantity)
+        high_profitability = unit_margin >= average_margin[groups]
+    else:
+        high_popularity = popularity >= FIXED_POPULARITY
+        high_profitability = profitability >= FIXED_PROFITABILITY
+
+    return {
+        "popularity": popularity,
+        "profitability": profitability,
+        "menu_mix": menu_mix,
+        "contribution_margin": unit_margin,
+        "category": CATEGORIES[high_popularity * 2 + high_profitability],
+    }
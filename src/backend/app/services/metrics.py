@@ -0,0 +1,130 @@
+import bisect
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional
+
+# Upper bounds in seconds, Prometheus-style; the last bucket is +Inf
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.sum += value
+            self.count += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """(upper bound, observations <= bound) pairs ending with +Inf."""
+        total = 0
+        pairs = []
+        for bound, count in zip((*map(str, self.buckets), "+Inf"), self._counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def snapshot(self) -> dict:
+        return {"buckets": dict(self.cumulative()), "sum": self.sum, "count": self.count}
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: Optional[dict] = None) -> str:
+    pairs = [*zip(names, values), *(extra or {}).items()]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class _Family(ABC):
+    """A metric with one child per combination of label values."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _new_child(self):
+        """A fresh child for a new combination of label values."""
+
+    @abstractmethod
+    def _render_child(self, values: tuple[str, ...], child) -> list[str]:
+        """Exposition lines of one child."""
+
+    def labels(self, *values):
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        # Children are added from the event loop while /metrics renders in the
+        # threadpool
+        with self._lock:
+            children = sorted(self._children.items())
+        for values, child in children:
+            lines.extend(self._render_child(values, child))
+        return lines
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class CounterFamily(_Family):
+    kind = "counter"
+
+    def _new_child(self):
+        return Counter()
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {child.value}"]
+
+
+class HistogramFamily(_Family):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+
+    def _new_child(self):
+        return Histogram(self.buckets)
+
+    def _render_child(self, values, child):
+        lines = [
+            f"{self.name}_bucket{_format_labels(self.labelnames, values, {'le': bound})} {count}"
+            for bound, count in child.cumulative()
+        ]
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {child.sum}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+def render_prometheus(families) -> str:
+    """Prometheus text exposition format (version 0.0.4)."""
+    return "\n".join(line for family in families for line in family.render()) + "\n"
@@ -0,0 +1,69 @@
+import json
+import logging
+import os
+import threading
+from collections import defaultdict
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# Unset: messages only reach handlers in the publishing process. With several
+# workers set PUBSUB_URL=redis://... (requires the optional "redis" package)
+# so every worker sees every worker's messages.
+PUBSUB_URL = os.getenv("PUBSUB_URL")
+
+# Handlers receive the message dict, on the publisher's thread (in memory) or
+# on the Redis listener thread; they must be quick and thread-safe.
+Handler = Callable[[dict], None]
+
+
+class InMemoryBroker:
+    def __init__(self):
+        self._handlers: dict[str, list[Handler]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel: str, handler: Handler):
+        with self._lock:
+            if handler not in self._handlers[channel]:
+                self._handlers[channel].append(handler)
+
+    def publish(self, channel: str, message: dict):
+        with self._lock:
+            handlers = list(self._handlers[channel])
+        for handler in handlers:
+            try:
+                handler(message)
+            except Exception:
+                logger.exception("Pub/sub handler %r failed on %s", handler, channel)
+
+
+class RedisBroker:
+    """Relays messages through Redis pub/sub to the handlers of every process."""
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("PUBSUB_URL requires the 'redis' package") from exc
+        self.client = redis.Redis.from_url(url)
+        self._local = InMemoryBroker()
+        self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self._listener = None
+        self._lock = threading.Lock()
+
+    def _relay(self, raw):
+        channel = raw["channel"].decode() if isinstance(raw["channel"], bytes) else raw["channel"]
+        self._local.publish(channel, json.loads(raw["data"]))
+
+    def subscribe(self, channel: str, handler: Handler):
+        self._local.subscribe(channel, handler)
+        with self._lock:
+            self._pubsub.subscribe(**{channel: self._relay})
+            if self._listener is None:
+                self._listener = self._pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def publish(self, channel: str, message: dict):
+        self.client.publish(channel, json.dumps(message, default=str))
+
+
+broker = RedisBroker(PUBSUB_URL) if PUBSUB_URL else InMemoryBroker()
@@ -0,0 +1,326 @@
+"""
+In-process columnar store of sales behind /dashboard/revenue-range and
+/dashboard/revenue-heatmap.
+
+Each restaurant's sales are held as NumPy arrays sorted by timestamp
+(microseconds since the epoch) with a prefix sum of the amounts, so revenue and
+sale count over any [start, end) are two binary searches: O(log n) whatever
+the range. A series of k buckets (hours, days, weeks) is k binary searches
+over the same arrays, and the hour-of-day x weekday heatmap is the hourly
+series folded into 7 x 24 cells with np.bincount, so its cost depends on the
+number of hours in the range, not the number of sales.
+
+Keeping it current:
+
+- A restaurant is loaded from the database on its first query and kept for
+  up to SALES_STORE_MAX_RESTAURANTS restaurants (least recently used first
+  out). 0 turns the store off: every query then reads just the rows of its
+  range and keeps nothing.
+- Sales created in this process (create_sale, create_sales_batch and bulk
+  orders) are appended as soon as they commit (app.services.events.on_sales). Appends go to a small unsorted
+  buffer that queries scan directly; it is merged into the sorted arrays once
+  it holds SALES_STORE_MERGE_ROWS rows.
+- Sales written by other workers are fetched at most every
+  SALES_STORE_SYNC_SECONDS by sale id (id > the highest id seen), so they
+  show up within that delay.
+- Every SALES_STORE_RELOAD_SECONDS the restaurant is reloaded in full, which
+  also picks up rows the id-based sync cannot see (a transaction that
+  committed after one holding a higher id).
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.database.models import Sale
+from app.services.events import on_sales
+
+SALES_STORE_MAX_RESTAURANTS = int(os.getenv("SALES_STORE_MAX_RESTAURANTS", "256"))
+SALES_STORE_SYNC_SECONDS = float(os.getenv("SALES_STORE_SYNC_SECONDS", "1"))
+SALES_STORE_RELOAD_SECONDS = float(os.getenv("SALES_STORE_RELOAD_SECONDS", "900"))
+SALES_STORE_MERGE_ROWS = int(os.getenv("SALES_STORE_MERGE_ROWS", "4096"))
+MAX_BUCKETS = int(os.getenv("SALES_STORE_MAX_BUCKETS", "10000"))
+
+DEFAULT_HEATMAP_DAYS = 90
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+_SECOND = 1_000_000
+_HOUR = 3600 * _SECOND
+_DAY = 24 * _HOUR
+INTERVALS = {"hour": _HOUR, "day": _DAY, "week": 7 * _DAY}
+# Bucket alignment: 1970-01-01 was a Thursday, so weeks start 4 days later
+_ALIGN = {"hour": 0, "day": 0, "week": 4 * _DAY}
+_EPOCH_WEEKDAY = 3
+
+
+class InvalidRange(ValueError):
+    pass
+
+
+def _naive_utc(value: datetime) -> datetime:
+    # Timestamps are stored as naive UTC
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _micros(value: datetime) -> int:
+    return int(np.datetime64(_naive_utc(value), "us").astype(np.int64))
+
+
+def _datetime(micros: int, offset: timezone) -> str:
+    return (datetime(1970, 1, 1, tzinfo=timezone.utc) + timedelta(microseconds=int(micros))).astimezone(
+        offset
+    ).isoformat()
+
+
+def _columns(rows) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(id, timestamp, amount) rows as int64 ids, int64 microseconds and float64 amounts."""
+    ids, timestamps, amounts = zip(*rows) if rows else ((), (), ())
+    return (
+        np.asarray(ids, dtype=np.int64),
+        np.asarray(timestamps, dtype="datetime64[us]").astype(np.int64),
+        np.nan_to_num(np.asarray(amounts, dtype=float)),
+    )
+
+
+class _Series:
+    """One restaurant's sales: sorted arrays plus a buffer of recent appends."""
+
+    def __init__(self, ids: np.ndarray, timestamps: np.ndarray, amounts: np.ndarray):
+        order = np.argsort(timestamps, kind="stable")
+        self.timestamps = timestamps[order]
+        self.amounts = amounts[order]
+        self.cumulative = np.concatenate(([0.0], np.cumsum(self.amounts)))
+        # Highest id read from the database; appends and syncs above it are
+        # remembered in seen so that none is counted twice
+        self.load_watermark = self.watermark = int(ids.max()) if len(ids) else 0
+        self.seen: set[int] = set()
+        self.pending_timestamps: list[int] = []
+        self.pending_amounts: list[float] = []
+        self.loaded_at = self.synced_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.timestamps) + len(self.pending_timestamps)
+
+    def add(self, ids, timestamps, amounts, from_database: bool):
+        with self.lock:
+            for sale_id, timestamp, amount in zip(ids, timestamps, amounts):
+                sale_id = int(sale_id)
+                if sale_id <= self.load_watermark or sale_id in self.seen:
+                    continue
+                self.seen.add(sale_id)
+                self.pending_timestamps.append(int(timestamp))
+                self.pending_amounts.append(float(amount))
+            if from_database and len(ids):
+                self.watermark = max(self.watermark, int(np.max(ids)))
+            if len(self.pending_timestamps) >= SALES_STORE_MERGE_ROWS:
+                self._merge()
+
+    def _merge(self):
+        timestamps = np.concatenate((self.timestamps, np.asarray(self.pending_timestamps, dtype=np.int64)))
+        amounts = np.concatenate((self.amounts, np.asarray(self.pending_amounts, dtype=float)))
+        # Nearly sorted (appends are mostly "now"), which a stable sort handles in about linear time
+        order = np.argsort(timestamps, kind="stable")
+        self.timestamps, self.amounts = timestamps[order], amounts[order]
+        self.cumulative = np.concatenate(([0.0], np.cumsum(self.amounts)))
+        self.pending_timestamps, self.pending_amounts = [], []
+
+    def snapshot(self):
+        # The sorted arrays are replaced, never modified, so they can be read
+        # without the lock once their references are taken
+        with self.lock:
+            return (
+                self.timestamps,
+                self.cumulative,
+                np.asarray(self.pending_timestamps, dtype=np.int64),
+                np.asarray(self.pending_amounts, dtype=float),
+            )
+
+
+def bucket_totals(series: _Series, edges: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Revenue and sale count in each [edges[i], edges[i + 1]) (UTC microseconds)."""
+    timestamps, cumulative, pending_timestamps, pending_amounts = series.snapshot()
+    positions = np.searchsorted(timestamps, edges, side="left")
+    revenue = np.diff(cumulative[positions])
+    sales = np.diff(positions)
+    if len(pending_timestamps):
+        buckets = np.searchsorted(edges, pending_timestamps, side="right") - 1
+        inside = (buckets >= 0) & (buckets < len(edges) - 1)
+        revenue = revenue + np.bincount(buckets[inside], weights=pending_amounts[inside], minlength=len(revenue))
+        sales = sales + np.bincount(buckets[inside], minlength=len(sales))
+    return revenue, sales
+
+
+def _edges(start: int, end: int, step: int, align: int) -> np.ndarray:
+    """start, every step boundary (shifted by align) strictly inside, end."""
+    first = (start - align) // step * step + align + step
+    count = max((end - first + step - 1) // step, 0)
+    if count + 1 > MAX_BUCKETS:
+        raise InvalidRange(f"Too many buckets; at most {MAX_BUCKETS} per request")
+    return np.concatenate(([start], first + step * np.arange(count, dtype=np.int64), [end]))
+
+
+class SalesStore:
+    def __init__(
+        self,
+        max_restaurants: int = SALES_STORE_MAX_RESTAURANTS,
+        sync_seconds: float = SALES_STORE_SYNC_SECONDS,
+        reload_seconds: float = SALES_STORE_RELOAD_SECONDS,
+    ):
+        self.max_restaurants = max_restaurants
+        self.sync_seconds = sync_seconds
+        self.reload_seconds = reload_seconds
+        self._series: OrderedDict[int, _Series] = OrderedDict()
+        self._loading: dict[int, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.syncs = 0
+        self.appended = 0
+
+    def append(self, rows: Iterable[tuple[int, int, datetime, Optional[float]]]):
+        """Add committed (restaurant_id, sale_id, timestamp, amount) sales to
+        the restaurants that are loaded; the others read them when loaded."""
+        by_restaurant: dict[int, list] = {}
+        with self._lock:
+            for restaurant_id, sale_id, timestamp, amount in rows:
+                if restaurant_id in self._series and timestamp is not None:
+                    by_restaurant.setdefault(restaurant_id, []).append((sale_id, _naive_utc(timestamp), amount))
+            targets = [(self._series[restaurant_id], rows) for restaurant_id, rows in by_restaurant.items()]
+        for series, rows in targets:
+            series.add(*_columns(rows), from_database=False)
+            self.appended += len(rows)
+
+    def _load(self, db: Session, restaurant_id: int, start: Optional[datetime] = None,
+              end: Optional[datetime] = None) -> _Series:
+        query = select(Sale.id, Sale.timestamp, Sale.amount).where(
+            Sale.restaurant_id == restaurant_id, Sale.timestamp.is_not(None)
+        )
+        if start is not None:
+            query = query.where(Sale.timestamp >= start, Sale.timestamp < end)
+        return _Series(*_columns(db.execute(query).all()))
+
+    def _sync(self, db: Session, restaurant_id: int, series: _Series):
+        rows = db.execute(
+            select(Sale.id, Sale.timestamp, Sale.amount).where(
+                Sale.restaurant_id == restaurant_id, Sale.id > series.watermark, Sale.timestamp.is_not(None)
+            )
+        ).all()
+        series.add(*_columns(rows), from_database=True)
+        series.synced_at = time.monotonic()
+        self.syncs += 1
+
+    def series(self, db: Session, restaurant_id: int, start: datetime, end: datetime) -> _Series:
+        """The restaurant's sales, current to within SALES_STORE_SYNC_SECONDS;
+        only those in [start, end) when the store is off."""
+        if self.max_restaurants <= 0:
+            return self._load(db, restaurant_id, start, end)
+        with self._lock:
+            series = self._series.get(restaurant_id)
+            if series is not None:
+                self._series.move_to_end(restaurant_id)
+            loading = self._loading.setdefault(restaurant_id, threading.Lock())
+
+        now = time.monotonic()
+        if series is None or now - series.loaded_at >= self.reload_seconds:
+            with loading:
+                with self._lock:
+                    current = self._series.get(restaurant_id)
+                if current is not None and current is not series:
+                    # Another request (re)loaded it while we waited
+                    return current
+                series = self._load(db, restaurant_id)
+                self.loads += 1
+                with self._lock:
+                    self._series[restaurant_id] = series
+                    self._series.move_to_end(restaurant_id)
+                    while len(self._series) > self.max_restaurants:
+                        evicted, _ = self._series.popitem(last=False)
+                        self._loading.pop(evicted, None)
+            return series
+        if now - series.synced_at >= self.sync_seconds:
+            with loading:
+                if time.monotonic() - series.synced_at >= self.sync_seconds:
+                    self._sync(db, restaurant_id, series)
+        return series
+
+    def revenue_range(self, db: Session, restaurant_id: int, start: datetime, end: datetime,
+                      interval: Optional[str] = None, utc_offset_minutes: int = 0) -> dict:
+        """Revenue and sale count in [start, end), optionally also per hour,
+        day or week (boundaries at local midnight/Monday for the given offset)."""
+        start_us, end_us = _micros(start), _micros(end)
+        if start_us >= end_us:
+            raise InvalidRange("start must be before end")
+        if interval is not None and interval not in INTERVALS:
+            raise InvalidRange(f"interval must be one of {', '.join(INTERVALS)}")
+        offset_us = utc_offset_minutes * 60 * _SECOND
+        edges = np.array([start_us, end_us], dtype=np.int64)
+        if interval is not None:
+            edges = _edges(start_us + offset_us, end_us + offset_us, INTERVALS[interval], _ALIGN[interval]) - offset_us
+
+        revenue, sales = bucket_totals(self.series(db, restaurant_id, start, end), edges)
+        total_revenue, total_sales = float(revenue.sum()), int(sales.sum())
+        result = {
+            "restaurant_id": restaurant_id,
+            "start": start,
+            "end": end,
+            "revenue": total_revenue,
+            "sales": total_sales,
+            "average_sale": total_revenue / total_sales if total_sales else 0.0,
+        }
+        if interval is not None:
+            offset = timezone(timedelta(minutes=utc_offset_minutes))
+            result["interval"] = interval
+            result["series"] = [
+                {"start": _datetime(edge, offset), "revenue": float(amount), "sales": int(count)}
+                for edge, amount, count in zip(edges[:-1], revenue, sales)
+            ]
+        return result
+
+    def heatmap(self, db: Session, restaurant_id: int, start: datetime, end: datetime,
+                utc_offset_minutes: int = 0) -> dict:
+        """Revenue and sale count in [start, end) by weekday (rows, Monday
+        first) and hour of day (columns), in local time for the given offset."""
+        start_us, end_us = _micros(start), _micros(end)
+        if start_us >= end_us:
+            raise InvalidRange("start must be before end")
+        offset_us = utc_offset_minutes * 60 * _SECOND
+        local_edges = _edges(start_us + offset_us, end_us + offset_us, _HOUR, 0)
+        revenue, sales = bucket_totals(self.series(db, restaurant_id, start, end), local_edges - offset_us)
+
+        hours = local_edges[:-1] // _HOUR
+        cells = ((hours // 24 + _EPOCH_WEEKDAY) % 7) * 24 + hours % 24
+        return {
+            "restaurant_id": restaurant_id,
+            "start": start,
+            "end": end,
+            "utc_offset_minutes": utc_offset_minutes,
+            "weekdays": list(WEEKDAYS),
+            "revenue": np.bincount(cells, weights=revenue, minlength=168).reshape(7, 24).tolist(),
+            "sales": np.bincount(cells, weights=sales, minlength=168).astype(np.int64).reshape(7, 24).tolist(),
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            series = list(self._series.values())
+        return {
+            "restaurants": len(series),
+            "max_restaurants": self.max_restaurants,
+            "rows": sum(len(item) for item in series),
+            "pending_rows": sum(len(item.pending_timestamps) for item in series),
+            "bytes": sum(item.timestamps.nbytes + item.amounts.nbytes + item.cumulative.nbytes for item in series),
+            "loads": self.loads,
+            "syncs": self.syncs,
+            "appended": self.appended,
+        }
+
+
+sales_store = SalesStore()
+on_sales(sales_store.append)
@@ -0,0 +1,37 @@
+import json
+from datetime import date, datetime
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the standard library encoder
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    """Encode plain dicts/lists the way the response models would: datetimes as
+    ISO 8601, no whitespace."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+class FastJSONResponse(Response):
+    """JSON response for payloads that are already plain data.
+
+    Returning it from an endpoint skips response_model validation, so the
+    endpoint is responsible for producing exactly the documented shape; keep
+    response_model on the route for the OpenAPI schema.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,169 @@
+"""
+Group commit for POST /general/sales/ and POST /general/order-items/.
+
+With WRITE_BEHIND=true each request hands its validated row to a per-table
+writer thread instead of running its own transaction. The writer collects up
+to WRITE_BEHIND_BATCH_SIZE rows, or whatever arrived within
+WRITE_BEHIND_MAX_DELAY_MS of the first one, and writes them with one INSERT
+and one commit (app.crud.sale.create_sales_batch,
+app.crud.order_item.create_order_items_batch).
+
+Acknowledgement: a request is answered only after the transaction holding its
+row has committed, with the same response as the direct path, so an
+acknowledged row is exactly as durable as before. What is traded is latency
+(up to the batch delay) for throughput (one commit, and one fsync, per batch
+instead of per row). A row whose request was not answered, because the
+process died, may or may not have been written. If a batch fails, its rows
+are retried one by one so that only the failing rows' requests see the error.
+
+Back-pressure: at most WRITE_BEHIND_QUEUE_SIZE rows wait per table; beyond
+that requests are refused with 503 and Retry-After instead of queueing
+without bound.
+"""
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+WRITE_BEHIND = os.getenv("WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "500"))
+WRITE_BEHIND_MAX_DELAY_MS = float(os.getenv("WRITE_BEHIND_MAX_DELAY_MS", "5"))
+WRITE_BEHIND_QUEUE_SIZE = int(os.getenv("WRITE_BEHIND_QUEUE_SIZE", "10000"))
+
+
+class QueueFull(RuntimeError):
+    pass
+
+
+class WriteBehindQueue:
+    """Batches rows for write_batch(session, rows) -> one result per row."""
+
+    def __init__(self, name: str, write_batch: Callable, batch_size: int = WRITE_BEHIND_BATCH_SIZE,
+                 max_delay_ms: float = WRITE_BEHIND_MAX_DELAY_MS, queue_size: int = WRITE_BEHIND_QUEUE_SIZE):
+        self.name = name
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self.max_delay = max_delay_ms / 1000
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.rows = 0
+        self.rejected = 0
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f"write-behind-{self.name}", daemon=True)
+                self._thread.start()
+
+    def submit(self, row) -> Future:
+        """Queue row; the future resolves to its result once committed."""
+        self._start()
+        future = Future()
+        try:
+            self._queue.put_nowait((row, future))
+        except queue.Full:
+            self.rejected += 1
+            raise QueueFull(f"Too many pending {self.name} writes")
+        return future
+
+    async def write(self, row):
+        return await asyncio.wrap_future(self.submit(row))
+
+    def _next_batch(self) -> list:
+        item = self._queue.get()
+        if item is None:
+            return []
+        batch = [item]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # close(): flush what we have, then stop
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            self._flush(batch)
+
+    def _write(self, rows: list) -> list:
+        from app.database.session import SessionLocal
+
+        db = SessionLocal()
+        try:
+            return self.write_batch(db, rows)
+        finally:
+            db.close()
+
+    def _flush(self, batch: list):
+        rows = [row for row, _ in batch]
+        try:
+            results = self._write(rows)
+        except Exception as exc:
+            if len(batch) == 1:
+                logger.exception("Write-behind %s write failed", self.name)
+                _resolve(batch[0][1], exception=exc)
+                return
+            logger.warning("Write-behind %s batch of %d failed; retrying row by row", self.name, len(batch),
+                           exc_info=True)
+            for item in batch:
+                self._flush([item])
+            return
+        self.batches += 1
+        self.rows += len(batch)
+        for (_, future), result in zip(batch, results):
+            _resolve(future, result)
+
+    def close(self, timeout: float = 30):
+        """Write everything queued so far and stop the writer thread."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "pending": self._queue.qsize(),
+            "batches": self.batches,
+            "rows": self.rows,
+            "rows_per_batch": round(self.rows / self.batches, 1) if self.batches else None,
+            "rejected": self.rejected,
+        }
+
+
+def _resolve(future: Future, result=None, exception: Optional[BaseException] = None):
+    # The request may have gone away (its future cancelled); the row is written regardless
+    if future.set_running_or_notify_cancel():
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+
+def _writers() -> dict[str, WriteBehindQueue]:
+    from app.crud.order_item import create_order_items_batch
+    from app.crud.sale import create_sales_batch
+
+    return {
+        "sales": WriteBehindQueue("sales", create_sales_batch),
+        "order_items": WriteBehindQueue("order_items", create_order_items_batch),
+    }
+
+
+writers = _writers() if WRITE_BEHIND else {}
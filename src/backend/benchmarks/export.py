@@ -0,0 +1,115 @@
+"""
+Throughput and peak memory of the streaming exports (app/routers/export.py).
+
+Seeds one restaurant with --days of history and runs every export through the
+same generators the endpoints stream, discarding the bytes as a client would.
+Peak memory is the largest amount allocated by Python at any point during the
+export (tracemalloc), which should depend on EXPORT_CHUNK_SIZE and not on the
+number of rows exported. Timings include tracemalloc's overhead.
+
+    python benchmarks/export.py                        # SQLite stand-in
+    python benchmarks/export.py --database-url postgresql+psycopg2://...
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None,
+                        help="Database to benchmark (default: a temporary SQLite file)")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--orders-per-day", default="100-100")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Rows per chunk (default: EXPORT_CHUNK_SIZE)")
+    parser.add_argument("--skip-seed", action="store_true", help="Benchmark the existing data as is")
+    return parser.parse_args(argv)
+
+
+def configure_environment(args):
+    if args.database_url is None:
+        args.database_url = f"sqlite:///{tempfile.mkdtemp()}/export.db"
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+def seed(db, args):
+    from scripts import seed as seeder
+
+    seeder.seed_database(db, seeder.parse_args([
+        "--restaurants", "1",
+        "--days", str(args.days),
+        "--orders-per-day", args.orders_per_day,
+        "--end-date", datetime.utcnow().isoformat(),
+    ]))
+
+
+def exports(chunk_size):
+    from app.crud import export as crud
+    from app.services import export
+
+    def stream(statement, format, documents=None):
+        columns = list(statement.selected_columns)
+        return lambda db: export.encode(format, crud.stream_rows(db, statement, chunk_size), columns, documents)
+
+    formats = ["csv", "ndjson"]
+    try:
+        export.require_pyarrow()
+        formats.append("parquet")
+    except RuntimeError:
+        print("pyarrow is not installed; skipping Parquet.")
+
+    for format in formats:
+        yield f"sales.{format}", lambda restaurant_id, format=format: stream(crud.sales_export(restaurant_id), format)
+        yield f"orders.{format}", lambda restaurant_id, format=format: stream(
+            crud.orders_export(restaurant_id), format, documents=crud.order_documents
+        )
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    configure_environment(args)
+
+    from app.crud.export import EXPORT_CHUNK_SIZE
+    from app.database import session
+    from app.database.models import Restaurant
+
+    db = session.SessionLocal()
+    try:
+        if not args.skip_seed:
+            seed(db, args)
+        restaurant_id = db.query(Restaurant.id).order_by(Restaurant.id).limit(1).scalar()
+    finally:
+        db.close()
+    if restaurant_id is None:
+        print("No restaurants to benchmark; run without --skip-seed.")
+        return 1
+
+    chunk_size = args.chunk_size or EXPORT_CHUNK_SIZE
+    print(f"chunk size {chunk_size}")
+    print(f"{'export':15} {'MB':>8} {'seconds':>8} {'MB/s':>8} {'peak MB':>8}")
+    for name, build in exports(chunk_size):
+        db = session.SessionLocal()
+        try:
+            tracemalloc.start()
+            started = time.perf_counter()
+            size = sum(len(part) for part in build(restaurant_id)(db))
+            elapsed = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+            db.close()
+        print(f"{name:15} {size / 1e6:8.1f} {elapsed:8.2f} {size / 1e6 / elapsed:8.1f} {peak / 1e6:8.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Order creation throughput with and without recipe-driven stock consumption.
+
+Seeds the demo menu (whose items have recipes, see scripts/seed.py), then
+creates --orders orders through app.crud.order.create_order with
+INVENTORY_CONSUMPTION off and on, and reports orders/second and SQL
+statements per order. Consumption adds one UPDATE per order however many
+lines and ingredients it has. Afterwards every inventory item must be down
+by exactly what the recipes say the consumed orders used.
+
+    python benchmarks/inventory.py                        # SQLite stand-in
+    python benchmarks/inventory.py --database-url postgresql+psycopg2://...
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None,
+                        help="Database to benchmark (default: a temporary SQLite file)")
+    parser.add_argument("--orders", type=int, default=2000, help="Orders created per mode")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args(argv)
+
+
+def configure_environment(args):
+    if args.database_url is None:
+        args.database_url = f"sqlite:///{tempfile.mkdtemp()}/inventory.db"
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    # The benchmark compares order writes, not slow query logging
+    os.environ.setdefault("SLOW_QUERY_MS", "0")
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+def seed(db):
+    from scripts import seed as seeder
+
+    seeder.seed_database(db, seeder.parse_args([
+        "--restaurants", "1", "--days", "1", "--orders-per-day", "0", "--end-date", datetime.utcnow().isoformat(),
+    ]))
+
+
+def generate_orders(rng, restaurant_id, menu, count):
+    from app.schemas.order import OrderCreate
+    from app.schemas.order_item import OrderItemCreate
+
+    orders = []
+    for _ in range(count):
+        lines = [
+            OrderItemCreate(order_id=0, menu_item_id=menu_item_id, quantity=rng.randint(1, 3), unit_price=price)
+            for menu_item_id, price in rng.sample(menu, rng.randint(1, len(menu)))
+        ]
+        total = sum(line.quantity * line.unit_price for line in lines)
+        orders.append((
+            OrderCreate(restaurant_id=restaurant_id, customer_name=None, total_amount=total,
+                        timestamp=datetime.utcnow(), status="Entregue"),
+            lines,
+        ))
+    return orders
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    configure_environment(args)
+
+    from app.crud import order as order_crud, recipe
+    from app.database import session
+    from app.database.instrumentation import track_queries
+    from app.database.models import InventoryItem, MenuItem, RecipeIngredient
+
+    db = session.SessionLocal()
+    try:
+        seed(db)
+        menu_item = db.query(MenuItem).order_by(MenuItem.id).first()
+        restaurant_id = menu_item.restaurant_id
+        menu = [(row.id, row.price) for row in db.query(MenuItem).filter(MenuItem.restaurant_id == restaurant_id)]
+        recipes = defaultdict(list)
+        for row in db.query(RecipeIngredient):
+            recipes[row.menu_item_id].append((row.inventory_item_id, row.amount))
+        stock = dict(db.query(InventoryItem.id, InventoryItem.quantity).filter(InventoryItem.restaurant_id == restaurant_id))
+    finally:
+        db.close()
+
+    rng = random.Random(args.seed)
+    expected = dict(stock)
+    print(f"{'consumption':12} {'orders/s':>10} {'SQL/order':>10}")
+    for enabled in (False, True):
+        recipe.INVENTORY_CONSUMPTION = enabled
+        orders = generate_orders(rng, restaurant_id, menu, args.orders)
+        db = session.SessionLocal()
+        try:
+            with track_queries() as queries:
+                started = time.perf_counter()
+                for order, lines in orders:
+                    order_crud.create_order(db, order=order, items=lines)
+                elapsed = time.perf_counter() - started
+        finally:
+            db.close()
+        if enabled:
+            for _, lines in orders:
+                for line in lines:
+                    for inventory_item_id, amount in recipes[line.menu_item_id]:
+                        expected[inventory_item_id] -= amount * line.quantity
+        print(f"{'on' if enabled else 'off':12} {len(orders) / elapsed:10,.0f} {queries.statements / len(orders):10.1f}")
+
+    db = session.SessionLocal()
+    try:
+        actual = dict(db.query(InventoryItem.id, InventoryItem.quantity).filter(InventoryItem.restaurant_id == restaurant_id))
+    finally:
+        db.close()
+    wrong = {item: (actual[item], expected[item]) for item in expected if abs(actual[item] - expected[item]) > 1e-6}
+    if wrong:
+        print(f"Stock does not match the recipes (actual, expected): {wrong}")
+        return 1
+    print("Stock matches the recipes.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,284 @@
+"""
+Endpoint benchmark and load test with regression thresholds.
+
+Seeds a sized dataset, drives every router mounted in app/main.py in-process
+(no server needed) with concurrent clients, and records p50/p95/p99 latency,
+throughput and SQL statements per request for each endpoint. Results are
+compared with benchmarks/baseline.json:
+
+- SQL statements per request must not grow (they are deterministic), and
+- with --check-latency, p95 latency must stay within --tolerance of the
+  baseline. An endpoint over the limit is re-measured once before it is
+  reported, so a single GC pause or scheduler hiccup does not fail the run.
+  Write endpoints are only latency-checked on Postgres: concurrent writers
+  on the SQLite stand-in queue on the database file lock, so their p95 is
+  mostly waiting and varies severalfold between identical runs.
+
+Not measured: the /dashboard/live event stream (it never ends; its
+/dashboard/live/stats is), PUT /general/menu-items/{id}/recipe (it replaces
+the recipe the order writes consume) and the in-process /stats counters of
+the KPI cache, sales store and forecast.
+
+    python benchmarks/run.py                                  # SQLite stand-in
+    python benchmarks/run.py --database-url postgresql+psycopg2://...  # local Postgres
+    python benchmarks/run.py --check-latency                  # also gate on p95
+    python benchmarks/run.py --update-baseline                # accept new numbers
+
+Baselines only compare like with like: rerun --update-baseline when the
+dataset size, database or hardware change.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None,
+                        help="Database to benchmark (default: a temporary SQLite file)")
+    parser.add_argument("--restaurants", type=int, default=3)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--orders-per-day", default="20-50")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--check-latency", action="store_true",
+                        help="Also fail on p95 latency regressions (write endpoints only on Postgres)")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="Allowed relative p95 latency increase over the baseline")
+    parser.add_argument("--only", default=None, help="Comma-separated endpoint names to run")
+    parser.add_argument("--skip-seed", action="store_true", help="Benchmark the existing data as is")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", type=Path, default=None, help="Also write results to this JSON file")
+    return parser.parse_args(argv)
+
+
+def configure_environment(args):
+    # Must run before the app is imported: the engine is built from these
+    if args.database_url is None:
+        args.database_url = f"sqlite:///{tempfile.mkdtemp()}/benchmark.db"
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    # Measure the database path, not cache hits
+    os.environ.setdefault("KPI_CACHE_TTL_SECONDS", "0")
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+def seed(args):
+    from scripts import seed as seeder
+    from app.database import session
+
+    db = next(session.get_db())
+    try:
+        seeder.seed_database(db, seeder.parse_args([
+            "--restaurants", str(args.restaurants),
+            "--days", str(args.days),
+            "--orders-per-day", args.orders_per_day,
+            "--end-date", datetime.utcnow().isoformat(),
+        ]))
+    finally:
+        db.close()
+
+
+def fixture_ids():
+    from app.database import models, session
+
+    db = next(session.get_db())
+    try:
+        order = db.query(models.Order).order_by(models.Order.id).first()
+        first_id = lambda column, *filters: db.query(column).filter(*filters).order_by(column).limit(1).scalar()
+        return {
+            "user_id": first_id(models.User.id),
+            "restaurant_id": order.restaurant_id,
+            "restaurant_ids": ",".join(str(row.id) for row in db.query(models.Restaurant.id)),
+            "order_id": order.id,
+            "sale_id": first_id(models.Sale.id),
+            "menu_item_id": first_id(models.MenuItem.id, models.MenuItem.restaurant_id == order.restaurant_id),
+            "order_item_id": first_id(models.OrderItem.id),
+            "inventory_item_id": first_id(models.InventoryItem.id),
+        }
+    finally:
+        db.close()
+
+
+def endpoints(ids):
+    """(name, method, path, json body factory) for every mounted router."""
+    now = lambda: datetime.utcnow().isoformat()
+    r = ids["restaurant_id"]
+    today = datetime.utcnow().date()
+    month_ago = today - timedelta(days=30)
+    order = lambda: {
+        "customer_name": None, "total_amount": 45.5, "timestamp": now(), "status": "Pendente", "restaurant_id": r,
+    }
+    item = {"menu_item_id": ids["menu_item_id"], "quantity": 1, "unit_price": 45.5}
+    return [
+        ("root", "GET", "/", None),
+        ("ping", "GET", "/ping", None),
+        ("users.list", "GET", "/general/users/", None),
+        ("users.get", "GET", f"/general/users/{ids['user_id']}", None),
+        ("restaurants.list", "GET", "/general/restaurants/", None),
+        ("restaurants.get", "GET", f"/general/restaurants/{r}", None),
+        ("sales.get", "GET", f"/general/sales/{ids['sale_id']}", None),
+        ("sales.by_restaurant", "GET", f"/general/sales/restaurant/{r}", None),
+        ("sales.create", "POST", "/general/sales/", lambda: {"amount": 45.5, "timestamp": now(), "restaurant_id": r}),
+        ("orders.list", "GET", "/general/orders/", None),
+        ("orders.get", "GET", f"/general/orders/{ids['order_id']}", None),
+        ("orders.by_restaurant", "GET", f"/general/orders/restaurant/{r}", None),
+        ("orders.create", "POST", "/general/orders/",
+         lambda: {"order": order(), "items": [{**item, "order_id": 0}]}),
+        ("orders.bulk", "POST", "/general/orders/bulk",
+         lambda: {"orders": [{**order(), "items": [item]} for _ in range(20)]}),
+        ("menu_items.get", "GET", f"/general/menu-items/{ids['menu_item_id']}", None),
+        ("menu_items.by_restaurant", "GET", f"/general/menu-items/restaurant/{r}", None),
+        ("order_items.get", "GET", f"/general/order-items/{ids['order_item_id']}", None),
+        ("order_items.by_order", "GET", f"/general/order-items/order/{ids['order_id']}", None),
+        ("order_items.create", "POST", "/general/order-items/", lambda: {**item, "order_id": ids["order_id"]}),
+        ("inventory_items.get", "GET", f"/general/inventory-items/{ids['inventory_item_id']}", None),
+        ("inventory_items.by_restaurant", "GET", f"/general/inventory-items/restaurant/{r}", None),
+        ("recipes.get", "GET", f"/general/menu-items/{ids['menu_item_id']}/recipe", None),
+        ("exports.sales", "GET", f"/general/exports/sales/restaurant/{r}?start={month_ago}&end={today}", None),
+        ("exports.orders", "GET", f"/general/exports/orders/restaurant/{r}?start={month_ago}&end={today}&format=ndjson",
+         None),
+        ("exports.inventory_items", "GET", f"/general/exports/inventory-items/restaurant/{r}", None),
+        ("kpi.revenue_today", "GET", f"/dashboard/revenue-today?restaurant_id={r}", None),
+        ("kpi.orders_today", "GET", f"/dashboard/orders-today?restaurant_id={r}", None),
+        ("kpi.inventory_below_threshold", "GET", f"/dashboard/inventory-below-threshold?restaurant_id={r}", None),
+        ("kpi.revenue_last_30_days", "GET", f"/dashboard/revenue-last-30-days?restaurant_id={r}", None),
+        ("kpi.kpis", "GET", f"/dashboard/kpis?restaurant_id={r}", None),
+        ("kpi.kpis_batch", "GET", f"/dashboard/kpis/batch?restaurant_ids={ids['restaurant_ids']}", None),
+        ("kpi.revenue_range", "GET", f"/dashboard/revenue-range?restaurant_id={r}&start={month_ago}&end={today}&interval=day",
+         None),
+        ("kpi.revenue_heatmap", "GET", f"/dashboard/revenue-heatmap?restaurant_id={r}", None),
+        ("kpi.forecast", "GET", f"/dashboard/forecast?restaurant_id={r}", None),
+        ("kpi.live_stats", "GET", "/dashboard/live/stats", None),
+        ("menu.performance", "GET", f"/restaurants/{r}/menu/performance?days=30", None),
+        ("menu.performance_365", "GET", f"/restaurants/{r}/menu/performance?days=365", None),
+        ("menu.performance_batch", "GET", f"/menu/performance/batch?restaurant_ids={ids['restaurant_ids']}", None),
+        ("monitoring.pool", "GET", "/monitoring/pool", None),
+        ("monitoring.replica", "GET", "/monitoring/replica", None),
+        ("monitoring.write_behind", "GET", "/monitoring/write-behind", None),
+        ("monitoring.metrics", "GET", "/metrics", None),
+    ]
+
+
+async def drive(client, method, path, body, requests, concurrency):
+    from app.database.instrumentation import capture_statements
+
+    latencies = []
+    statement_counts = []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            with capture_statements() as statements:
+                started = time.perf_counter()
+                response = await client.request(method, path, json=body() if body else None)
+                latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                raise RuntimeError(f"{method} {path} returned {response.status_code}: {response.text[:200]}")
+            statement_counts.append(len(statements))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    quantile = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+    return {
+        "requests": requests,
+        "throughput_rps": round(requests / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(quantile(0.95), 2),
+        "p99_ms": round(quantile(0.99), 2),
+        "sql_statements": max(statement_counts),
+    }
+
+
+def latency_regressed(result, expected, tolerance) -> bool:
+    return expected is not None and result["p95_ms"] > expected["p95_ms"] * (1 + tolerance)
+
+
+def latency_checked(args, method: str) -> bool:
+    return args.check_latency and (method == "GET" or not args.database_url.startswith("sqlite"))
+
+
+async def run(args, baseline):
+    import httpx
+    from app.main import app
+
+    if not args.skip_seed:
+        seed(args)
+
+    selected = set(args.only.split(",")) if args.only else None
+    results = {}
+    checked = set()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for name, method, path, body in endpoints(fixture_ids()):
+            if selected and name not in selected:
+                continue
+            await drive(client, method, path, body, min(10, args.requests), 1)  # warm up
+            result = await drive(client, method, path, body, args.requests, args.concurrency)
+            if latency_checked(args, method):
+                checked.add(name)
+            if name in checked and latency_regressed(result, baseline.get(name), args.tolerance):
+                retry = await drive(client, method, path, body, args.requests, args.concurrency)
+                result = min(result, retry, key=lambda r: r["p95_ms"])
+            results[name] = result
+            print(f"{name:32} {result['throughput_rps']:8.1f} req/s  p50 {result['p50_ms']:7.2f}  "
+                  f"p95 {result['p95_ms']:7.2f}  p99 {result['p99_ms']:7.2f} ms  sql {result['sql_statements']}")
+    return results, checked
+
+
+def compare(results, baseline, tolerance, latency_checked=frozenset()):
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        if result["sql_statements"] > expected["sql_statements"]:
+            regressions.append(f"{name}: {result['sql_statements']} SQL statements per request "
+                               f"(baseline {expected['sql_statements']})")
+        if name in latency_checked and latency_regressed(result, expected, tolerance):
+            regressions.append(f"{name}: p95 {result['p95_ms']} ms (baseline {expected['p95_ms']} ms, "
+                               f"tolerance {tolerance:.0%})")
+    return regressions
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    configure_environment(args)
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    results, checked = asyncio.run(run(args, {} if args.update_baseline else baseline))
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+    if args.update_baseline:
+        baseline.update(results)
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not baseline:
+        print("No baseline to compare against; run with --update-baseline first.")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance, checked)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions:
+        print("No regressions against the baseline.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+Rows/second of the large list responses, before and after the fast path.
+
+Builds the body of GET /sales/restaurant/{id} and GET /orders/restaurant/{id}
+for one page of --rows rows both ways and checks that the bytes are identical:
+
+- orm: ORM objects, from_attributes validation into Page[...] and
+  pydantic's JSON encoder (what FastAPI does with response_model), and
+- fast: response columns selected as tuples, plain dicts and orjson
+  (app/services/serialization.py).
+
+    python benchmarks/serialization.py                        # SQLite stand-in
+    python benchmarks/serialization.py --database-url postgresql+psycopg2://...
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None,
+                        help="Database to benchmark (default: a temporary SQLite file)")
+    parser.add_argument("--rows", type=int, default=50_000, help="Rows per response")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per path; the median is reported")
+    parser.add_argument("--skip-seed", action="store_true", help="Benchmark the existing data as is")
+    return parser.parse_args(argv)
+
+
+def configure_environment(args):
+    # Must run before the app is imported: the engine and page cap are read at import
+    if args.database_url is None:
+        args.database_url = f"sqlite:///{tempfile.mkdtemp()}/serialization.db"
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    os.environ["MAX_PAGE_SIZE"] = str(args.rows)
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+def seed(db, rows: int):
+    from scripts import seed as seeder
+
+    # One restaurant with a steady 100 orders (and sales) a day
+    seeder.seed_database(db, seeder.parse_args([
+        "--restaurants", "1",
+        "--days", str(rows // 100 + 1),
+        "--orders-per-day", "100-100",
+        "--end-date", datetime.utcnow().isoformat(),
+    ]))
+
+
+def paths():
+    from pydantic import TypeAdapter
+
+    from app.crud.order import get_order_rows_by_restaurant, get_orders_by_restaurant
+    from app.crud.sale import get_sale_rows_by_restaurant, get_sales_by_restaurant
+    from app.schemas.order import OrderResponse
+    from app.schemas.pagination import Page
+    from app.schemas.sale import SaleResponse
+    from app.services.serialization import dumps
+
+    def orm(fetch, schema):
+        adapter = TypeAdapter(Page[schema])
+
+        def body(db, restaurant_id, limit):
+            items, next_cursor = fetch(db, restaurant_id=restaurant_id, limit=limit)
+            page = adapter.validate_python({"items": items, "next_cursor": next_cursor}, from_attributes=True)
+            return len(items), adapter.dump_json(page)
+        return body
+
+    def fast(fetch):
+        def body(db, restaurant_id, limit):
+            items, next_cursor = fetch(db, restaurant_id=restaurant_id, limit=limit)
+            return len(items), dumps({"items": items, "next_cursor": next_cursor})
+        return body
+
+    return {
+        "sales": (orm(get_sales_by_restaurant, SaleResponse), fast(get_sale_rows_by_restaurant)),
+        "orders": (orm(get_orders_by_restaurant, OrderResponse), fast(get_order_rows_by_restaurant)),
+    }
+
+
+def measure(session_factory, body, restaurant_id, limit, repeat):
+    timings = []
+    for _ in range(repeat):
+        # A fresh session each run so the ORM path pays for hydration every time
+        db = session_factory()
+        try:
+            started = time.perf_counter()
+            rows, payload = body(db, restaurant_id, limit)
+            timings.append(time.perf_counter() - started)
+        finally:
+            db.close()
+    return rows, payload, statistics.median(timings)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    configure_environment(args)
+
+    from app.database import session
+    from app.database.models import Restaurant
+
+    db = session.SessionLocal()
+    try:
+        if not args.skip_seed:
+            seed(db, args.rows)
+        restaurant_id = db.query(Restaurant.id).order_by(Restaurant.id).limit(1).scalar()
+    finally:
+        db.close()
+    if restaurant_id is None:
+        print("No restaurants to benchmark; run without --skip-seed.")
+        return 1
+
+    failures = 0
+    print(f"{'response':8} {'rows':>7} {'orm rows/s':>12} {'fast rows/s':>12} {'speedup':>8}")
+    for name, (orm_body, fast_body) in paths().items():
+        rows, orm_payload, orm_seconds = measure(session.SessionLocal, orm_body, restaurant_id, args.rows, args.repeat)
+        _, fast_payload, fast_seconds = measure(session.SessionLocal, fast_body, restaurant_id, args.rows, args.repeat)
+        same = orm_payload == fast_payload
+        failures += not same
+        print(
+            f"{name:8} {rows:7d} {rows / orm_seconds:12,.0f} {rows / fast_seconds:12,.0f} "
+            f"{orm_seconds / fast_seconds:7.1f}x{'' if same else '  BODY DIFFERS'}"
+        )
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+Cold start benchmark: import time of app.main and time to the first /ping.
+
+Each measurement uses a fresh Python process, for every startup mode of
+app/database/schema.py:
+
+- import: seconds spent in `import app.main`.
+- first response: seconds from spawning `uvicorn app.main:app` to the first
+  200 from /ping, the Railway healthcheck.
+
+The database is migrated to head first, so the schema check passes and the
+modes differ only in the work they do at startup.
+
+    python benchmarks/startup.py                        # SQLite stand-in
+    python benchmarks/startup.py --database-url postgresql+psycopg2://...
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+MODES = {
+    "create_all": {"SCHEMA_MANAGEMENT": "create_all"},
+    "alembic+check": {"SCHEMA_MANAGEMENT": "alembic", "SCHEMA_CHECK": "warn"},
+    "alembic": {"SCHEMA_MANAGEMENT": "alembic", "SCHEMA_CHECK": "off"},
+}
+
+IMPORT_SNIPPET = "import time; started = time.perf_counter(); import app.main; print(time.perf_counter() - started)"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None,
+                        help="Database to start against (default: a temporary SQLite file)")
+    parser.add_argument("--repeat", type=int, default=5, help="Cold starts per mode; the median is reported")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds to wait for /ping")
+    parser.add_argument("--skip-migrate", action="store_true", help="Use the database schema as is")
+    return parser.parse_args(argv)
+
+
+def environment(database_url: str, mode: dict) -> dict:
+    env = {**os.environ, **mode, "DATABASE_URL": database_url, "PYTHONPATH": str(BACKEND_DIR)}
+    env.pop("ASYNC_DATABASE_URL", None)
+    return env
+
+
+def migrate(database_url: str):
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "upgrade", "head"],
+        cwd=BACKEND_DIR, env=environment(database_url, {}), check=True, capture_output=True,
+    )
+
+
+def import_seconds(env: dict) -> float:
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET], cwd=BACKEND_DIR, env=env, check=True, capture_output=True, text=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def first_response_seconds(env: dict, timeout: float) -> float:
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/ping"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with status {server.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.005)
+        raise TimeoutError(f"No response from {url} after {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.database_url is None:
+        args.database_url = f"sqlite:///{tempfile.mkdtemp()}/startup.db"
+    if not args.skip_migrate:
+        migrate(args.database_url)
+
+    print(f"{'mode':14} {'import ms':>10} {'first response ms':>18}")
+    for name, mode in MODES.items():
+        env = environment(args.database_url, mode)
+        imports = [import_seconds(env) for _ in range(args.repeat)]
+        responses = [first_response_seconds(env, args.timeout) for _ in range(args.repeat)]
+        print(f"{name:14} {statistics.median(imports) * 1000:10.0f} {statistics.median(responses) * 1000:18.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
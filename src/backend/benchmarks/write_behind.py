@@ -0,0 +1,201 @@
+"""
+Write throughput of POST /general/sales/ and POST /general/order-items/, with
+and without group commit (WRITE_BEHIND, app/services/write_behind.py).
+
+For each mode a uvicorn worker is started against the same database and
+--requests rows are posted per endpoint by --concurrency concurrent clients.
+Throughput is rows acknowledged per second; requests that failed (pool
+timeouts, 503 back-pressure) are counted as errors. Every acknowledged row is
+then looked up in the database to check that none went missing.
+
+    python benchmarks/write_behind.py                        # SQLite stand-in
+    python benchmarks/write_behind.py --database-url postgresql+psycopg2://...
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import create_engine, func, select
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from benchmarks.startup import free_port  # noqa: E402
+
+MODES = {
+    "direct": {"WRITE_BEHIND": "false"},
+    "write-behind": {"WRITE_BEHIND": "true"},
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None,
+                        help="Database to write to (default: a temporary SQLite file)")
+    parser.add_argument("--requests", type=int, default=2000, help="Rows posted per endpoint and mode")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--batch-size", default=None, help="WRITE_BEHIND_BATCH_SIZE")
+    parser.add_argument("--max-delay-ms", default=None, help="WRITE_BEHIND_MAX_DELAY_MS")
+    return parser.parse_args(argv)
+
+
+def environment(args, mode: dict) -> dict:
+    env = {**os.environ, **mode, "DATABASE_URL": args.database_url, "PYTHONPATH": str(BACKEND_DIR)}
+    env.pop("ASYNC_DATABASE_URL", None)
+    if args.batch_size:
+        env["WRITE_BEHIND_BATCH_SIZE"] = args.batch_size
+    if args.max_delay_ms:
+        env["WRITE_BEHIND_MAX_DELAY_MS"] = args.max_delay_ms
+    return env
+
+
+async def wait_ready(client, server, timeout=30.0):
+    import httpx
+
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with status {server.returncode}")
+        try:
+            if (await client.get("/ping")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.05)
+    raise TimeoutError("uvicorn did not start")
+
+
+async def post_all(client, path: str, bodies: list, concurrency: int):
+    import httpx
+
+    latencies = []
+    ids = []
+    errors = 0
+    pending = iter(bodies)
+
+    async def worker():
+        nonlocal errors
+        for body in pending:
+            started = time.perf_counter()
+            try:
+                response = await client.post(path, json=body)
+            except httpx.TransportError:
+                response = None
+            latencies.append(time.perf_counter() - started)
+            if response is not None and response.status_code == 200:
+                ids.append(response.json()["id"])
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "rows_per_second": len(ids) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "ids": ids,
+        "errors": errors,
+    }
+
+
+async def run_mode(args, name: str, mode: dict) -> dict:
+    import httpx
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR, env=environment(args, mode), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    limits = httpx.Limits(max_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+            await wait_ready(client, server)
+            async def create(path, body):
+                response = await client.post(path, json=body)
+                response.raise_for_status()
+                return response.json()
+
+            user = await create("/general/users/", {"email": f"{name}@example.com", "is_active": True, "password": "x"})
+            restaurant = await create("/general/restaurants/", {"name": name, "owner_id": user["id"]})
+            menu_item = await create("/general/menu-items/", {
+                "name": "Item", "price": 10, "cost": 4, "category": None, "is_available": True,
+                "restaurant_id": restaurant["id"],
+            })
+            now = datetime.utcnow().isoformat()
+            order = await create("/general/orders/", {
+                "order": {"customer_name": None, "total_amount": 10, "timestamp": now, "status": "completed",
+                          "restaurant_id": restaurant["id"]},
+                "items": [],
+            })
+
+            sales = [{"amount": 10, "timestamp": now, "restaurant_id": restaurant["id"]}] * args.requests
+            items = [
+                {"quantity": 1, "unit_price": 10, "order_id": order["id"], "menu_item_id": menu_item["id"]}
+            ] * args.requests
+            results = {
+                "sales": await post_all(client, "/general/sales/", sales, args.concurrency),
+                "order_items": await post_all(client, "/general/order-items/", items, args.concurrency),
+            }
+            stats = (await client.get("/monitoring/write-behind")).json()
+            for table, result in results.items():
+                result["rows_per_batch"] = stats.get(table, {}).get("rows_per_batch") or 1
+            return results
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def count_rows(database_url: str, results: dict) -> dict:
+    from app.database.models import OrderItem, Sale
+
+    engine = create_engine(database_url)
+    try:
+        with engine.connect() as conn:
+            return {
+                table: conn.execute(
+                    select(func.count()).select_from(model).where(model.id.in_(results[table]["ids"]))
+                ).scalar()
+                for table, model in (("sales", Sale), ("order_items", OrderItem))
+            }
+    finally:
+        engine.dispose()
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.database_url is None:
+        args.database_url = f"sqlite:///{tempfile.mkdtemp()}/write_behind.db"
+    os.environ["DATABASE_URL"] = args.database_url
+
+    from app.database.models import Base
+
+    engine = create_engine(args.database_url)
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    print(f"{args.requests} rows per endpoint, {args.concurrency} concurrent clients")
+    print(f"{'mode':14} {'endpoint':12} {'rows/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'stored':>7} {'rows/commit':>11}")
+    failed = False
+    for name, mode in MODES.items():
+        results = asyncio.run(run_mode(args, name, mode))
+        stored = count_rows(args.database_url, results)
+        for table, result in results.items():
+            failed |= stored[table] != len(result["ids"])
+            print(f"{name:14} {table:12} {result['rows_per_second']:9.0f} {result['p50_ms']:8.1f} "
+                  f"{result['p99_ms']:8.1f} {result['errors']:7} {stored[table]:7} {result['rows_per_batch']:11}")
+    if failed:
+        print("Some acknowledged rows are missing from the database.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
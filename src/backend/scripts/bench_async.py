@@ -0,0 +1,109 @@
+"""
+Compares concurrent-request throughput of the sync (threadpool) and async
+(AsyncSession) database paths.
+
+Both endpoints run the same CRUD code (the scalar KPI query) through an
+in-process ASGI client, so the difference is only in how a request waits on
+the database. On Postgres, --db-latency-ms adds a pg_sleep to every request to
+simulate a slow network or busy primary, which is where threadpool exhaustion
+shows up.
+
+    python scripts/bench_async.py --requests 2000 --concurrency 200 --threads 40
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+# Add the app directory to the Python path
+sys.path.insert(0, "/app")
+
+import anyio
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.crud import kpi
+from app.database.session import DATABASE_URL, ASYNC_DATABASE_URL
+
+
+def build_app(args) -> FastAPI:
+    pool = {"pool_size": args.pool_size, "max_overflow": 0} if not DATABASE_URL.startswith("sqlite") else {}
+    sync_sessions = sessionmaker(bind=create_engine(DATABASE_URL, **pool))
+    async_sessions = async_sessionmaker(create_async_engine(ASYNC_DATABASE_URL, **pool))
+    latency = args.db_latency_ms / 1000
+
+    def work(db: Session):
+        if latency:
+            db.execute(text("SELECT pg_sleep(:seconds)"), {"seconds": latency})
+        return kpi.get_scalar_kpis(db, [args.restaurant_id])
+
+    def get_sync_db():
+        db = sync_sessions()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def get_async_db():
+        async with async_sessions() as db:
+            yield db
+
+    app = FastAPI()
+
+    @app.get("/sync")
+    def sync_endpoint(db: Session = Depends(get_sync_db)):
+        return work(db)
+
+    @app.get("/async")
+    async def async_endpoint(db: AsyncSession = Depends(get_async_db)):
+        return await db.run_sync(work)
+
+    return app
+
+
+async def drive(client: httpx.AsyncClient, path: str, requests: int, concurrency: int):
+    latencies = []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            started = time.perf_counter()
+            response = await client.get(path)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "rps": requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+async def main(args):
+    anyio.to_thread.current_default_thread_limiter().total_tokens = args.threads
+    app = build_app(args)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path in ("/sync", "/async"):
+            await drive(client, path, min(args.requests, 50), args.concurrency)  # warm up the pools
+            result = await drive(client, path, args.requests, args.concurrency)
+            print(f"{path:7} {result['rps']:9.1f} req/s   p50 {result['p50_ms']:7.1f} ms   p95 {result['p95_ms']:7.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--threads", type=int, default=40, help="Starlette threadpool size for the sync path")
+    parser.add_argument("--pool-size", type=int, default=50, help="Connections per engine (Postgres)")
+    parser.add_argument("--db-latency-ms", type=float, default=0, help="Simulated per-request DB latency (Postgres)")
+    parser.add_argument("--restaurant-id", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,27 @@
+import argparse
+import sys
+from datetime import date
+
+# Add the app directory to the Python path
+sys.path.insert(0, "/app")
+
+from app.database import session
+from app.database.partitions import PARTITION_MONTHS_AHEAD, ensure_engine_partitions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Create the monthly partitions of sales, orders and order_items ahead of time. "
+                    "Safe to run repeatedly, e.g. daily from cron."
+    )
+    parser.add_argument("--months-ahead", type=int, default=PARTITION_MONTHS_AHEAD)
+    parser.add_argument("--start", type=date.fromisoformat, default=None,
+                        help="Also create partitions from this date's month (default: current month)")
+    args = parser.parse_args()
+
+    created = ensure_engine_partitions(session.engine, start=args.start, months_ahead=args.months_ahead)
+    print(f"Created {len(created)} partition(s){': ' + ', '.join(created) if created else '.'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Checks that the KPI queries in app/crud/kpi.py are answered from the composite
+(restaurant_id, timestamp) indexes rather than full table scans.
+
+Runs EXPLAIN against DATABASE_URL (Postgres or SQLite) and exits non-zero if
+any query does not use its expected index. Sequential scans are disabled on
+Postgres so the check holds even on small development datasets, where the
+planner would otherwise prefer a seq scan. On partitioned tables the
+per-partition indexes are reported under the name of their parent index.
+"""
+import json
+import sys
+
+# Add the app directory to the Python path
+sys.path.insert(0, "/app")
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.database import session
+from app.crud import kpi
+
+EXPECTED_INDEXES = {
+    "revenue_today": (kpi.revenue_today_query, "ix_sales_restaurant_id_timestamp"),
+    "orders_today": (kpi.orders_today_query, "ix_orders_restaurant_id_timestamp"),
+}
+
+
+def _postgres_indexes(plan: dict) -> set[str]:
+    names = {plan["Index Name"]} if "Index Name" in plan else set()
+    for child in plan.get("Plans", []):
+        names |= _postgres_indexes(child)
+    return names
+
+
+def used_indexes(db: Session, query) -> set[str]:
+    compiled = query.statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True})
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SET LOCAL enable_seqscan = off"))
+        plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}")).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        parents = dict(db.execute(text(
+            "SELECT c.relname, p.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent WHERE c.relkind = 'i'"
+        )).all())
+        return {parents.get(name, name) for name in _postgres_indexes(plan[0]["Plan"])}
+    rows = db.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).fetchall()
+    return {word for row in rows for word in row[-1].split() if word.startswith("ix_")}
+
+
+def main() -> int:
+    db = next(session.get_db())
+    failures = 0
+    try:
+        for name, (build_query, index) in EXPECTED_INDEXES.items():
+            indexes = used_indexes(db, build_query(db, restaurant_id=1))
+            status = "ok" if index in indexes else "FAIL"
+            failures += status == "FAIL"
+            print(f"{status:4} {name}: uses {sorted(indexes) or 'no index'} (expected {index})")
+    finally:
+        db.rollback()
+        db.close()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
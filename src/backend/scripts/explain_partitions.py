@@ -0,0 +1,104 @@
+"""
+Checks that the KPI, menu-performance and date-bounded list queries only read
+the partitions of the month they ask about (Postgres partition pruning, see
+app/database/partitions.py).
+
+Each check runs the real CRUD function against DATABASE_URL, captures the SQL
+it issues, and runs EXPLAIN on every statement. The script exits non-zero if a
+statement reads a partition of sales, orders or order_items other than the
+current month's. Menu performance is served from menu_item_daily_sales and the
+daily rollup, so it must not read any partition at all.
+"""
+import json
+import sys
+from datetime import datetime
+
+# Add the app directory to the Python path
+sys.path.insert(0, "/app")
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.database import session
+from app.database.models import Order, Restaurant, Sale
+from app.database.partitions import PARTITIONED_TABLES, add_months, month_start, partition_name, partitioned_tables
+from app.crud import kpi, menu
+from app.crud.pagination import keyset_page
+
+
+def _this_month(db: Session, restaurant_id: int, model):
+    start = month_start(datetime.utcnow())
+    query = db.query(model).filter(model.restaurant_id == restaurant_id)
+    return keyset_page(query, model.timestamp, model.id, start=datetime.combine(start, datetime.min.time()),
+                       end=datetime.combine(add_months(start, 1), datetime.min.time()))
+
+
+CHECKS = {
+    "kpis": lambda db, restaurant_id: kpi.get_kpis(db, restaurant_id=restaurant_id),
+    "revenue_today": lambda db, restaurant_id: kpi.get_revenue_today(db, restaurant_id=restaurant_id),
+    "orders_today": lambda db, restaurant_id: kpi.get_orders_today(db, restaurant_id=restaurant_id),
+    "menu_performance_30_days": lambda db, restaurant_id: menu.get_menu_performance(db, restaurant_id, days=30),
+    "menu_performance_365_days": lambda db, restaurant_id: menu.get_menu_performance(db, restaurant_id, days=365),
+    "sales_this_month": lambda db, restaurant_id: _this_month(db, restaurant_id, Sale),
+    "orders_this_month": lambda db, restaurant_id: _this_month(db, restaurant_id, Order),
+}
+
+
+def _relations(plan: dict) -> set[str]:
+    names = {plan["Relation Name"]} if "Relation Name" in plan else set()
+    for child in plan.get("Plans", []):
+        names |= _relations(child)
+    return names
+
+
+def partitions_read(db: Session, statements: list) -> set[str]:
+    connection = db.connection()
+    partitions = {
+        row.relname for row in connection.execute(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = ANY(:tables)"
+        ), {"tables": list(PARTITIONED_TABLES)})
+    }
+    read = set()
+    for statement, parameters in statements:
+        plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        read |= _relations(plan[0]["Plan"]) & partitions
+    return read
+
+
+def main() -> int:
+    db = next(session.get_db())
+    if not partitioned_tables(db.connection()):
+        print("No partitioned tables (partitioning needs Postgres and migration 0005); nothing to check.")
+        return 0
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    restaurant_id = db.query(Restaurant.id).order_by(Restaurant.id).limit(1).scalar() or 1
+    allowed = {partition_name(table, month_start(datetime.utcnow())) for table in PARTITIONED_TABLES}
+    failures = 0
+    try:
+        for name, check in CHECKS.items():
+            statements.clear()
+            event.listen(session.engine, "before_cursor_execute", capture)
+            try:
+                check(db, restaurant_id)
+            finally:
+                event.remove(session.engine, "before_cursor_execute", capture)
+            read = partitions_read(db, list(statements))
+            status = "ok" if read <= allowed else "FAIL"
+            failures += status == "FAIL"
+            print(f"{status:4} {name}: reads {sorted(read) or 'no partitions'}")
+    finally:
+        db.rollback()
+        db.close()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,28 @@
+import argparse
+import sys
+
+# Add the app directory to the Python path
+sys.path.insert(0, "/app")
+
+from app.database import session
+from app.crud.rollup import rebuild_daily_sales_rollup, rebuild_menu_item_daily_sales
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild daily_sales_rollup and menu_item_daily_sales from raw sales and orders.")
+    parser.add_argument("--restaurant-id", type=int, default=None, help="Only rebuild this restaurant")
+    args = parser.parse_args()
+
+    db = next(session.get_db())
+    try:
+        print("Rebuilding daily sales rollup...")
+        rebuild_daily_sales_rollup(db, restaurant_id=args.restaurant_id)
+        print("Rebuilding menu item daily sales...")
+        rebuild_menu_item_daily_sales(db, restaurant_id=args.restaurant_id)
+        print("Rollups rebuilt.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,175 +1,300 @@
+"""
+Populates the database with realistic mock data.
+
+With no arguments it recreates the original demo dataset (one restaurant,
+90 days of history). The same command scales to load-test volumes:
+
+    python scripts/seed.py --restaurants 200 --days 365 --orders-per-day 80-160 --workers 8
+
+Rows are generated per restaurant with a deterministic RNG (--seed), written in
+chunks with COPY on Postgres (executemany elsewhere) and, optionally, by several
+worker processes in parallel. Order, item and sale ids are assigned up front
+from per-restaurant blocks, so workers never coordinate with each other.
+"""
+import argparse
+import csv
+import io
 import random
 import sys
+import time
 from datetime import datetime, timedelta
+from multiprocessing import Pool
+
 from faker import Faker
+from sqlalchemy import create_engine, func, select, text
 from sqlalchemy.orm import Session
-from sqlalchemy import text
 
 # Add the app directory to the Python path
 sys.path.insert(0, "/app")
 
 from app.database import session, models
+from app.database.partitions import ensure_engine_partitions
+from app.crud.rollup import rebuild_daily_sales_rollup, rebuild_menu_item_daily_sales
 
-fake = Faker('pt_BR')
+INVENTORY_ITEMS = [
+    {"name": "Tomate", "quantity": 50.0, "min_threshold": 10.0, "unit": "kg"},
+    {"name": "Queijo Mussarela", "quantity": 25.5, "min_threshold": 5.0, "unit": "kg"},
+    {"name": "Farinha de Trigo", "quantity": 100.0, "min_threshold": 20.0, "unit": "kg"},
+    {"name": "Frango", "quantity": 40.0, "min_threshold": 15.0, "unit": "kg"},
+    {"name": "Batata", "quantity": 8.0, "min_threshold": 10.0, "unit": "kg"},  # Example of low stock
+]
 
-def seed_database(db: Session):
-    """
-    Clears existing data and populates the database with realistic mock data.
-    """
-    print("Clearing old data...")
-    # Clear data in reverse order of dependencies to avoid foreign key constraints
-    db.query(models.OrderItem).delete()
-    db.query(models.Sale).delete()
-    db.query(models.Order).delete()
-    db.query(models.MenuItem).delete()
-    db.query(models.InventoryItem).delete()
-    db.query(models.Restaurant).delete()
-    db.query(models.User).delete()
-    db.commit()
-    
-    # Reset ID sequences to start from 1
-    print("Resetting ID sequences...")
-    try:
-        db.execute(text("ALTER SEQUENCE users_id_seq RESTART WITH 1"))
-        db.execute(text("ALTER SEQUENCE restaurants_id_seq RESTART WITH 1"))
-        db.execute(text("ALTER SEQUENCE inventory_items_id_seq RESTART WITH 1"))
-        db.execute(text("ALTER SEQUENCE menu_items_id_seq RESTART WITH 1"))
-        db.execute(text("ALTER SEQUENCE orders_id_seq RESTART WITH 1"))
-        db.execute(text("ALTER SEQUENCE sales_id_seq RESTART WITH 1"))
-        db.execute(text("ALTER SEQUENCE order_items_id_seq RESTART WITH 1"))
-        db.commit()
-        print("ID sequences reset successfully.")
-    except Exception as e:
-        print(f"Warning: Could not reset sequences: {e}")
-        db.rollback()
-    
-    print("Old data cleared and sequences reset.")
-
-    # --- Create Base Entities ---
-    print("Creating base entities (Users, Restaurant)...")
-    
-    # Create admin user
-    admin = models.User(
-        email="admin@pilot.com",
-        hashed_password="fakehashedpassword",
-        first_name="Admin",
-        last_name="System",
-        phone=fake.phone_number(),
-        address=fake.address(),
-        role="admin"
-    )
-    db.add(admin)
-    
-    # Create manager user
-    manager = models.User(
-        email="manager@pilot.com",
-        hashed_password="fakehashedpassword",
-        first_name=fake.first_name(),
-        last_name=fake.last_name(),
-        phone=fake.phone_number(),
-        address=fake.address(),
-        role="manager"
-    )
-    db.add(manager)
-    
-    # Create some staff users
-    for _ in range(3):
-        staff = models.User(
-            email=fake.email(),
-            hashed_password="fakehashedpassword",
-            first_name=fake.first_name(),
-            last_name=fake.last_name(),
-            phone=fake.phone_number(),
-            address=fake.address(),
-            role="staff"
-        )
-        db.add(staff)
-    
-    db.commit()
-    
-    # Use the manager as the restaurant owner
-    user = manager
+MENU_ITEMS = [
+    {"name": "Pizza de Mussarela", "price": 45.50, "cost": 20.00, "category": "Pizzas"},
+    {"name": "Frango a Parmegiana", "price": 55.00, "cost": 25.00, "category": "Pratos Principais"},
+    {"name": "Batata Frita", "price": 25.00, "cost": 8.00, "category": "Acompanhamentos"},
+    {"name": "Suco de Laranja", "price": 12.00, "cost": 4.00, "category": "Bebidas"},
+]
 
-    restaurant = models.Restaurant(
-        name="Example Restaurant",
-        owner_id=user.id
-    )
-    db.add(restaurant)
+# Inventory used per menu item sold (menu item -> inventory item -> amount)
+RECIPES = {
+    "Pizza de Mussarela": {"Farinha de Trigo": 0.3, "Queijo Mussarela": 0.2, "Tomate": 0.1},
+    "Frango a Parmegiana": {"Frango": 0.25, "Queijo Mussarela": 0.1, "Tomate": 0.1},
+    "Batata Frita": {"Batata": 0.3},
+}
+
+MAX_ITEMS_PER_ORDER = 4
+
+ORDER_COLUMNS = ["id", "restaurant_id", "customer_name", "total_amount", "timestamp", "status"]
+ORDER_ITEM_COLUMNS = ["id", "order_id", "menu_item_id", "quantity", "unit_price", "timestamp"]
+SALE_COLUMNS = ["id", "restaurant_id", "amount", "timestamp", "order_id"]
+
+
+def parse_range(value: str) -> tuple[int, int]:
+    low, _, high = value.partition("-")
+    return int(low), int(high or low)
+
+
+def reset_database(db: Session):
+    print("Clearing old data and resetting ID sequences...")
+    if db.get_bind().dialect.name == "postgresql":
+        tables = ", ".join(table.name for table in models.Base.metadata.sorted_tables)
+        db.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+    else:
+        # Clear data in reverse order of dependencies to avoid foreign key constraints
+        for table in reversed(models.Base.metadata.sorted_tables):
+            db.execute(table.delete())
     db.commit()
 
-    # --- Create Inventory and Menu ---
-    print("Creating inventory and menu items...")
-    inventory_items_data = [
-        {"name": "Tomate", "quantity": 50.0, "min_threshold": 10.0, "unit": "kg"},
-        {"name": "Queijo Mussarela", "quantity": 25.5, "min_threshold": 5.0, "unit": "kg"},
-        {"name": "Farinha de Trigo", "quantity": 100.0, "min_threshold": 20.0, "unit": "kg"},
-        {"name": "Frango", "quantity": 40.0, "min_threshold": 15.0, "unit": "kg"},
-        {"name": "Batata", "quantity": 8.0, "min_threshold": 10.0, "unit": "kg"}, # Example of low stock
+
+def create_base_entities(db: Session, fake: Faker, restaurants: int):
+    """Users, restaurants, inventory and menus; returns per-restaurant menus."""
+    print(f"Creating base entities for {restaurants} restaurant(s)...")
+    users = [
+        models.User(email="admin@pilot.com", hashed_password="fakehashedpassword", first_name="Admin",
+                    last_name="System", phone=fake.phone_number(), address=fake.address(), role="admin"),
+        models.User(email="manager@pilot.com", hashed_password="fakehashedpassword", first_name=fake.first_name(),
+                    last_name=fake.last_name(), phone=fake.phone_number(), address=fake.address(), role="manager"),
+    ]
+    users += [
+        models.User(email=fake.unique.email(), hashed_password="fakehashedpassword", first_name=fake.first_name(),
+                    last_name=fake.last_name(), phone=fake.phone_number(), address=fake.address(), role="staff")
+        for _ in range(3)
     ]
-    for item_data in inventory_items_data:
-        item = models.InventoryItem(**item_data, restaurant_id=restaurant.id)
-        db.add(item)
+    # With --append the users of an earlier run are reused (same seed, same
+    # emails) and only the restaurants are new
+    existing = {
+        user.email: user
+        for user in db.query(models.User).filter(models.User.email.in_([user.email for user in users]))
+    }
+    db.add_all(user for user in users if user.email not in existing)
     db.commit()
 
-    menu_items_data = [
-        {"name": "Pizza de Mussarela", "price": 45.50, "cost": 20.00, "category": "Pizzas"},
-        {"name": "Frango a Parmegiana", "price": 55.00, "cost": 25.00, "category": "Pratos Principais"},
-        {"name": "Batata Frita", "price": 25.00, "cost": 8.00, "category": "Acompanhamentos"},
-        {"name": "Suco de Laranja", "price": 12.00, "cost": 4.00, "category": "Bebidas"},
-    ]
-    menu_items = []
-    for item_data in menu_items_data:
-        item = models.MenuItem(**item_data, restaurant_id=restaurant.id)
-        menu_items.append(item)
-        db.add(item)
+    # Use the manager as the restaurant owner
+    manager = existing.get(users[1].email, users[1])
+    names = ["Example Restaurant"] + [fake.company() for _ in range(restaurants - 1)]
+    db_restaurants = [models.Restaurant(name=name, owner_id=manager.id) for name in names]
+    db.add_all(db_restaurants)
     db.commit()
 
-    # --- Generate Historical Sales and Orders ---
-    print("Generating historical orders and sales for the last 90 days...")
-    today = datetime.now()
-    for i in range(90): # Generate data for the past 90 days
-        current_date = today - timedelta(days=i)
-        # Simulate more orders on weekends
-        num_orders = random.randint(20, 50) if current_date.weekday() < 5 else random.randint(50, 100)
-
-        for _ in range(num_orders):
-            order_time = fake.date_time_between(start_date=current_date.replace(hour=11), end_date=current_date.replace(hour=22))
-            order = models.Order(
-                timestamp=order_time,
-                restaurant_id=restaurant.id,
-                total_amount=0  # Will be updated after adding items
-            )
-            db.add(order)
-            db.flush() # Use flush to get the order.id before committing
-
-            total_order_value = 0
-            num_order_items = random.randint(1, 4)
-            for _ in range(num_order_items):
-                menu_item = random.choice(menu_items)
-                quantity = random.randint(1, 2)
-                order_item = models.OrderItem(
-                    order_id=order.id,
-                    menu_item_id=menu_item.id,
-                    quantity=quantity
-                )
-                db.add(order_item)
-                total_order_value += menu_item.price * quantity
-
-            sale = models.Sale(
-                amount=total_order_value,
-                timestamp=order_time,
-                order_id=order.id,
-                restaurant_id=restaurant.id
+    menus = {}
+    for restaurant in db_restaurants:
+        inventory = {item["name"]: models.InventoryItem(**item, restaurant_id=restaurant.id) for item in INVENTORY_ITEMS}
+        db.add_all(inventory.values())
+        menu = [models.MenuItem(**item, restaurant_id=restaurant.id) for item in MENU_ITEMS]
+        db.add_all(menu)
+        db.flush()
+        db.add_all(
+            models.RecipeIngredient(menu_item_id=item.id, inventory_item_id=inventory[name].id, amount=amount)
+            for item in menu
+            for name, amount in RECIPES.get(item.name, {}).items()
+        )
+        menus[restaurant.id] = [(item.id, item.price) for item in menu]
+    db.commit()
+    return menus
+
+
+def next_ids(db: Session) -> dict[str, int]:
+    return {
+        name: (db.execute(select(func.max(model.id))).scalar() or 0) + 1
+        for name, model in (("orders", models.Order), ("order_items", models.OrderItem), ("sales", models.Sale))
+    }
+
+
+class RowWriter:
+    """Buffers rows per table and flushes them in chunks."""
+
+    def __init__(self, connection, chunk_size: int):
+        self.connection = connection
+        self.chunk_size = chunk_size
+        self.buffers = {"orders": [], "order_items": [], "sales": []}
+        self.columns = {"orders": ORDER_COLUMNS, "order_items": ORDER_ITEM_COLUMNS, "sales": SALE_COLUMNS}
+        raw = connection.connection.dbapi_connection
+        self.use_copy = connection.dialect.name == "postgresql" and hasattr(raw.cursor(), "copy_expert")
+        self.rows_written = 0
+
+    def add(self, table: str, row: tuple):
+        buffer = self.buffers[table]
+        buffer.append(row)
+        if len(buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush_table(self, table: str):
+        rows = self.buffers[table]
+        if not rows:
+            return
+        columns = self.columns[table]
+        if self.use_copy:
+            data = io.StringIO()
+            csv.writer(data).writerows(rows)
+            data.seek(0)
+            cursor = self.connection.connection.dbapi_connection.cursor()
+            cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", data)
+        else:
+            self.connection.execute(
+                models.Base.metadata.tables[table].insert(),
+                [dict(zip(columns, row)) for row in rows],
             )
-            db.add(sale)
+        self.rows_written += len(rows)
+        rows.clear()
 
-    db.commit()
+    def flush(self):
+        # Parents first so foreign keys are satisfied within the transaction
+        for table in ("orders", "order_items", "sales"):
+            self.flush_table(table)
+
+
+def generate_restaurant(task) -> int:
+    """Worker entry point: writes the full history of one restaurant."""
+    restaurant_index, restaurant_id, menu, ids, args = task
+    rng = random.Random(f"{args.seed}:{restaurant_index}")
+    orders_per_restaurant = args.days * args.max_orders
+    order_id = ids["orders"] + restaurant_index * orders_per_restaurant
+    item_id = ids["order_items"] + restaurant_index * orders_per_restaurant * MAX_ITEMS_PER_ORDER
+    sale_id = ids["sales"] + restaurant_index * orders_per_restaurant
+    low, high = args.orders_per_day
+
+    engine = create_engine(session.DATABASE_URL)
+    with engine.begin() as connection:
+        writer = RowWriter(connection, args.chunk_size)
+        today = args.end_date
+        for day in range(args.days):
+            current_date = today - timedelta(days=day)
+            opening = current_date.replace(hour=11, minute=0, second=0, microsecond=0)
+            # Simulate more orders on weekends
+            num_orders = rng.randint(low, high)
+            if current_date.weekday() >= 5:
+                num_orders = min(int(num_orders * args.weekend_multiplier), args.max_orders)
+            for _ in range(num_orders):
+                order_time = opening + timedelta(seconds=rng.randint(0, 11 * 3600))
+                items = []
+                for _ in range(rng.randint(1, MAX_ITEMS_PER_ORDER)):
+                    menu_item_id, price = rng.choice(menu)
+                    items.append((item_id, order_id, menu_item_id, rng.randint(1, 2), price, order_time))
+                    item_id += 1
+                total_order_value = sum(quantity * price for _, _, _, quantity, price, _ in items)
+                # The order row is buffered before its items so a chunk flush never
+                # writes an item whose order is still pending
+                writer.add("orders", (order_id, restaurant_id, None, total_order_value, order_time, "Pendente"))
+                for item in items:
+                    writer.add("order_items", item)
+                writer.add("sales", (sale_id, restaurant_id, total_order_value, order_time, order_id))
+                order_id += 1
+                sale_id += 1
+        writer.flush()
+    engine.dispose()
+    return writer.rows_written
+
+
+def generate_history(db: Session, menus: dict, args):
+    # Without them the history would all land in the default partitions
+    start = args.end_date - timedelta(days=args.days)
+    created = ensure_engine_partitions(session.engine, start=start, end=args.end_date)
+    if created:
+        print(f"Created {len(created)} monthly partitions.")
+    ids = next_ids(db)
+    tasks = [(index, restaurant_id, menu, ids, args) for index, (restaurant_id, menu) in enumerate(menus.items())]
+    print(f"Generating {args.days} days of orders and sales for {len(tasks)} restaurant(s) "
+          f"with {args.workers} worker(s)...")
+    started = time.perf_counter()
+    if args.workers > 1:
+        with Pool(args.workers) as pool:
+            rows = sum(pool.imap_unordered(generate_restaurant, tasks))
+    else:
+        rows = sum(map(generate_restaurant, tasks))
+    elapsed = time.perf_counter() - started
+    print(f"Wrote {rows} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):.0f} rows/s).")
+
+    if db.get_bind().dialect.name == "postgresql":
+        # Ids were assigned explicitly, so move the sequences past them
+        for table in ("orders", "order_items", "sales"):
+            db.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE((SELECT MAX(id) FROM {table}), 1))"
+            ))
+        db.commit()
+
+
+def seed_database(db: Session, args):
+    """
+    Clears existing data (unless --append) and populates the database with
+    realistic mock data.
+    """
+    fake = Faker('pt_BR')
+    fake.seed_instance(args.seed)
+    # The app only creates tables when it starts (see app/database/schema.py),
+    # and seeding may come first; existing tables are left as they are
+    models.Base.metadata.create_all(bind=db.get_bind())
+    if not args.append:
+        reset_database(db)
+    menus = create_base_entities(db, fake, args.restaurants)
+    generate_history(db, menus, args)
+
+    # Orders above bypass the CRUD layer, so build the rollups in one pass each.
+    # They also leave stock at the levels above instead of consuming the recipes.
+    print("Building daily sales rollup...")
+    rebuild_daily_sales_rollup(db)
+    print("Building menu item daily sales...")
+    rebuild_menu_item_daily_sales(db)
     print("Database seeding complete!")
 
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--restaurants", type=int, default=1)
+    parser.add_argument("--days", type=int, default=90, help="Days of history ending today")
+    parser.add_argument("--orders-per-day", type=parse_range, default=(20, 50),
+                        help="Weekday orders per restaurant per day, as N or MIN-MAX")
+    parser.add_argument("--weekend-multiplier", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=42, help="RNG seed; the same seed yields the same data")
+    parser.add_argument("--workers", type=int, default=1, help="Parallel worker processes (Postgres only)")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Rows buffered per bulk write")
+    parser.add_argument("--append", action="store_true", help="Keep existing data and add new restaurants")
+    parser.add_argument("--end-date", type=datetime.fromisoformat, default=None,
+                        help="Last day of history (default: now); fix it for fully reproducible datasets")
+    args = parser.parse_args(argv)
+
+    args.max_orders = max(args.orders_per_day[1], int(args.orders_per_day[1] * args.weekend_multiplier))
+    args.end_date = args.end_date or datetime.now()
+    if session.DATABASE_URL.startswith("sqlite") and args.workers > 1:
+        print("SQLite does not support concurrent writers; using a single worker.")
+        args.workers = 1
+    return args
+
+
 if __name__ == "__main__":
+    arguments = parse_args()
     db_session = next(session.get_db())
     try:
-        seed_database(db_session)
+        seed_database(db_session, arguments)
     finally:
         db_session.close()
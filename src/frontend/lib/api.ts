@@ -52,6 +52,9 @@ export interface InventoryCategory {
 // API utility functions
 async function fetchApi<T>(endpoint: string, options: RequestInit = {}): Promise<T> {
   const response = await fetch(`${API_BASE_URL}${endpoint}`, {
+    // Send the API's read_primary cookie back, so reads right after a write
+    // see it even when the backend reads from a replica
+    credentials: 'include',
     ...options,
     headers: {
       'Content-Type': 'application/json',